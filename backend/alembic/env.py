@@ -11,7 +11,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 # Import models and database
 from app.core.database import Base
 from app.core.config import settings
-from app.models import User, Project, ProjectSDG, ProjectTypology, ProjectRequirement, ProjectImage
+from app.models import User, Project, ProjectSDG, ProjectTypology, ProjectRequirement, ProjectImage, DatasetVersion
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,73 @@
+"""Add project full-text search
+
+Revision ID: 76894f773d2c
+Revises: 8c7435fe262e
+Create Date: 2026-10-18 09:30:12.418207
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '76894f773d2c'
+down_revision = '8c7435fe262e'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_COLUMNS = "project_name, city, country, brief_description, detailed_description, success_factors"
+NEW_VALUES = ", ".join(f"new.{c.strip()}" for c in SEARCH_COLUMNS.split(","))
+OLD_VALUES = ", ".join(f"old.{c.strip()}" for c in SEARCH_COLUMNS.split(","))
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.execute("""
+            ALTER TABLE projects ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(project_name, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(city, '') || ' ' || coalesce(country, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(brief_description, '')), 'C') ||
+                setweight(to_tsvector('simple', coalesce(detailed_description, '') || ' ' ||
+                    coalesce(success_factors, '')), 'D')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX ix_projects_search_vector ON projects USING GIN (search_vector)")
+
+    elif dialect == "sqlite":
+        op.execute(
+            f"CREATE VIRTUAL TABLE project_search USING fts5({SEARCH_COLUMNS}, "
+            f"content='projects', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            f"CREATE TRIGGER project_search_ai AFTER INSERT ON projects BEGIN "
+            f"INSERT INTO project_search(rowid, {SEARCH_COLUMNS}) VALUES (new.rowid, {NEW_VALUES}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER project_search_ad AFTER DELETE ON projects BEGIN "
+            f"INSERT INTO project_search(project_search, rowid, {SEARCH_COLUMNS}) "
+            f"VALUES ('delete', old.rowid, {OLD_VALUES}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER project_search_au AFTER UPDATE OF {SEARCH_COLUMNS} ON projects BEGIN "
+            f"INSERT INTO project_search(project_search, rowid, {SEARCH_COLUMNS}) "
+            f"VALUES ('delete', old.rowid, {OLD_VALUES}); "
+            f"INSERT INTO project_search(rowid, {SEARCH_COLUMNS}) VALUES (new.rowid, {NEW_VALUES}); END"
+        )
+        # Index the projects that already exist
+        op.execute("INSERT INTO project_search(project_search) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_projects_search_vector")
+        op.execute("ALTER TABLE projects DROP COLUMN IF EXISTS search_vector")
+
+    elif dialect == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS project_search_au")
+        op.execute("DROP TRIGGER IF EXISTS project_search_ad")
+        op.execute("DROP TRIGGER IF EXISTS project_search_ai")
+        op.execute("DROP TABLE IF EXISTS project_search")
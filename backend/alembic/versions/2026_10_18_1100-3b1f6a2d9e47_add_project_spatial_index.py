@@ -0,0 +1,122 @@
+"""Add project spatial index
+
+Revision ID: 3b1f6a2d9e47
+Revises: 76894f773d2c
+Create Date: 2026-10-18 11:00:41.902315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b1f6a2d9e47'
+down_revision = '76894f773d2c'
+branch_labels = None
+depends_on = None
+
+
+# Same encoding as app.models.spatial at the time of this revision
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = 9) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        if coordinate >= middle:
+            value = (value << 1) | 1
+            interval[0] = middle
+        else:
+            value <<= 1
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+
+    op.add_column('projects', sa.Column('geohash', sa.String(length=12), nullable=True))
+    op.create_index(op.f('ix_projects_geohash'), 'projects', ['geohash'], unique=False)
+
+    # Backfill geohashes of existing projects
+    projects = sa.table(
+        'projects', sa.column('id'), sa.column('latitude'),
+        sa.column('longitude'), sa.column('geohash'),
+    )
+    rows = bind.execute(
+        sa.select(projects.c.id, projects.c.latitude, projects.c.longitude)
+        .where(projects.c.latitude.isnot(None), projects.c.longitude.isnot(None))
+    ).fetchall()
+    for project_id, latitude, longitude in rows:
+        bind.execute(
+            projects.update().where(projects.c.id == project_id)
+            .values(geohash=encode_geohash(latitude, longitude))
+        )
+
+    if dialect == "postgresql":
+        # PostGIS is optional: only add the geography column where it is installed
+        available = bind.execute(sa.text(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'postgis'"
+        )).scalar()
+        if available:
+            op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+            op.execute("""
+                ALTER TABLE projects ADD COLUMN location geography(Point, 4326) GENERATED ALWAYS AS (
+                    CASE WHEN latitude IS NOT NULL AND longitude IS NOT NULL
+                    THEN ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography END
+                ) STORED
+            """)
+            op.execute("CREATE INDEX ix_projects_location ON projects USING GIST (location)")
+
+    elif dialect == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE project_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)"
+        )
+        op.execute(
+            "CREATE TRIGGER project_rtree_ai AFTER INSERT ON projects BEGIN "
+            "INSERT INTO project_rtree SELECT new.rowid, new.latitude, new.latitude, "
+            "new.longitude, new.longitude WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL; END"
+        )
+        op.execute(
+            "CREATE TRIGGER project_rtree_ad AFTER DELETE ON projects BEGIN "
+            "DELETE FROM project_rtree WHERE id = old.rowid; END"
+        )
+        op.execute(
+            "CREATE TRIGGER project_rtree_au AFTER UPDATE OF latitude, longitude ON projects BEGIN "
+            "DELETE FROM project_rtree WHERE id = old.rowid; "
+            "INSERT INTO project_rtree SELECT new.rowid, new.latitude, new.latitude, "
+            "new.longitude, new.longitude WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL; END"
+        )
+        # Index the projects that already exist
+        op.execute(
+            "INSERT INTO project_rtree SELECT rowid, latitude, latitude, longitude, longitude "
+            "FROM projects WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_projects_location")
+        op.execute("ALTER TABLE projects DROP COLUMN IF EXISTS location")
+
+    elif dialect == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS project_rtree_au")
+        op.execute("DROP TRIGGER IF EXISTS project_rtree_ad")
+        op.execute("DROP TRIGGER IF EXISTS project_rtree_ai")
+        op.execute("DROP TABLE IF EXISTS project_rtree")
+
+    op.drop_index(op.f('ix_projects_geohash'), table_name='projects')
+    # Plain ALTER TABLE (SQLite >= 3.35): rebuilding the table would drop
+    # the full-text search triggers
+    op.drop_column('projects', 'geohash')
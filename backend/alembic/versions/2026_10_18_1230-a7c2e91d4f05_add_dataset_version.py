@@ -0,0 +1,31 @@
+"""Add dataset version
+
+Revision ID: a7c2e91d4f05
+Revises: 3b1f6a2d9e47
+Create Date: 2026-10-18 12:30:08.114732
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c2e91d4f05'
+down_revision = '3b1f6a2d9e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    dataset_version = op.create_table(
+        'dataset_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(dataset_version.insert().values(id=1, version=1, updated_at=sa.func.current_timestamp()))
+
+
+def downgrade() -> None:
+    op.drop_table('dataset_version')
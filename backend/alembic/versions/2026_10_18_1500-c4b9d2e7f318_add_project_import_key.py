@@ -0,0 +1,26 @@
+"""Add import_key to projects table
+
+Revision ID: c4b9d2e7f318
+Revises: 5d8e3f1a6b72
+Create Date: 2026-10-18 15:00:21.503918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4b9d2e7f318'
+down_revision = '5d8e3f1a6b72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('import_key', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_projects_import_key'), 'projects', ['import_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_projects_import_key'), table_name='projects')
+    op.drop_column('projects', 'import_key')
@@ -0,0 +1,40 @@
+"""Add image variants
+
+Revision ID: e81f4a6c2b95
+Revises: c4b9d2e7f318
+Create Date: 2026-10-18 16:00:42.817305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e81f4a6c2b95'
+down_revision = 'c4b9d2e7f318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'image_variants',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('source_url', sa.String(length=1000), nullable=False),
+        sa.Column('source_hash', sa.String(length=64), nullable=False),
+        sa.Column('variant', sa.String(length=20), nullable=False),
+        sa.Column('format', sa.String(length=10), nullable=False),
+        sa.Column('url', sa.String(length=1000), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=False),
+        sa.Column('height', sa.Integer(), nullable=False),
+        sa.Column('bytes', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('source_url', 'variant', 'format')
+    )
+    op.create_index(op.f('ix_image_variants_source_url'), 'image_variants', ['source_url'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_image_variants_source_url'), table_name='image_variants')
+    op.drop_table('image_variants')
@@ -0,0 +1,43 @@
+"""Add image checks
+
+Revision ID: 3a7c5e9f1d24
+Revises: e81f4a6c2b95
+Create Date: 2026-10-18 17:00:15.402718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a7c5e9f1d24'
+down_revision = 'e81f4a6c2b95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'image_checks',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('url', sa.String(length=1000), nullable=False),
+        sa.Column('ok', sa.Boolean(), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('error', sa.String(length=500), nullable=True),
+        sa.Column('content_type', sa.String(length=100), nullable=True),
+        sa.Column('bytes', sa.Integer(), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('etag', sa.String(length=200), nullable=True),
+        sa.Column('last_modified', sa.String(length=100), nullable=True),
+        sa.Column('checked_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_image_checks_url'), 'image_checks', ['url'], unique=True)
+    op.create_index(op.f('ix_image_checks_checked_at'), 'image_checks', ['checked_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_image_checks_checked_at'), table_name='image_checks')
+    op.drop_index(op.f('ix_image_checks_url'), table_name='image_checks')
+    op.drop_table('image_checks')
@@ -0,0 +1,56 @@
+"""Unaccent project search
+
+Revision ID: 5d2e8b7c4a13
+Revises: 3a7c5e9f1d24
+Create Date: 2026-10-18 18:00:41.207339
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8b7c4a13'
+down_revision = '3a7c5e9f1d24'
+branch_labels = None
+depends_on = None
+
+
+def _add_search_vector(unaccent: str) -> None:
+    """Re-create the weighted search column, passing each text through `unaccent`"""
+    op.execute("DROP INDEX IF EXISTS ix_projects_search_vector")
+    op.execute("ALTER TABLE projects DROP COLUMN IF EXISTS search_vector")
+    op.execute(f"""
+        ALTER TABLE projects ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', {unaccent}(coalesce(project_name, ''))), 'A') ||
+            setweight(to_tsvector('simple', {unaccent}(coalesce(city, '') || ' ' || coalesce(country, ''))), 'B') ||
+            setweight(to_tsvector('simple', {unaccent}(coalesce(brief_description, ''))), 'C') ||
+            setweight(to_tsvector('simple', {unaccent}(coalesce(detailed_description, '') || ' ' ||
+                coalesce(success_factors, ''))), 'D')
+        ) STORED
+    """)
+    op.execute("CREATE INDEX ix_projects_search_vector ON projects USING GIN (search_vector)")
+
+
+def upgrade() -> None:
+    # SQLite's FTS5 table already folds diacritics (remove_diacritics 2)
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() is STABLE; generated columns need an IMMUTABLE expression.
+    # The extension lives in public, or in extensions on Supabase.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT SET search_path = public, extensions
+        AS $$ SELECT unaccent('unaccent', $1) $$
+    """)
+    _add_search_vector("immutable_unaccent")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # An empty function name leaves each text as it is
+    _add_search_vector("")
+    op.execute("DROP FUNCTION IF EXISTS immutable_unaccent(text)")
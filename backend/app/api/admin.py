@@ -1,86 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import inspect as sa_inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Union
 import uuid
+from datetime import datetime
 from uuid import UUID
-from ..core.database import get_db
+from ..core.database import async_engine, get_db
 from ..core.deps import get_current_admin
+from ..core.loading import load_project, project_loading_options, select_fields
+from ..core.pagination import paginate_projects
+from ..core.responses import trusted_json
+from ..core.response_cache import dashboard_cache
 from ..core.config import settings
+from ..core.loop_monitor import loop_monitor
+from ..core.pool import pool_stats
 from ..models.project import Project, WorkflowStatus
 from ..models.user import User
-from ..schemas.project import ProjectResponse, ProjectUpdate, ProjectListResponse
+from ..schemas.project import (
+    ProjectResponse, ProjectUpdate, ProjectListResponse, ProjectSummaryListResponse
+)
 from .projects import _format_project_response
-from ..services.email import send_changes_requested_email, send_approval_email, send_rejection_email
+from ..services.email import queue_changes_requested_email, queue_approval_email, queue_rejection_email
+from ..services.email_outbox import email_outbox
+from ..services.project_children import CHILD_FIELDS, sync_children
+from ..services.dashboard_snapshot import dashboard_snapshot
+from ..services.dataset_version import bump_dataset_version
+from ..services.spatial import BoundingBox, filter_bbox, get_bbox
 
 router = APIRouter()
 
 
-@router.get("/pending-projects", response_model=ProjectListResponse)
+@router.get("/pending-projects", response_model=Union[ProjectListResponse, ProjectSummaryListResponse])
 async def get_pending_projects(
-    page: int = 1,
-    page_size: int = 20,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    total_mode: str = Query("exact", pattern="^(exact|approximate)$"),
+    view: str = Query("full", pattern="^(summary|full)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields; overrides view"),
+    bbox: Optional[BoundingBox] = Depends(get_bbox),
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all pending project submissions for review"""
+    selected = select_fields(view, fields)
 
-    query = db.query(Project).filter(
+    query = select(Project).where(
         Project.workflow_status.in_([
             WorkflowStatus.SUBMITTED,
             WorkflowStatus.IN_REVIEW
         ])
-    ).order_by(Project.created_at.desc())
+    )
+    if bbox:
+        query = filter_bbox(query, bbox, db.get_bind().dialect.name)
 
-    total = query.count()
-    offset = (page - 1) * page_size
-    projects = query.offset(offset).limit(page_size).all()
-
-    return {
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "projects": [_format_project_response(p) for p in projects]
-    }
+    result = await paginate_projects(
+        db, query, "created_at", "desc", page, page_size, cursor, total_mode,
+        loading=project_loading_options(selected, extra_columns=("created_at",))
+    )
+    result["projects"] = [_format_project_response(p, selected) for p in result["projects"]]
+    return trusted_json(result)
 
 
-@router.get("/all-projects", response_model=ProjectListResponse)
+@router.get("/all-projects", response_model=Union[ProjectListResponse, ProjectSummaryListResponse])
 async def get_all_projects(
-    page: int = 1,
-    page_size: int = 20,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
     workflow_status: str = None,
+    cursor: Optional[str] = None,
+    total_mode: str = Query("exact", pattern="^(exact|approximate)$"),
+    view: str = Query("full", pattern="^(summary|full)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields; overrides view"),
+    bbox: Optional[BoundingBox] = Depends(get_bbox),
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all projects (any status) - admin only"""
+    selected = select_fields(view, fields)
 
-    query = db.query(Project)
+    query = select(Project)
 
     if workflow_status:
-        query = query.filter(Project.workflow_status == workflow_status)
-
-    query = query.order_by(Project.created_at.desc())
-
-    total = query.count()
-    offset = (page - 1) * page_size
-    projects = query.offset(offset).limit(page_size).all()
+        query = query.where(Project.workflow_status == workflow_status)
+    if bbox:
+        query = filter_bbox(query, bbox, db.get_bind().dialect.name)
 
-    return {
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "projects": [_format_project_response(p) for p in projects]
-    }
+    result = await paginate_projects(
+        db, query, "created_at", "desc", page, page_size, cursor, total_mode,
+        loading=project_loading_options(selected, extra_columns=("created_at",))
+    )
+    result["projects"] = [_format_project_response(p, selected) for p in result["projects"]]
+    return trusted_json(result)
 
 
 @router.get("/projects/{project_id}", response_model=ProjectResponse)
 async def get_project_admin(
     project_id: UUID,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get any project by ID (admin - any workflow status)"""
 
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await load_project(db, project_id)
 
     if not project:
         raise HTTPException(
@@ -96,11 +117,11 @@ async def update_project(
     project_id: UUID,
     update_data: ProjectUpdate,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update a project (admin only)"""
 
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
 
     if not project:
         raise HTTPException(
@@ -108,15 +129,29 @@ async def update_project(
             detail="Project not found"
         )
 
-    # Update fields
+    was_approved = project.workflow_status == WorkflowStatus.APPROVED
+
+    # Update fields: columns directly, list fields through their child rows
     update_dict = update_data.model_dump(exclude_unset=True)
+    columns = sa_inspect(Project).column_attrs.keys()
 
     for field, value in update_dict.items():
-        if hasattr(project, field):
+        if field in columns:
             setattr(project, field, value)
+    lists = {
+        field: value for field, value in update_dict.items()
+        if field in CHILD_FIELDS and value is not None
+    }
+    await sync_children(db, project.id, lists)
+    project.updated_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(project)
+    dataset_version = None
+    if was_approved or project.workflow_status == WorkflowStatus.APPROVED:
+        dataset_version = await db.run_sync(bump_dataset_version)
+    await db.commit()
+    project = await load_project(db, project.id)
+    dashboard_snapshot.sync_project(project, dataset_version)
+    dashboard_cache.invalidate()
 
     return _format_project_response(project)
 
@@ -125,11 +160,11 @@ async def update_project(
 async def approve_project(
     project_id: UUID,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Approve and publish a project"""
 
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
 
     if not project:
         raise HTTPException(
@@ -138,12 +173,15 @@ async def approve_project(
         )
 
     project.workflow_status = WorkflowStatus.APPROVED
-    db.commit()
-    db.refresh(project)
-
-    # Send email notification to submitter
+    # Notify the submitter, in the same commit as the approval
     public_link = f"{settings.FRONTEND_URL}/?project={str(project.id)}"
-    await send_approval_email(project.contact_email, project.project_name, public_link)
+    queue_approval_email(db, project.contact_email, project.project_name, public_link)
+    dataset_version = await db.run_sync(bump_dataset_version)
+    await db.commit()
+    email_outbox.wake()
+    project = await load_project(db, project.id)
+    dashboard_snapshot.sync_project(project, dataset_version)
+    dashboard_cache.invalidate()
 
     return _format_project_response(project)
 
@@ -153,11 +191,11 @@ async def reject_project(
     project_id: UUID,
     reason: str,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Reject a project with reason"""
 
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
 
     if not project:
         raise HTTPException(
@@ -167,10 +205,13 @@ async def reject_project(
 
     project.workflow_status = WorkflowStatus.REJECTED
     project.rejection_reason = reason
-    db.commit()
-
-    # Send email notification to submitter
-    await send_rejection_email(project.contact_email, project.project_name, reason)
+    # Notify the submitter, in the same commit as the rejection
+    queue_rejection_email(db, project.contact_email, project.project_name, reason)
+    dataset_version = await db.run_sync(bump_dataset_version)
+    await db.commit()
+    email_outbox.wake()
+    dashboard_snapshot.sync_project(project, dataset_version)
+    dashboard_cache.invalidate()
 
     return {"message": "Project rejected", "project_id": str(project_id)}
 
@@ -180,11 +221,11 @@ async def request_changes(
     project_id: UUID,
     message: str,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Request changes to a project"""
 
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
 
     if not project:
         raise HTTPException(
@@ -198,12 +239,15 @@ async def request_changes(
     # Generate edit token if not exists
     if not project.edit_token:
         project.edit_token = str(uuid.uuid4())
-        
-    db.commit()
 
-    # Send email with edit link to submitter
+    # Send the edit link to the submitter, in the same commit as the request
     edit_link = f"{settings.FRONTEND_URL}/submit?edit_token={project.edit_token}"
-    await send_changes_requested_email(project.contact_email, project.project_name, edit_link, message)
+    queue_changes_requested_email(db, project.contact_email, project.project_name, edit_link, message)
+    dataset_version = await db.run_sync(bump_dataset_version)
+    await db.commit()
+    email_outbox.wake()
+    dashboard_snapshot.sync_project(project, dataset_version)
+    dashboard_cache.invalidate()
 
     return {"message": "Changes requested", "project_id": str(project_id)}
 
@@ -212,11 +256,11 @@ async def request_changes(
 async def delete_project(
     project_id: UUID,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a project (admin only)"""
 
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
 
     if not project:
         raise HTTPException(
@@ -224,7 +268,30 @@ async def delete_project(
             detail="Project not found"
         )
 
-    db.delete(project)
-    db.commit()
+    dataset_version = None
+    if project.workflow_status == WorkflowStatus.APPROVED:
+        dataset_version = await db.run_sync(bump_dataset_version)
+    await db.delete(project)
+    await db.commit()
+    dashboard_snapshot.remove(project_id, dataset_version)
+    dashboard_cache.invalidate()
 
     return {"message": "Project deleted", "project_id": str(project_id)}
+
+
+@router.get("/cache-stats")
+async def get_cache_stats(current_user: User = Depends(get_current_admin)):
+    """Get hit/miss counters of the dashboard response cache"""
+    return dashboard_cache.info()
+
+
+@router.get("/pool-stats")
+async def get_pool_stats(current_user: User = Depends(get_current_admin)):
+    """Get checkout/wait counters and the current state of the database pool"""
+    return pool_stats.info(async_engine.sync_engine)
+
+
+@router.get("/loop-lag")
+async def get_loop_lag(current_user: User = Depends(get_current_admin)):
+    """Get event-loop lag percentiles and the recent stalls with their route and stack"""
+    return loop_monitor.info()
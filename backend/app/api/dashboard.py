@@ -1,37 +1,55 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct
-from typing import Optional, List
-from ..core.database import get_db
-from ..models.project import Project, ProjectSDG, ProjectTypology, ProjectRequirement, WorkflowStatus, ProjectImage
-from ..schemas.project import ProjectListResponse, DashboardKPIs, ProjectResponse
-from .projects import _format_project_response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Optional, Union
+from uuid import UUID
+from ..core.database import AsyncSessionLocal, get_db
+from ..core.http_cache import conditional_get, make_etag
+from ..core.loading import SUMMARY_FIELDS, load_project_fields, select_fields
+from ..core.pagination import decode_cursor, encode_cursor
+from ..core.responses import trusted_json
+from ..schemas.project import (
+    ProjectListResponse, ProjectSummaryListResponse, DashboardKPIs, DashboardBundle
+)
+from ..services.dashboard_snapshot import DashboardSnapshot, get_dashboard_snapshot
+from ..services.export import EXPORT_FORMATS, ExportUnavailable, export_projects
+from ..services.search import get_search_matches
+from ..services.spatial import BoundingBox, get_bbox, parse_bbox
+
+
+
+def dashboard_conditional_get(
+    request: Request,
+    response: Response,
+    snapshot: DashboardSnapshot = Depends(get_dashboard_snapshot)
+):
+    """Validate dashboard responses against the dataset version they are computed from"""
+    etag = make_etag(snapshot.version, request.url.path, sorted(request.query_params.multi_items()))
+    conditional_get(request, response, etag, snapshot.modified_at)
+
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(dashboard_conditional_get)])
 
 
 @router.get("/filters")
-async def get_dashboard_filters(db: Session = Depends(get_db)):
+async def get_dashboard_filters(snapshot: DashboardSnapshot = Depends(get_dashboard_snapshot)):
     """Get available filter options"""
-    
-    # Cities (only from approved projects)
-    cities = db.query(distinct(Project.city))\
-        .filter(Project.workflow_status == WorkflowStatus.APPROVED)\
-        .order_by(Project.city).all()
-        
-    # Funding types (from ProjectRequirement where type='funding', only approved projects)
-    funding_sources = db.query(distinct(ProjectRequirement.requirement))\
-        .join(Project)\
-        .filter(
-            Project.workflow_status == WorkflowStatus.APPROVED,
-            ProjectRequirement.requirement_type == 'funding'
-        )\
-        .order_by(ProjectRequirement.requirement).all()
-        
-    return {
-        "cities": [c[0] for c in cities if c[0]],
-        "funding_sources": [f[0] for f in funding_sources if f[0]]
-    }
+    return snapshot.filter_options()
+
+
+@router.get("/bundle", response_model=DashboardBundle)
+async def get_dashboard_bundle(
+    response: Response,
+    region: Optional[str] = Query(None),
+    sdg: Optional[int] = Query(None),
+    city: Optional[str] = Query(None),
+    funded_by: Optional[str] = Query(None),
+    matches: Optional[Dict[UUID, float]] = Depends(get_search_matches),
+    snapshot: DashboardSnapshot = Depends(get_dashboard_snapshot)
+):
+    """Get filter options, KPIs, map markers and distributions in one response"""
+    bundle = snapshot.bundle(region=region, sdg=sdg, city=city, funded_by=funded_by, matches=matches)
+    return trusted_json(bundle, response)
 
 
 @router.get("/kpis", response_model=DashboardKPIs)
@@ -40,186 +58,142 @@ async def get_dashboard_kpis(
     sdg: Optional[int] = Query(None),
     city: Optional[str] = Query(None),
     funded_by: Optional[str] = Query(None),
-    search: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    matches: Optional[Dict[UUID, float]] = Depends(get_search_matches),
+    snapshot: DashboardSnapshot = Depends(get_dashboard_snapshot)
 ):
     """Get dashboard KPIs with optional filters"""
-
-    # Base query for approved projects
-    query = db.query(Project).filter(Project.workflow_status == WorkflowStatus.APPROVED)
-
-    # Apply filters
-    if region and region != "All Regions":
-        query = query.filter(Project.uia_region == region)
-    if city and city != "All Cities":
-        query = query.filter(Project.city == city)
-    if sdg:
-        query = query.join(ProjectSDG).filter(ProjectSDG.sdg_number == sdg)
-    if funded_by and funded_by != "All":
-        query = query.join(ProjectRequirement).filter(
-            ProjectRequirement.requirement_type == 'funding',
-            ProjectRequirement.requirement == funded_by
-        )
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Project.project_name.ilike(search_term)) |
-            (Project.city.ilike(search_term)) |
-            (Project.country.ilike(search_term))
-        )
-
-    # Calculate metrics
-    stats = query.with_entities(
-        func.count(Project.id).label('total_projects'),
-        func.count(distinct(Project.city)).label('cities_engaged'),
-        func.count(distinct(Project.country)).label('countries_represented'),
-        func.sum(Project.funding_needed).label('total_funding_needed'),
-        func.sum(Project.funding_spent).label('total_funding_spent')
-    ).first()
-
-    return {
-        "total_projects": stats.total_projects or 0,
-        "cities_engaged": stats.cities_engaged or 0,
-        "countries_represented": stats.countries_represented or 0,
-        "total_funding_needed": float(stats.total_funding_needed or 0.0),
-        "total_funding_spent": float(stats.total_funding_spent or 0.0),
-    }
+    mask = snapshot.select(region=region, sdg=sdg, city=city, funded_by=funded_by, matches=matches)
+    return snapshot.kpis(mask)
 
 
-@router.get("/projects", response_model=ProjectListResponse)
+@router.get("/projects", response_model=Union[ProjectListResponse, ProjectSummaryListResponse])
 async def get_dashboard_projects(
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     region: Optional[str] = Query(None),
     sdg: Optional[int] = Query(None),
     city: Optional[str] = Query(None),
     funded_by: Optional[str] = Query(None),
-    search: Optional[str] = Query(None),
-    sort_by: str = Query("created_at", pattern="^(project_name|created_at|funding_needed)$"),
+    matches: Optional[Dict[UUID, float]] = Depends(get_search_matches),
+    bbox: Optional[BoundingBox] = Depends(get_bbox),
+    sort_by: str = Query("created_at", pattern="^(project_name|created_at|funding_needed|relevance)$"),
     sort_order: str = Query("desc", pattern="^(asc|desc)$"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    total_mode: str = Query("exact", pattern="^(exact|approximate)$"),
+    view: str = Query("full", pattern="^(summary|full)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields; overrides view"),
+    snapshot: DashboardSnapshot = Depends(get_dashboard_snapshot),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get paginated list of approved projects with filters"""
-
-    # Base query
-    query = db.query(Project).filter(Project.workflow_status == WorkflowStatus.APPROVED)
-
-    # Apply filters
-    if region and region != "All Regions":
-        query = query.filter(Project.uia_region == region)
-    if city and city != "All Cities":
-        query = query.filter(Project.city == city)
-    if sdg:
-        query = query.join(ProjectSDG).filter(ProjectSDG.sdg_number == sdg)
-    if funded_by and funded_by != "All":
-        query = query.join(ProjectRequirement).filter(
-            ProjectRequirement.requirement_type == 'funding',
-            ProjectRequirement.requirement == funded_by
-        )
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Project.project_name.ilike(search_term)) |
-            (Project.city.ilike(search_term)) |
-            (Project.country.ilike(search_term))
-        )
-
-    # Get total count
-    total = query.count()
-
-    # Apply sorting
-    sort_column = getattr(Project, sort_by)
-    if sort_order == "desc":
-        sort_column = sort_column.desc()
-    query = query.order_by(sort_column)
-
-    # Apply pagination
-    offset = (page - 1) * page_size
-    projects = query.offset(offset).limit(page_size).all()
-
-    return {
-        "total": total,
+    """
+    Get paginated list of approved projects with filters
+
+    Pass the returned next_cursor to fetch the following page by keyset
+    instead of page number. Totals come from the snapshot and are always
+    exact, so total_mode is accepted for parity with the admin listings.
+    sort_by=relevance ranks search results; without a search it falls
+    back to created_at. bbox (west,south,east,north) limits the list to
+    projects inside the visible map area.
+
+    view=summary returns the fields listing cards need, straight from the
+    snapshot; fields=a,b,c picks any response fields (id is always
+    included). Only pages needing other fields read them from the
+    database, and only those columns.
+    """
+    if sort_by == "relevance" and matches is None:
+        sort_by = "created_at"
+    selected = select_fields(view, fields)
+
+    mask = snapshot.select(
+        region=region, sdg=sdg, city=city, funded_by=funded_by, matches=matches, bbox=bbox
+    )
+    after = decode_cursor(cursor, sort_by) if cursor else None
+    offset = 0 if cursor else (page - 1) * page_size
+    records, next_key = snapshot.page(
+        mask, sort_by, sort_order, page_size, offset=offset, after=after, ranks=matches
+    )
+    if selected == SUMMARY_FIELDS:
+        projects = records
+    elif set(selected) <= set(SUMMARY_FIELDS):
+        projects = [{field: record[field] for field in selected} for record in records]
+    else:
+        projects = await load_project_fields(db, [record["id"] for record in records], selected)
+
+    return trusted_json({
+        "total": bin(mask).count("1"),
+        "total_is_approximate": False,
         "page": page,
         "page_size": page_size,
-        "projects": [_format_project_response(p) for p in projects]
-    }
+        "next_cursor": encode_cursor(sort_by, *next_key) if next_key else None,
+        "projects": projects
+    }, response)
+
+
+@router.get("/export")
+async def export_dataset(
+    response: Response,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson|geojson|parquet)$"),
+):
+    """
+    Download every approved project with its SDGs, typologies and requirements
+
+    Streamed from a server-side cursor in chunks, so memory does not grow
+    with the dataset; text formats are compressed on the fly for clients
+    sending Accept-Encoding. The ETag follows the dataset version.
+    """
+    try:
+        encoder = EXPORT_FORMATS[export_format]()
+    except ExportUnavailable as error:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(error))
+    # The stream opens its own session: get_db's closes before the body is sent
+    result = StreamingResponse(export_projects(AsyncSessionLocal, encoder), media_type=encoder.media_type)
+    result.headers["Content-Disposition"] = f'attachment; filename="projects.{encoder.extension}"'
+    result.headers.raw.extend(
+        (name, value) for name, value in response.headers.raw if name != b"content-length"
+    )
+    return result
 
 
 @router.get("/map-markers")
 async def get_map_markers(
+    response: Response,
     region: Optional[str] = Query(None),
     sdg: Optional[int] = Query(None),
     city: Optional[str] = Query(None),
     funded_by: Optional[str] = Query(None),
-    search: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    matches: Optional[Dict[UUID, float]] = Depends(get_search_matches),
+    bbox: Optional[BoundingBox] = Depends(get_bbox),
+    snapshot: DashboardSnapshot = Depends(get_dashboard_snapshot)
 ):
-    """Get project markers for map (lightweight data)"""
-
-    query = db.query(
-        Project.id,
-        Project.project_name,
-        Project.city,
-        Project.country,
-        Project.latitude,
-        Project.longitude,
-        Project.uia_region,
-        Project.project_status,
-        Project.funding_needed,
-        ProjectImage.image_url
-    ).outerjoin(
-        ProjectImage, (ProjectImage.project_id == Project.id) & (ProjectImage.display_order == 0)
-    ).filter(
-        Project.workflow_status == WorkflowStatus.APPROVED,
-        Project.latitude.isnot(None),
-        Project.longitude.isnot(None)
+    """Get project markers for map (lightweight data), optionally within a bbox"""
+    mask = snapshot.select(
+        region=region, sdg=sdg, city=city, funded_by=funded_by, matches=matches, bbox=bbox
     )
+    return trusted_json(snapshot.markers(mask), response)
 
-    # Apply filters
-    if region and region != "All Regions":
-        query = query.filter(Project.uia_region == region)
-    if city and city != "All Cities":
-        query = query.filter(Project.city == city)
-    if sdg:
-        query = query.join(ProjectSDG).filter(ProjectSDG.sdg_number == sdg)
-    if funded_by and funded_by != "All":
-        query = query.join(ProjectRequirement).filter(
-            ProjectRequirement.requirement_type == 'funding',
-            ProjectRequirement.requirement == funded_by
-        )
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Project.project_name.ilike(search_term)) |
-            (Project.city.ilike(search_term)) |
-            (Project.country.ilike(search_term))
-        )
-
-    markers = query.all()
-
-    # Get primary SDG for each project
-    result = []
-    for m in markers:
-        # Get the first (primary) SDG for this project
-        primary_sdg = db.query(ProjectSDG.sdg_number).filter(
-            ProjectSDG.project_id == m.id
-        ).order_by(ProjectSDG.sdg_number).first()
 
-        result.append({
-            "id": str(m.id),
-            "project_name": m.project_name,
-            "city": m.city,
-            "country": m.country,
-            "latitude": m.latitude,
-            "longitude": m.longitude,
-            "region": m.uia_region.value if m.uia_region else None,
-            "status": m.project_status.value if m.project_status else None,
-            "funding_needed": float(m.funding_needed or 0),
-            "primary_sdg": primary_sdg[0] if primary_sdg else None,
-            "image_url": m.image_url
-        })
+@router.get("/map-clusters")
+async def get_map_clusters(
+    response: Response,
+    bbox: str = Query(..., description="west,south,east,north in degrees"),
+    zoom: int = Query(..., ge=0, le=22),
+    region: Optional[str] = Query(None),
+    sdg: Optional[int] = Query(None),
+    city: Optional[str] = Query(None),
+    funded_by: Optional[str] = Query(None),
+    matches: Optional[Dict[UUID, float]] = Depends(get_search_matches),
+    snapshot: DashboardSnapshot = Depends(get_dashboard_snapshot)
+):
+    """
+    Get map clusters for the visible area at a zoom level
 
-    return result
+    Returns clusters with a count and their most common SDG and region, plus
+    individual markers where a cluster would hold a single project. Past the
+    deepest clustering zoom every marker in the box is returned.
+    """
+    mask = snapshot.select(region=region, sdg=sdg, city=city, funded_by=funded_by, matches=matches)
+    return trusted_json(snapshot.clusters_in_view(mask, zoom, parse_bbox(bbox)), response)
 
 
 @router.get("/analytics/sdg-distribution")
@@ -227,39 +201,12 @@ async def get_sdg_distribution(
     region: Optional[str] = Query(None),
     city: Optional[str] = Query(None),
     funded_by: Optional[str] = Query(None),
-    search: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    matches: Optional[Dict[UUID, float]] = Depends(get_search_matches),
+    snapshot: DashboardSnapshot = Depends(get_dashboard_snapshot)
 ):
     """Get SDG distribution for charts"""
-
-    query = db.query(
-        ProjectSDG.sdg_number,
-        func.count(distinct(ProjectSDG.project_id)).label('count')
-    ).join(Project).filter(
-        Project.workflow_status == WorkflowStatus.APPROVED
-    )
-
-    if region and region != "All Regions":
-        query = query.filter(Project.uia_region == region)
-    if city and city != "All Cities":
-        query = query.filter(Project.city == city)
-    if funded_by and funded_by != "All":
-        query = query.join(ProjectRequirement).filter(
-            ProjectRequirement.project_id == Project.id,
-            ProjectRequirement.requirement_type == 'funding',
-            ProjectRequirement.requirement == funded_by
-        )
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Project.project_name.ilike(search_term)) |
-            (Project.city.ilike(search_term)) |
-            (Project.country.ilike(search_term))
-        )
-
-    results = query.group_by(ProjectSDG.sdg_number).order_by(ProjectSDG.sdg_number).all()
-
-    return [{"sdg": r.sdg_number, "count": r.count} for r in results]
+    mask = snapshot.select(region=region, city=city, funded_by=funded_by, matches=matches)
+    return snapshot.sdg_distribution(mask)
 
 
 @router.get("/analytics/regional-distribution")
@@ -267,47 +214,12 @@ async def get_regional_distribution(
     sdg: Optional[int] = Query(None),
     city: Optional[str] = Query(None),
     funded_by: Optional[str] = Query(None),
-    search: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    matches: Optional[Dict[UUID, float]] = Depends(get_search_matches),
+    snapshot: DashboardSnapshot = Depends(get_dashboard_snapshot)
 ):
     """Get project count by region"""
-
-    query = db.query(
-        Project.uia_region,
-        func.count(Project.id).label('count'),
-        func.sum(Project.funding_needed).label('funding_needed')
-    ).filter(
-        Project.workflow_status == WorkflowStatus.APPROVED
-    )
-
-    if sdg:
-        query = query.join(ProjectSDG).filter(ProjectSDG.sdg_number == sdg)
-    if city and city != "All Cities":
-        query = query.filter(Project.city == city)
-    if funded_by and funded_by != "All":
-        query = query.join(ProjectRequirement).filter(
-            ProjectRequirement.project_id == Project.id,
-            ProjectRequirement.requirement_type == 'funding',
-            ProjectRequirement.requirement == funded_by
-        )
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Project.project_name.ilike(search_term)) |
-            (Project.city.ilike(search_term)) |
-            (Project.country.ilike(search_term))
-        )
-
-    results = query.group_by(Project.uia_region).all()
-
-    return [
-        {
-            "region": r.uia_region.value,
-            "project_count": r.count,
-            "funding_needed": float(r.funding_needed or 0.0)
-        }
-        for r in results
-    ]
+    mask = snapshot.select(sdg=sdg, city=city, funded_by=funded_by, matches=matches)
+    return snapshot.regional_distribution(mask)
 
 
 @router.get("/analytics/typology-distribution")
@@ -315,36 +227,9 @@ async def get_typology_distribution(
     region: Optional[str] = Query(None),
     sdg: Optional[int] = Query(None),
     funded_by: Optional[str] = Query(None),
-    search: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    matches: Optional[Dict[UUID, float]] = Depends(get_search_matches),
+    snapshot: DashboardSnapshot = Depends(get_dashboard_snapshot)
 ):
     """Get project typology distribution"""
-
-    query = db.query(
-        ProjectTypology.typology,
-        func.count(distinct(ProjectTypology.project_id)).label('count')
-    ).join(Project).filter(
-        Project.workflow_status == WorkflowStatus.APPROVED
-    )
-
-    if region and region != "All Regions":
-        query = query.filter(Project.uia_region == region)
-    if sdg:
-        query = query.join(ProjectSDG).filter(ProjectSDG.sdg_number == sdg)
-    if funded_by and funded_by != "All":
-        query = query.join(ProjectRequirement).filter(
-            ProjectRequirement.project_id == Project.id,
-            ProjectRequirement.requirement_type == 'funding',
-            ProjectRequirement.requirement == funded_by
-        )
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Project.project_name.ilike(search_term)) |
-            (Project.city.ilike(search_term)) |
-            (Project.country.ilike(search_term))
-        )
-
-    results = query.group_by(ProjectTypology.typology).order_by(func.count(distinct(ProjectTypology.project_id)).desc()).all()
-
-    return [{"typology": r.typology, "count": r.count} for r in results]
+    mask = snapshot.select(region=region, sdg=sdg, funded_by=funded_by, matches=matches)
+    return snapshot.typology_distribution(mask)
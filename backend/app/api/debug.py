@@ -3,7 +3,8 @@ Temporary debug endpoints for diagnosing database connection issues
 DELETE THIS FILE after fixing the database connection!
 """
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text, inspect
 from ..core.database import get_db, engine
 from ..core.config import settings
@@ -13,7 +14,7 @@ router = APIRouter()
 
 
 @router.get("/db-status")
-async def debug_database_status():
+def debug_database_status():
     """
     Debug endpoint to check database connection status
     WARNING: Remove this endpoint in production!
@@ -79,14 +80,14 @@ async def debug_database_status():
 
 
 @router.get("/db-test-query")
-async def debug_test_query(db: Session = Depends(get_db)):
+async def debug_test_query(db: AsyncSession = Depends(get_db)):
     """
     Test a simple database query using the session dependency
     WARNING: Remove this endpoint in production!
     """
     try:
         # Try to execute a simple query
-        result = db.execute(text("SELECT 1 as test"))
+        result = await db.execute(text("SELECT 1 as test"))
         row = result.fetchone()
 
         return {
@@ -171,8 +172,20 @@ async def trigger_import():
             
         from import_full_dataset import import_projects
         
-        # Run import
-        import_projects()
+        # Run import (sync code: keep it off the event loop)
+        await run_in_threadpool(import_projects)
+
+        # Imported projects bypass the admin workflow: bump the dataset version
+        # so every worker rebuilds its dashboard snapshot
+        from ..core.database import AsyncSessionLocal
+        from ..services.dashboard_snapshot import dashboard_snapshot
+        from ..services.dataset_version import bump_dataset_version
+        from ..core.response_cache import dashboard_cache
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(bump_dataset_version)
+            await db.commit()
+        dashboard_snapshot.invalidate()
+        dashboard_cache.invalidate()
         
         return {"status": "SUCCESS", "message": "Data import completed"}
     except Exception as e:
@@ -1,15 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Optional, Sequence
 from uuid import UUID
-import httpx
+import asyncio
+import uuid
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from ..core.database import get_db
-from ..models.project import (
-    Project, ProjectSDG, ProjectTypology,
-    ProjectRequirement, ProjectImage, WorkflowStatus
-)
+from ..core.http_cache import conditional_get, make_etag
+from ..core.response_cache import dashboard_cache
+from ..core.loading import PROJECT_DETAIL_LOADING, load_project
+from ..models.project import Project, ProjectStatus, UIARegion, WorkflowStatus
 from ..schemas.project import ProjectCreate, ProjectResponse
-from ..services.email import send_submission_notification
+from ..services.email import queue_submission_notification
+from ..services.email_outbox import email_outbox
+from ..services.dashboard_snapshot import dashboard_snapshot
+from ..services.project_children import (
+    CHILD_FIELDS, attach_children, child_rows, insert_children, sync_children
+)
+from ..services.recaptcha import CaptchaUnavailable, get_captcha_verifier
+from ..services.dataset_version import bump_dataset_version
+from ..services.image_variants import LIST_IMAGE_WIDTH, image_for_width, primary_image
 from ..core.config import settings
 
 import logging
@@ -18,40 +33,91 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-@router.post("/submit", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
-async def submit_project(project_data: ProjectCreate, db: Session = Depends(get_db)):
-    """Submit a new project (public endpoint)"""
+# The body is parsed by the route itself (see _verified_submission)
+SUBMIT_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/ProjectCreate"}}},
+    }
+}
+
 
-    # Verify reCAPTCHA
-    if not project_data.captcha_token:
+async def _verified_submission(body: bytes, verifier) -> ProjectCreate:
+    """Validate a submission while its reCAPTCHA token is being verified"""
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError as error:
+        raise RequestValidationError([{
+            "type": "json_invalid", "loc": ("body", 0), "msg": "JSON decode error",
+            "input": {}, "ctx": {"error": str(error)},
+        }])
+
+    token = data.get("captcha_token") if isinstance(data, dict) else None
+    verification = asyncio.ensure_future(verifier.verify(token)) if isinstance(token, str) and token else None
+    try:
+        # In a worker thread, so the verification request proceeds meanwhile
+        project_data = await run_in_threadpool(ProjectCreate.model_validate, data)
+    except ValidationError as error:
+        if verification is not None:
+            verification.cancel()
+        raise RequestValidationError([
+            {**e, "loc": ("body", *e["loc"])} for e in error.errors(include_url=False)
+        ])
+    except BaseException:
+        if verification is not None:
+            verification.cancel()
+        raise
+
+    if verification is None:
         raise HTTPException(status_code=400, detail="reCAPTCHA verification required")
-        
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                "https://www.google.com/recaptcha/api/siteverify",
-                data={
-                    "secret": settings.RECAPTCHA_SECRET_KEY,
-                    "response": project_data.captcha_token
-                }
-            )
-            result = response.json()
-            if not result.get("success"):
-                raise HTTPException(status_code=400, detail="reCAPTCHA verification failed")
-        except httpx.RequestError:
-            # Allow to proceed if Google API is down? Or fail? Safe to fail for security.
-            raise HTTPException(status_code=503, detail="Unable to verify reCAPTCHA")
-
-    # Create main project
+    try:
+        verified = await verification
+    except CaptchaUnavailable:
+        # Safe to fail for security
+        raise HTTPException(status_code=503, detail="Unable to verify reCAPTCHA")
+    if not verified:
+        raise HTTPException(status_code=400, detail="reCAPTCHA verification failed")
+    return project_data
+
+
+@router.post(
+    "/submit", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED,
+    openapi_extra=SUBMIT_REQUEST_BODY,
+)
+async def submit_project(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    verifier=Depends(get_captcha_verifier),
+):
+    """Submit a new project (public endpoint)"""
+
+    project_data = await _verified_submission(await request.body(), verifier)
+    new_project = await _create_project(db, project_data)
+    dashboard_cache.invalidate()
+    return _format_project_response(new_project)
+
+
+def _as_enum(enum_class, value):
+    """Member for a name or a value, as the Enum columns accept both"""
+    if value in enum_class.__members__:
+        return enum_class[value]
+    return enum_class(value)
+
+
+async def _create_project(db: AsyncSession, project_data: ProjectCreate) -> Project:
+    """Write a submission with a few multi-row statements; the result needs no re-read"""
+    now = datetime.utcnow()
     new_project = Project(
+        id=uuid.uuid4(),
         organization_name=project_data.organization_name,
         contact_person=project_data.contact_person,
         contact_email=project_data.contact_email,
         project_name=project_data.project_name,
-        project_status=project_data.project_status,
+        project_status=_as_enum(ProjectStatus, project_data.project_status),
         workflow_status=WorkflowStatus.SUBMITTED,
         funding_needed=project_data.funding_needed,
-        uia_region=project_data.uia_region,
+        funding_spent=0.0,
+        uia_region=_as_enum(UIARegion, project_data.uia_region),
         city=project_data.city,
         country=project_data.country,
         latitude=project_data.latitude,
@@ -61,74 +127,38 @@ async def submit_project(project_data: ProjectCreate, db: Session = Depends(get_
         success_factors=project_data.success_factors,
         other_requirement_text=project_data.other_requirement_text,
         gdpr_consent=project_data.gdpr_consent,
+        created_at=now,
+        updated_at=now,
     )
 
     # Coordinates are stored as latitude/longitude floats
     # (PostGIS Geography column removed for SQLite compatibility)
 
+    # The project row goes first: the children reference it
     db.add(new_project)
-    db.flush()  # Get the project ID
-
-    # Add SDGs
-    for sdg_number in project_data.sdgs:
-        sdg = ProjectSDG(project_id=new_project.id, sdg_number=sdg_number)
-        db.add(sdg)
-
-    # Add typologies
-    for typology in project_data.typologies:
-        typ = ProjectTypology(project_id=new_project.id, typology=typology)
-        db.add(typ)
-
-    # Add funding requirements
-    for req in project_data.funding_requirements:
-        requirement = ProjectRequirement(
-            project_id=new_project.id,
-            requirement_type='funding',
-            requirement=req
-        )
-        db.add(requirement)
-
-    # Add government requirements
-    for req in project_data.government_requirements:
-        requirement = ProjectRequirement(
-            project_id=new_project.id,
-            requirement_type='government',
-            requirement=req
-        )
-        db.add(requirement)
-
-    # Add other requirements
-    for req in project_data.other_requirements:
-        requirement = ProjectRequirement(
-            project_id=new_project.id,
-            requirement_type='other',
-            requirement=req
-        )
-        db.add(requirement)
-
-    # Add images
-    for idx, image_url in enumerate(project_data.image_urls):
-        image = ProjectImage(
-            project_id=new_project.id,
-            image_url=image_url,
-            display_order=idx
-        )
-        db.add(image)
+    await db.flush()
 
-    db.commit()
-    db.refresh(new_project)
+    # One INSERT per child table
+    children = child_rows(new_project.id, project_data)
+    await insert_children(db, children)
 
-    # Send email notification to admin
+    # Notify the admin, in the same commit as the submission
     review_link = f"{settings.FRONTEND_URL}/admin"
-    await send_submission_notification(settings.ADMIN_EMAIL, new_project.project_name, review_link)
+    queue_submission_notification(db, settings.ADMIN_EMAIL, new_project.project_name, review_link)
+    await db.commit()
+    email_outbox.wake()
 
-    return _format_project_response(new_project)
+    # Every column was set above: only the collections are missing
+    attach_children(new_project, children)
+    return new_project
 
 
 @router.get("/edit/{token}", response_model=ProjectResponse)
-async def get_project_by_token(token: str, db: Session = Depends(get_db)):
+async def get_project_by_token(token: str, db: AsyncSession = Depends(get_db)):
     """Get project by edit token"""
-    project = db.query(Project).filter(Project.edit_token == token).first()
+    project = await db.scalar(
+        select(Project).options(*PROJECT_DETAIL_LOADING).where(Project.edit_token == token)
+    )
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -141,10 +171,10 @@ async def get_project_by_token(token: str, db: Session = Depends(get_db)):
 async def update_project_by_token(
     token: str,
     project_data: ProjectCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update project using edit token"""
-    project = db.query(Project).filter(Project.edit_token == token).first()
+    project = await db.scalar(select(Project).where(Project.edit_token == token))
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -171,76 +201,44 @@ async def update_project_by_token(
     
     # Reset status to SUBMITTED for re-review
     project.workflow_status = WorkflowStatus.SUBMITTED
+    project.updated_at = datetime.utcnow()
 
-    # Clear existing relationships
-    db.query(ProjectSDG).filter(ProjectSDG.project_id == project.id).delete()
-    db.query(ProjectTypology).filter(ProjectTypology.project_id == project.id).delete()
-    db.query(ProjectRequirement).filter(ProjectRequirement.project_id == project.id).delete()
-    db.query(ProjectImage).filter(ProjectImage.project_id == project.id).delete()
-
-    # Re-add relationships
-    # Add SDGs
-    for sdg_number in project_data.sdgs:
-        sdg = ProjectSDG(project_id=project.id, sdg_number=sdg_number)
-        db.add(sdg)
-
-    # Add typologies
-    for typology in project_data.typologies:
-        typ = ProjectTypology(project_id=project.id, typology=typology)
-        db.add(typ)
-
-    # Add funding requirements
-    for req in project_data.funding_requirements:
-        requirement = ProjectRequirement(
-            project_id=project.id,
-            requirement_type='funding',
-            requirement=req
-        )
-        db.add(requirement)
-
-    # Add government requirements
-    for req in project_data.government_requirements:
-        requirement = ProjectRequirement(
-            project_id=project.id,
-            requirement_type='government',
-            requirement=req
-        )
-        db.add(requirement)
-
-    # Add other requirements
-    for req in project_data.other_requirements:
-        requirement = ProjectRequirement(
-            project_id=project.id,
-            requirement_type='other',
-            requirement=req
-        )
-        db.add(requirement)
-
-    # Add images
-    for idx, image_url in enumerate(project_data.image_urls):
-        image = ProjectImage(
-            project_id=project.id,
-            image_url=image_url,
-            display_order=idx
-        )
-        db.add(image)
-
-    db.commit()
-    db.refresh(project)
+    # Write only the child rows that changed
+    await sync_children(db, project.id, {field: getattr(project_data, field) for field in CHILD_FIELDS})
 
-    # Notify Admin of re-submission
+    # Notify Admin of re-submission, in the same commit
     review_link = f"{settings.FRONTEND_URL}/admin"
-    await send_submission_notification(settings.ADMIN_EMAIL, f"{project.project_name} (Resubmitted)", review_link)
+    queue_submission_notification(db, settings.ADMIN_EMAIL, f"{project.project_name} (Resubmitted)", review_link)
+    dataset_version = await db.run_sync(bump_dataset_version)
+    await db.commit()
+    email_outbox.wake()
+    project = await load_project(db, project.id)
+    dashboard_snapshot.sync_project(project, dataset_version)
+    dashboard_cache.invalidate()
 
     return _format_project_response(project)
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: UUID, db: Session = Depends(get_db)):
+async def get_project(
+    project_id: UUID,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
     """Get a single project by ID (public if approved)"""
     try:
         logger.info(f"Fetching project with ID: {project_id}")
-        project = db.query(Project).filter(Project.id == project_id).first()
+
+        # Answer revalidations from the project row alone, before loading children
+        current = (await db.execute(
+            select(Project.workflow_status, Project.updated_at).where(Project.id == project_id)
+        )).first()
+        if current and current.workflow_status == WorkflowStatus.APPROVED:
+            etag = make_etag(project_id, current.updated_at.isoformat())
+            conditional_get(request, response, etag, current.updated_at)
+
+        project = await load_project(db, project_id)
 
         if not project:
             logger.warning(f"Project {project_id} not found in database")
@@ -259,9 +257,9 @@ async def get_project(project_id: UUID, db: Session = Depends(get_db)):
                 detail="Project not found"
             )
 
-        response = _format_project_response(project)
+        formatted = _format_project_response(project)
         logger.info(f"Successfully formatted response for project {project_id}")
-        return response
+        return formatted
 
     except HTTPException:
         raise
@@ -273,66 +271,76 @@ async def get_project(project_id: UUID, db: Session = Depends(get_db)):
         )
 
 
-def _format_project_response(project: Project) -> dict:
-    """Helper to format project with related data"""
-    # Map region codes to readable labels
-    region_labels = {
-        "SECTION_I": "Section I - Western Europe",
-        "SECTION_II": "Section II - Eastern Europe & Central Asia",
-        "SECTION_III": "Section III - Middle East & Africa",
-        "SECTION_IV": "Section IV - Asia & Pacific",
-        "SECTION_V": "Section V - Americas"
-    }
-    
+# Map region codes to readable labels
+REGION_LABELS = {
+    "SECTION_I": "Section I - Western Europe",
+    "SECTION_II": "Section II - Eastern Europe & Central Asia",
+    "SECTION_III": "Section III - Middle East & Africa",
+    "SECTION_IV": "Section IV - Asia & Pacific",
+    "SECTION_V": "Section V - Americas"
+}
+
+# Map status codes to readable labels
+STATUS_LABELS = {
+    "planned": "Planned",
+    "in_progress": "In Progress",
+    "implemented": "Implemented"
+}
+
+
+def _region_label(project: Project) -> Optional[str]:
     region_value = project.uia_region.value if project.uia_region else None
-    if region_value in region_labels:
-        region_value = region_labels[region_value]
-
-    # Map status codes to readable labels
-    status_labels = {
-        "planned": "Planned",
-        "in_progress": "In Progress",
-        "implemented": "Implemented"
-    }
-    
-    status_value = project.project_status.value if project.project_status else None
-    if status_value in status_labels:
-        status_value = status_labels[status_value]
+    return REGION_LABELS.get(region_value, region_value)
 
+
+def _status_label(project: Project) -> Optional[str]:
+    status_value = project.project_status.value if project.project_status else None
+    return STATUS_LABELS.get(status_value, status_value)
+
+
+def _requirements(project: Project, requirement_type: str) -> list:
+    return [r.requirement for r in project.requirements if r.requirement_type == requirement_type]
+
+
+# Response field -> how it is read from a Project. Each formatter touches only
+# the columns and relationships listed for its field in app/core/loading.py.
+PROJECT_FIELD_FORMATTERS = {
+    "id": lambda p: p.id,
+    "project_name": lambda p: p.project_name,
+    "organization_name": lambda p: p.organization_name,
+    "contact_person": lambda p: p.contact_person,
+    "contact_email": lambda p: p.contact_email,
+    "project_status": _status_label,
+    "workflow_status": lambda p: p.workflow_status.value if p.workflow_status else None,
+    "funding_needed": lambda p: p.funding_needed,
+    "funding_spent": lambda p: p.funding_spent,
+    "uia_region": _region_label,
+    "city": lambda p: p.city,
+    "country": lambda p: p.country,
+    "latitude": lambda p: p.latitude,
+    "longitude": lambda p: p.longitude,
+    "brief_description": lambda p: p.brief_description,
+    "detailed_description": lambda p: p.detailed_description,
+    "success_factors": lambda p: p.success_factors,
+    "typologies": lambda p: [t.typology for t in p.typologies],
+    "funding_requirements": lambda p: _requirements(p, 'funding'),
+    "government_requirements": lambda p: _requirements(p, 'government'),
+    "other_requirements": lambda p: _requirements(p, 'other'),
+    "other_requirement_text": lambda p: p.other_requirement_text,
+    "gdpr_consent": lambda p: p.gdpr_consent,
+    "sdgs": lambda p: [s.sdg_number for s in p.sdgs],
+    "image_urls": lambda p: [img.image_url for img in sorted(p.images, key=lambda x: x.display_order)],
+    "image": lambda p: image_for_width(primary_image(p), LIST_IMAGE_WIDTH),
+    "rejection_reason": lambda p: p.rejection_reason,
+    "reviewer_notes": lambda p: p.reviewer_notes,
+    "created_at": lambda p: p.created_at,
+    "updated_at": lambda p: p.updated_at,
+}
+
+
+def _format_project_response(project: Project, fields: Optional[Sequence[str]] = None) -> dict:
+    """Helper to format project with related data, optionally only some fields"""
     return {
-        "id": project.id,
-        "project_name": project.project_name,
-        "organization_name": project.organization_name,
-        "contact_person": project.contact_person,
-        "contact_email": project.contact_email,
-        "project_status": status_value,
-        "workflow_status": project.workflow_status.value if project.workflow_status else None,
-        "funding_needed": project.funding_needed,
-        "funding_spent": project.funding_spent,
-        "uia_region": region_value,
-        "city": project.city,
-        "country": project.country,
-        "latitude": project.latitude,
-        "longitude": project.longitude,
-        "brief_description": project.brief_description,
-        "detailed_description": project.detailed_description,
-        "success_factors": project.success_factors,
-        "typologies": [t.typology for t in project.typologies] if project.typologies else [],
-        "funding_requirements": [
-            r.requirement for r in project.requirements if r.requirement_type == 'funding'
-        ] if project.requirements else [],
-        "government_requirements": [
-            r.requirement for r in project.requirements if r.requirement_type == 'government'
-        ] if project.requirements else [],
-        "other_requirements": [
-            r.requirement for r in project.requirements if r.requirement_type == 'other'
-        ] if project.requirements else [],
-        "other_requirement_text": project.other_requirement_text,
-        "gdpr_consent": project.gdpr_consent,
-        "sdgs": [s.sdg_number for s in project.sdgs] if project.sdgs else [],
-        "image_urls": [img.image_url for img in sorted(project.images, key=lambda x: x.display_order)] if project.images else [],
-        "rejection_reason": project.rejection_reason,
-        "reviewer_notes": project.reviewer_notes,
-        "created_at": project.created_at,
-        "updated_at": project.updated_at,
+        field: PROJECT_FIELD_FORMATTERS[field](project)
+        for field in (fields or PROJECT_FIELD_FORMATTERS)
     }
@@ -0,0 +1,213 @@
+"""
+gzip / brotli response compression.
+
+JSON from the dashboard and listing endpoints repeats the same labels and
+URL prefixes on every row, so it compresses several times over. Responses
+with a compressible content type and at least COMPRESSION_MIN_SIZE bytes
+are encoded with the best coding the client's Accept-Encoding allows
+(brotli first, when the Brotli package is installed, then gzip). Streamed
+responses are compressed chunk by chunk.
+
+Compressed responses get a weak ETag (the bytes differ from the identity
+representation). Every response that could have been compressed carries
+Vary: Accept-Encoding, identity ones included (no Accept-Encoding, or too
+small), so shared caches never serve one encoding for another. The
+response cache keeps the encoded bodies of its entries
+(CachedResponse.encoded), so cache hits are not compressed again; this
+middleware passes anything that already has a Content-Encoding through
+untouched.
+"""
+import gzip
+import zlib
+from typing import List, Optional, Tuple
+from .config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/geo+json", "application/x-ndjson",
+    "application/javascript", "image/svg+xml", "text/",
+)
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Codings this server can produce, most preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the coding for an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding:
+            weights[coding] = weight
+
+    candidates = [
+        coding for coding in supported_encodings()
+        if weights.get(coding, weights.get("*", 0.0)) > 0
+    ]
+    if not candidates:
+        return None
+    # Highest q wins; ties go to the server's preference order
+    return max(candidates, key=lambda coding: weights.get(coding, weights.get("*", 0.0)))
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """Incremental compressor for responses sent in several body messages"""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self._compress, self._flush = self._compressor.process, self._compressor.finish
+        else:
+            # wbits 16+ writes the gzip header and trailer
+            self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._compress, self._flush = self._compressor.compress, self._compressor.flush
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compress(chunk)
+
+    def finish(self) -> bytes:
+        return self._flush()
+
+
+def weak_etag(etag: bytes) -> bytes:
+    return etag if etag.startswith(b"W/") else b"W/" + etag
+
+
+def encoded_headers(headers: List[Tuple[bytes, bytes]], encoding: str) -> List[Tuple[bytes, bytes]]:
+    """Response headers for the encoded representation (length excluded)"""
+    result = []
+    for name, value in headers:
+        if name == b"content-length" or name == b"vary":
+            continue
+        if name == b"etag":
+            value = weak_etag(value)
+        result.append((name, value))
+    result.append((b"content-encoding", encoding.encode()))
+    result.append((b"vary", _vary(headers)))
+    return result
+
+
+def _vary(headers: List[Tuple[bytes, bytes]]) -> bytes:
+    existing = [value for name, value in headers if name == b"vary"]
+    values = [v.strip() for value in existing for v in value.split(b",") if v.strip()]
+    if b"accept-encoding" not in (v.lower() for v in values):
+        values.append(b"Accept-Encoding")
+    return b", ".join(values)
+
+
+def _with_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    return [(name, value) for name, value in headers if name != b"vary"] + [(b"vary", _vary(headers))]
+
+
+def _varying_send(send):
+    """send adding Vary: Accept-Encoding to responses that would be compressed for other clients"""
+    async def wrapped(message):
+        if message["type"] == "http.response.start":
+            headers = message.get("headers", [])
+            content_type = next((v for n, v in headers if n == b"content-type"), b"").decode("latin-1")
+            if is_compressible(content_type) or message["status"] == 304:
+                message = {**message, "headers": _with_vary(headers)}
+        await send(message)
+    return wrapped
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing large enough responses for clients that accept it"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        encoding = negotiate_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None or scope["method"] == "HEAD":
+            await self.app(scope, receive, _varying_send(send))
+            return
+
+        start = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                content_type = next((v for n, v in headers if n == b"content-type"), b"").decode("latin-1")
+                already_encoded = any(name == b"content-encoding" for name, _ in headers)
+                if already_encoded or not is_compressible(content_type) or message["status"] < 200 \
+                        or message["status"] in (204, 304):
+                    passthrough = True
+                    if message["status"] == 304 and not already_encoded:
+                        message = {**message, "headers": _with_vary(headers)}
+                    await send(message)
+                else:
+                    # Wait for the first body message to decide
+                    start = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                chunk = compressor.compress(body)
+                if not more_body:
+                    chunk += compressor.finish()
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            headers = start.get("headers", [])
+            if not more_body:
+                if len(body) < settings.COMPRESSION_MIN_SIZE:
+                    await send({**start, "headers": _with_vary(headers)})
+                    await send(message)
+                else:
+                    compressed = compress(body, encoding)
+                    await send({**start, "headers": encoded_headers(headers, encoding) + [
+                        (b"content-length", str(len(compressed)).encode())
+                    ]})
+                    await send({"type": "http.response.body", "body": compressed})
+                passthrough = True
+                return
+
+            # Streamed response: compress incrementally, without Content-Length
+            compressor = StreamCompressor(encoding)
+            await send({**start, "headers": encoded_headers(headers, encoding)})
+            await send({"type": "http.response.body", "body": compressor.compress(body), "more_body": True})
+
+        await self.app(scope, receive, compressing_send)
+
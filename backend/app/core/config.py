@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -7,12 +7,28 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    # Async driver URL used by the API; derived from DATABASE_URL when empty
+    # (postgresql -> postgresql+asyncpg, sqlite -> sqlite+aiosqlite)
+    ASYNC_DATABASE_URL: str = ""
 
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     RECAPTCHA_SECRET_KEY: str
+    # "google", or "local" for an offline stub accepting any token (load tests)
+    RECAPTCHA_VERIFIER: str = "google"
+    RECAPTCHA_VERIFY_URL: str = "https://www.google.com/recaptcha/api/siteverify"
+    RECAPTCHA_TIMEOUT_SECONDS: float = 3.0
+    RECAPTCHA_CONNECT_TIMEOUT_SECONDS: float = 1.0
+    RECAPTCHA_MAX_CONNECTIONS: int = 20
+    # Consecutive failures opening the circuit, and how long it stays open
+    RECAPTCHA_BREAKER_FAILURES: int = 5
+    RECAPTCHA_BREAKER_RESET_SECONDS: float = 30.0
+    # How long a verified token is accepted once more, for a retried
+    # submission (0 disables the cache)
+    RECAPTCHA_CACHE_SECONDS: int = 120
+    RECAPTCHA_STUB_LATENCY_MS: int = 0
 
     # Email
     SMTP_HOST: str
@@ -22,6 +38,21 @@ class Settings(BaseSettings):
     SMTP_FROM_EMAIL: str
     SMTP_FROM_NAME: str = "Atlas 3+3"
 
+    # Email outbox (app/services/email_outbox.py): emails are queued with the
+    # change they report and sent by a background worker
+    EMAIL_OUTBOX_WORKER_ENABLED: bool = True
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5.0
+    EMAIL_OUTBOX_BATCH_SIZE: int = 20
+    # How long a claimed email stays reserved for the worker sending it
+    EMAIL_OUTBOX_LEASE_SECONDS: int = 300
+    EMAIL_OUTBOX_DRAIN_SECONDS: float = 20.0
+    EMAIL_MAX_ATTEMPTS: int = 8
+    EMAIL_RETRY_BASE_SECONDS: int = 30
+    EMAIL_RETRY_MAX_SECONDS: int = 3600
+    EMAIL_SMTP_TIMEOUT_SECONDS: float = 30.0
+    # Close the reused SMTP connection after this long without sending
+    EMAIL_SMTP_IDLE_SECONDS: float = 60.0
+
     # Admin
     ADMIN_EMAIL: str
 
@@ -37,6 +68,91 @@ class Settings(BaseSettings):
     # Environment
     ENVIRONMENT: str = "development"
 
+    # Database connection pool (server databases; SQLite keeps the default)
+    # "queue" keeps connections open between requests; "null" opens one per
+    # checkout, for transaction-mode poolers (e.g. Supabase on port 6543);
+    # "auto" picks null for those and queue otherwise
+    DB_POOL_MODE: str = "auto"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    # Reconnect connections older than this, before the server or a proxy drops them
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Connections opened at startup (capped at DB_POOL_SIZE); 0 disables
+    DB_POOL_WARMUP_CONNECTIONS: int = 2
+    # Keep server-side prepared statements off (needed behind transaction
+    # poolers); unset, they are off exactly for transaction pooler URLs
+    DB_DISABLE_PREPARED_STATEMENTS: Optional[bool] = None
+
+    # Dashboard snapshot
+    # Each worker keeps an in-memory copy of the approved projects; admin actions
+    # update it in place, other workers rebuild it once it is older than this.
+    # Set to 0 to never expire.
+    DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS: int = 300
+
+    # Dashboard response cache
+    # Complete dashboard responses kept per worker (0 disables the cache)
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 512
+    # Served as fresh for this long, then for up to DASHBOARD_CACHE_STALE_SECONDS
+    # more while being refreshed in the background
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+    DASHBOARD_CACHE_STALE_SECONDS: int = 300
+
+    # HTTP caching
+    # max-age of public dashboard and project responses; clients revalidate
+    # with ETags afterwards, so 0 still saves re-sending unchanged bodies
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 0
+
+    # Response compression
+    # gzip/brotli for responses of at least COMPRESSION_MIN_SIZE bytes
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+
+    # Image variants (scripts/generate_image_variants.py): image URLs under
+    # PROJECT_IMAGES_URL_PREFIX are files in PROJECT_IMAGES_DIR (the frontend's
+    # public folder); their variants go to its variants/ subfolder
+    PROJECT_IMAGES_DIR: str = "../frontend/public/project_images"
+    PROJECT_IMAGES_URL_PREFIX: str = "/project_images/"
+    IMAGE_VARIANT_FORMATS: str = "avif,webp"
+
+    # Image URL checks (scripts/check_image_urls.py): requests in flight, in
+    # total and per host, and how old a check gets before it is repeated.
+    # Relative URLs are fetched from IMAGE_CHECK_BASE_URL (FRONTEND_URL when
+    # empty); images above IMAGE_CHECK_MAX_BYTES are reported as too large
+    IMAGE_CHECK_CONCURRENCY: int = 16
+    IMAGE_CHECK_PER_HOST: int = 4
+    IMAGE_CHECK_TIMEOUT_SECONDS: float = 10.0
+    IMAGE_CHECK_MAX_AGE_HOURS: int = 168
+    IMAGE_CHECK_BASE_URL: Optional[str] = None
+    IMAGE_CHECK_MAX_BYTES: int = 1_000_000
+
+    # Dataset export (GET /api/dashboard/export, scripts/export_projects.py):
+    # projects fetched from the server-side cursor, and encoded, per chunk
+    EXPORT_CHUNK_SIZE: int = 500
+
+    # Spatial index
+    # Filter bounding boxes with the PostGIS location column (PostgreSQL only;
+    # the migration creates it when the postgis extension is available)
+    POSTGIS_ENABLED: bool = False
+
+    # Query diagnostics
+    # Make unloaded relationships raise instead of lazy-loading (enabled in tests)
+    RAISE_ON_LAZY_LOAD: bool = False
+    # Maximum SQL statements per request; 0 disables the check
+    QUERY_BUDGET_PER_REQUEST: int = 25
+    # Fail the request instead of logging a warning when the budget is exceeded
+    QUERY_BUDGET_ENFORCE: bool = False
+
+    # Event-loop lag monitor (opt-in): how late the loop runs a timer every
+    # LOOP_MONITOR_INTERVAL_MS; stalls of LOOP_MONITOR_STALL_MS or more are
+    # logged with the route and stack that held the loop
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_INTERVAL_MS: int = 50
+    LOOP_MONITOR_STALL_MS: int = 100
+
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
     @property
@@ -1,36 +1,59 @@
+"""
+Database engines and sessions.
+
+The API runs on the async engine (asyncpg for PostgreSQL, aiosqlite for
+SQLite), so a slow query no longer blocks the worker's event loop:
+routers take an AsyncSession from get_db and await their statements.
+Services shared with scripts and migrations (dataset version, dashboard
+snapshot rebuild) keep taking a sync Session; routers call them through
+AsyncSession.run_sync, which runs them on the same async connection.
+
+The sync engine and SessionLocal remain for those scripts, the CLI tools
+and Alembic. Pooling of both is configured by the DB_POOL_* settings (see
+app/core/pool.py).
+"""
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import NullPool
 from .config import settings
+from .pool import engine_options, instrument_pool
+
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
 
-# Create database engine
-connect_args = {}
-engine_args = {}
 
-if "sqlite" in settings.DATABASE_URL:
-    connect_args = {"check_same_thread": False}
-else:
-    # Use NullPool for PostgreSQL with Supabase Transaction/Session pooler
-    # This prevents SQLAlchemy from holding idle connections
-    engine_args["poolclass"] = NullPool
+def async_database_url(url: str) -> str:
+    """The async driver URL for a DATABASE_URL (e.g. postgresql:// -> postgresql+asyncpg://)"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS or url.get_dialect().is_async:
+        return url.render_as_string(hide_password=False)
+    url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    if backend == "postgresql" and "sslmode" in url.query:
+        # asyncpg takes ssl=<mode> instead of libpq's sslmode
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return url.render_as_string(hide_password=False)
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args=connect_args,
-    **engine_args
-)
 
-# Create session factory
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+
+# Sync engine: scripts, CLI tools, migrations
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: the API. Objects stay usable after commit, since reloading
+# expired attributes would need an await the ORM cannot do implicitly.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+instrument_pool(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """Dependency for database sessions"""
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
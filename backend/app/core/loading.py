@@ -0,0 +1,148 @@
+"""
+Shared eager-loading policy for projects.
+
+Every query whose rows go through _format_project_response must load the
+child collections up front, one SELECT ... IN per relationship, instead of
+lazy-loading them per project. With RAISE_ON_LAZY_LOAD enabled (as in the
+test suite) a forgotten option raises instead of silently issuing an N+1.
+
+Listings that only need some response fields (see FIELD_SOURCES) load just
+the columns and collections those fields are built from. The long-form
+texts are a deferred column group: plain queries leave them out, and only
+detail views (PROJECT_DETAIL_LOADING) or listings that ask for them read
+them.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload, undefer_group
+from ..models.project import CONTENT_GROUP, Project, ProjectImage
+from .config import settings
+
+PROJECT_CHILDREN_LOADING = (
+    selectinload(Project.sdgs),
+    selectinload(Project.typologies),
+    selectinload(Project.requirements),
+    selectinload(Project.images).selectinload(ProjectImage.variants),
+)
+
+# Single-project views: children plus the long-form texts
+PROJECT_DETAIL_LOADING = (*PROJECT_CHILDREN_LOADING, undefer_group(CONTENT_GROUP))
+
+
+async def load_project(db: AsyncSession, project_id: UUID) -> Optional[Project]:
+    """Fetch a project together with its child collections and texts"""
+    # populate_existing: the session may hold the project from before a change
+    result = await db.execute(
+        select(Project).options(*PROJECT_DETAIL_LOADING)
+        .where(Project.id == project_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+# Response field -> (Project columns, child relationships) it is built from
+FIELD_SOURCES: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "id": (("id",), ()),
+    "project_name": (("project_name",), ()),
+    "organization_name": (("organization_name",), ()),
+    "contact_person": (("contact_person",), ()),
+    "contact_email": (("contact_email",), ()),
+    "project_status": (("project_status",), ()),
+    "workflow_status": (("workflow_status",), ()),
+    "funding_needed": (("funding_needed",), ()),
+    "funding_spent": (("funding_spent",), ()),
+    "uia_region": (("uia_region",), ()),
+    "city": (("city",), ()),
+    "country": (("country",), ()),
+    "latitude": (("latitude",), ()),
+    "longitude": (("longitude",), ()),
+    "brief_description": (("brief_description",), ()),
+    "detailed_description": (("detailed_description",), ()),
+    "success_factors": (("success_factors",), ()),
+    "typologies": ((), ("typologies",)),
+    "funding_requirements": ((), ("requirements",)),
+    "government_requirements": ((), ("requirements",)),
+    "other_requirements": ((), ("requirements",)),
+    "other_requirement_text": (("other_requirement_text",), ()),
+    "gdpr_consent": (("gdpr_consent",), ()),
+    "sdgs": ((), ("sdgs",)),
+    "image_urls": ((), ("images",)),
+    # Resized variants of the first image (app/services/image_variants.py)
+    "image": ((), ("images", "images.variants")),
+    "rejection_reason": (("rejection_reason",), ()),
+    "reviewer_notes": (("reviewer_notes",), ()),
+    "created_at": (("created_at",), ()),
+    "updated_at": (("updated_at",), ()),
+}
+
+# What listing cards show: no long texts, contact details or review notes
+SUMMARY_FIELDS = (
+    "id", "project_name", "organization_name", "project_status", "workflow_status",
+    "funding_needed", "funding_spent", "uia_region", "city", "country",
+    "latitude", "longitude", "typologies", "funding_requirements", "sdgs",
+    "image_urls", "image", "created_at", "updated_at",
+)
+FULL_FIELDS = tuple(FIELD_SOURCES)
+
+
+def select_fields(view: str = "full", fields: Optional[str] = None) -> Tuple[str, ...]:
+    """Resolve the view/fields query parameters to the response fields to return"""
+    if not fields:
+        return SUMMARY_FIELDS if view == "summary" else FULL_FIELDS
+
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in FIELD_SOURCES]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    # The id is always returned so clients can fetch the rest
+    return tuple(dict.fromkeys(["id", *requested]))
+
+
+def project_loading_options(fields: Sequence[str], extra_columns: Sequence[str] = ()) -> List:
+    """Loader options reading only what the given response fields need"""
+    columns, relationships = set(extra_columns), set()
+    for field in fields:
+        field_columns, field_relationships = FIELD_SOURCES[field]
+        columns.update(field_columns)
+        relationships.update(field_relationships)
+
+    # Under RAISE_ON_LAZY_LOAD, reading a column that was left out raises too
+    options = [load_only(
+        *(getattr(Project, name) for name in sorted(columns)),
+        raiseload=settings.RAISE_ON_LAZY_LOAD
+    )]
+    for name in sorted(relationships):
+        # "images.variants": the variants of each image, loaded along with the images
+        path = name.split(".")
+        if len(path) == 1 and any(other.startswith(f"{name}.") for other in relationships):
+            continue
+        loader = selectinload(getattr(Project, path[0]))
+        model = Project.__mapper__.relationships[path[0]].mapper.class_
+        for attribute in path[1:]:
+            loader = loader.selectinload(getattr(model, attribute))
+            model = model.__mapper__.relationships[attribute].mapper.class_
+        options.append(loader)
+    return options
+
+
+async def load_project_fields(db: AsyncSession, project_ids: Sequence[UUID], fields: Sequence[str]) -> List[dict]:
+    """Fetch and format the given fields of several projects, in the order of the ids"""
+    from ..api.projects import _format_project_response
+
+    if not project_ids:
+        return []
+    result = await db.execute(
+        select(Project).options(*project_loading_options(fields)).where(Project.id.in_(project_ids))
+    )
+    projects = result.scalars().all()
+    by_id = {project.id: project for project in projects}
+    return [
+        _format_project_response(by_id[project_id], fields)
+        for project_id in project_ids if project_id in by_id
+    ]
@@ -0,0 +1,206 @@
+"""
+Event-loop lag monitor.
+
+Anything synchronous that runs on the event loop (a blocking driver call,
+password hashing, a CPU-heavy serialization) delays every other request the
+worker is serving. With LOOP_MONITOR_ENABLED, a timer task measures how late
+the loop wakes it every LOOP_MONITOR_INTERVAL_MS; the delays are kept for
+lag percentiles (GET /api/admin/loop-lag).
+
+Stalls are caught while they happen: a watchdog thread notices when the
+timer has not run for LOOP_MONITOR_STALL_MS and snapshots the loop thread's
+stack together with the route of the request whose task is running. Once
+the loop is back, the stall is logged with its length and kept among the
+recent stalls.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lag samples kept for the percentiles (about 100 s at the default interval)
+SAMPLE_WINDOW = 2048
+RECENT_STALLS = 50
+STACK_FRAMES = 25
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def route_label(scope: dict) -> str:
+    """'METHOD /route/{template}' of a request, or its raw path before routing"""
+    route = scope.get("route")
+    return f"{scope.get('method', '')} {getattr(route, 'path', None) or scope.get('path', '')}".strip()
+
+
+class LoopMonitor:
+    """Samples event-loop scheduling delay and records stalls with their route and stack"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[asyncio.Task, dict] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._timer: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._heartbeat = 0.0
+        self._snapshot: Optional[dict] = None
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+            self._stalls: Deque[dict] = deque(maxlen=RECENT_STALLS)
+            self._stall_count = 0
+
+    @property
+    def running(self) -> bool:
+        return self._timer is not None
+
+    def start(self) -> None:
+        """Start sampling the running loop (call from within it)"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stopped.clear()
+        self._heartbeat = time.monotonic()
+        self._timer = self._loop.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+        logger.info(
+            f"Event-loop monitor started (interval {settings.LOOP_MONITOR_INTERVAL_MS} ms, "
+            f"stalls from {settings.LOOP_MONITOR_STALL_MS} ms)"
+        )
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self._stopped.set()
+        self._timer.cancel()
+        try:
+            await self._timer
+        except asyncio.CancelledError:
+            pass
+        self._timer = None
+        await asyncio.to_thread(self._watchdog.join)
+        self._watchdog = None
+
+    def track(self, scope: dict) -> Optional[asyncio.Task]:
+        """Attribute stalls during the current task to this request"""
+        if not self.running:
+            return None
+        task = asyncio.current_task()
+        self._requests[task] = scope
+        return task
+
+    def untrack(self, task: Optional[asyncio.Task]) -> None:
+        if task is not None:
+            self._requests.pop(task, None)
+
+    async def _sample(self) -> None:
+        interval = settings.LOOP_MONITOR_INTERVAL_MS / 1000
+        while True:
+            started = self._heartbeat = time.monotonic()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.monotonic() - started - interval)
+            self._record(lag, started)
+
+    def _record(self, lag: float, started: float) -> None:
+        lag_ms = lag * 1000
+        snapshot, self._snapshot = self._snapshot, None
+        with self._lock:
+            self._samples.append(lag_ms)
+            if lag_ms < settings.LOOP_MONITOR_STALL_MS:
+                return
+            self._stall_count += 1
+            if snapshot is None or snapshot["heartbeat"] != started:
+                # Shorter than the watchdog's polling granularity
+                snapshot = {"route": None, "stack": []}
+            stall = {
+                "lag_ms": round(lag_ms, 1),
+                "at": time.time() - lag,
+                "route": snapshot["route"],
+                "stack": snapshot["stack"],
+            }
+            self._stalls.append(stall)
+        logger.warning(
+            f"Event loop stalled for {lag_ms:.0f} ms in {stall['route'] or 'no request'}"
+            + ("\n" + "".join(stall["stack"]) if stall["stack"] else "")
+        )
+
+    def _watch(self) -> None:
+        """Watchdog thread: snapshot the loop thread while the timer is overdue"""
+        interval = settings.LOOP_MONITOR_INTERVAL_MS / 1000
+        threshold = settings.LOOP_MONITOR_STALL_MS / 1000
+        poll = max(threshold / 4, 0.005)
+        while not self._stopped.wait(poll):
+            heartbeat = self._heartbeat
+            if time.monotonic() - heartbeat < interval + threshold:
+                continue
+            if self._snapshot is not None and self._snapshot["heartbeat"] == heartbeat:
+                continue
+            self._snapshot = self._capture(heartbeat)
+
+    def _capture(self, heartbeat: float) -> dict:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.format_stack(frame, limit=STACK_FRAMES) if frame is not None else []
+        # Reading another thread's current task: the loop is blocked in it
+        task = asyncio.current_task(self._loop)
+        scope = self._requests.get(task) if task is not None else None
+        return {
+            "heartbeat": heartbeat,
+            "route": route_label(scope) if scope is not None else None,
+            "stack": stack,
+        }
+
+    def info(self) -> dict:
+        with self._lock:
+            ordered = sorted(self._samples)
+            stalls = list(self._stalls)
+            stall_count = self._stall_count
+        return {
+            "running": self.running,
+            "interval_ms": settings.LOOP_MONITOR_INTERVAL_MS,
+            "stall_threshold_ms": settings.LOOP_MONITOR_STALL_MS,
+            "samples": len(ordered),
+            "lag_ms": {
+                "p50": round(percentile(ordered, 0.50), 2),
+                "p90": round(percentile(ordered, 0.90), 2),
+                "p99": round(percentile(ordered, 0.99), 2),
+                "max": round(ordered[-1], 2) if ordered else 0.0,
+            },
+            "stalls": stall_count,
+            "recent_stalls": stalls[::-1],
+        }
+
+
+# One monitor per worker process
+loop_monitor = LoopMonitor()
+
+
+class LoopMonitorMiddleware:
+    """ASGI middleware recording which request each task is serving"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        task = loop_monitor.track(scope) if scope["type"] == "http" else None
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            loop_monitor.untrack(task)
@@ -0,0 +1,130 @@
+"""
+Keyset (cursor) pagination for project listings.
+
+A cursor encodes the sort column, the sort value of the last row returned
+and its id, which breaks ties so the order is stable. The total is computed
+as an uncorrelated scalar subquery of the page query, so a page costs one
+round trip. Clients can opt into an approximate total, which stops counting
+after APPROXIMATE_TOTAL_CAP rows.
+
+page/page_size (OFFSET) paging keeps working; every response also carries a
+next_cursor so clients can switch to keyset paging.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy import Select, and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.project import Project
+from .loading import PROJECT_CHILDREN_LOADING
+
+# Approximate totals stop counting here and report total_is_approximate
+APPROXIMATE_TOTAL_CAP = 1000
+
+
+def encode_cursor(sort_by: str, value: Any, item_id: Any) -> str:
+    """Encode the position after a row as an opaque cursor"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, value, str(item_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, str]:
+    """Decode a cursor into (sort value, id) for the given sort column"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_sort != sort_by:
+            raise ValueError("cursor was issued for a different sort column")
+        if sort_by == "created_at":
+            value = datetime.fromisoformat(value)
+        elif sort_by in ("funding_needed", "relevance"):
+            value = float(value)
+        else:
+            value = str(value)
+        return value, str(UUID(item_id))
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+async def paginate_projects(
+    db: AsyncSession,
+    statement: Select,
+    sort_by: str,
+    sort_order: str,
+    page: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    total_mode: str = "exact",
+    loading: Sequence = PROJECT_CHILDREN_LOADING,
+) -> dict:
+    """
+    Fetch one page of a filtered select(Project) together with its total
+
+    loading are the loader options of the page rows; they must load the
+    sort column, which the next cursor is built from.
+    """
+    sort_column = getattr(Project, sort_by)
+    descending = sort_order == "desc"
+
+    counted = statement.with_only_columns(Project.id)
+    if total_mode == "approximate":
+        counted = counted.limit(APPROXIMATE_TOTAL_CAP + 1)
+    total_subquery = select(func.count()).select_from(counted.subquery()).scalar_subquery()
+
+    page_query = statement.add_columns(total_subquery.label("total")).options(*loading)
+
+    if cursor:
+        value, item_id = decode_cursor(cursor, sort_by)
+        item_id = UUID(item_id)
+        if descending:
+            page_query = page_query.filter(or_(
+                sort_column < value,
+                and_(sort_column == value, Project.id < item_id)
+            ))
+        else:
+            page_query = page_query.filter(or_(
+                sort_column > value,
+                and_(sort_column == value, Project.id > item_id)
+            ))
+
+    if descending:
+        page_query = page_query.order_by(sort_column.desc(), Project.id.desc())
+    else:
+        page_query = page_query.order_by(sort_column.asc(), Project.id.asc())
+    if not cursor:
+        page_query = page_query.offset((page - 1) * page_size)
+
+    # One extra row tells whether another page follows
+    rows = (await db.execute(page_query.limit(page_size + 1))).all()
+    projects = [row[0] for row in rows[:page_size]]
+
+    if rows:
+        total = rows[0].total
+    elif cursor or page > 1:
+        # Past the end: the total did not come back with the page
+        total = (await db.execute(select(total_subquery))).scalar()
+    else:
+        total = 0
+
+    approximate = total_mode == "approximate" and total > APPROXIMATE_TOTAL_CAP
+    next_cursor = None
+    if len(rows) > page_size:
+        last = projects[-1]
+        next_cursor = encode_cursor(sort_by, getattr(last, sort_by), last.id)
+
+    return {
+        "total": APPROXIMATE_TOTAL_CAP if approximate else total,
+        "total_is_approximate": approximate,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+        "projects": projects,
+    }
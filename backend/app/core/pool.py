@@ -0,0 +1,221 @@
+"""
+Database connection pool configuration and statistics.
+
+DB_POOL_MODE picks the strategy for server databases:
+
+- auto (default): null when DATABASE_URL points at a transaction-mode
+  pooler (TRANSACTION_POOLER_PORTS, Supabase's 6543), queue otherwise
+- queue: a QueuePool of DB_POOL_SIZE connections (plus DB_MAX_OVERFLOW
+  on bursts), checked with a ping before use and recycled after
+  DB_POOL_RECYCLE_SECONDS, so requests skip the TCP/TLS/auth handshake
+- null: a new connection per checkout, for transaction-mode poolers
+  (Supabase port 6543, PgBouncer pool_mode=transaction) that pool
+  server-side already
+
+DB_DISABLE_PREPARED_STATEMENTS adds the driver options that keep server-side
+prepared statements off, which transaction-mode poolers cannot route. Left
+unset, they are off exactly when the URL points at a transaction pooler;
+setting it to false for such a URL is refused at startup, since asyncpg's
+statement cache fails there on the first reused connection.
+
+Checkouts, new connections and the time spent waiting for a connection
+are counted in pool_stats (GET /api/admin/pool-stats).
+
+The same settings apply to the async engine used by the API and the sync
+engine used by scripts and migrations. Async SQLite opens a connection per
+session: it is a local file, and aiosqlite connections are cheap.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from typing import Dict
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+POOL_MODES = ("auto", "queue", "null")
+# Ports of transaction-mode poolers (Supabase's Supavisor in transaction mode)
+TRANSACTION_POOLER_PORTS = (6543,)
+
+
+class PoolStats:
+    """Thread-safe counters of pool activity"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters: Dict[str, float] = {
+                "checkouts": 0, "checkins": 0, "connects": 0, "invalidations": 0,
+                "timeouts": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0,
+            }
+
+    def increment(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def record_wait(self, seconds: float) -> None:
+        milliseconds = seconds * 1000
+        with self._lock:
+            self.counters["wait_ms_total"] += milliseconds
+            self.counters["wait_ms_max"] = max(self.counters["wait_ms_max"], milliseconds)
+
+    def info(self, engine: Engine) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        waited = counters["checkouts"] or 1
+        result = {
+            **counters,
+            "wait_ms_avg": counters["wait_ms_total"] / waited,
+            "pool_class": type(engine.pool).__name__,
+        }
+        if isinstance(engine.pool, QueuePool):
+            result.update({
+                "size": engine.pool.size(),
+                "checked_out": engine.pool.checkedout(),
+                "checked_in": engine.pool.checkedin(),
+                "overflow": engine.pool.overflow(),
+            })
+        return result
+
+
+# One set of counters per worker process
+pool_stats = PoolStats()
+
+
+class _TimedCheckout:
+    """Pool mixin recording how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.increment("timeouts")
+            raise
+        finally:
+            pool_stats.record_wait(time.perf_counter() - start)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def pooler_connect_args(driver: str) -> dict:
+    """Driver options disabling server-side prepared statements"""
+    if driver == "asyncpg":
+        # Unique names too, in case a pooler hands over a connection mid-prepare
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    if driver == "psycopg":
+        return {"prepare_threshold": None}
+    # psycopg2 never prepares statements server-side
+    return {}
+
+
+def is_transaction_pooler(url) -> bool:
+    """Whether a database URL points at a transaction-mode pooler"""
+    return make_url(url).port in TRANSACTION_POOLER_PORTS
+
+
+def engine_options(url: str) -> dict:
+    """create_engine() keyword arguments for the configured pooling strategy"""
+    url = make_url(url)
+    asynchronous = url.get_dialect().is_async
+    if url.get_backend_name() == "sqlite":
+        if asynchronous:
+            return {"poolclass": NullPool}
+        return {"connect_args": {"check_same_thread": False}}
+
+    mode = settings.DB_POOL_MODE
+    if mode not in POOL_MODES:
+        raise ValueError(f"DB_POOL_MODE must be one of {', '.join(POOL_MODES)}, not {mode!r}")
+
+    pooler = is_transaction_pooler(url)
+    disable_prepared = settings.DB_DISABLE_PREPARED_STATEMENTS
+    if disable_prepared is None:
+        disable_prepared = pooler
+    elif pooler and not disable_prepared:
+        raise ValueError(
+            f"Port {url.port} is a transaction pooler, which cannot route prepared statements: "
+            "unset DB_DISABLE_PREPARED_STATEMENTS or connect to the session pooler (port 5432)"
+        )
+    if mode == "auto":
+        mode = "null" if pooler else "queue"
+
+    options = {"connect_args": {}}
+    if disable_prepared:
+        options["connect_args"].update(pooler_connect_args(url.get_driver_name()))
+
+    if mode == "null":
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=TimedAsyncQueuePool if asynchronous else TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    return options
+
+
+def instrument_pool(engine: Engine) -> None:
+    """Count checkouts, checkins, new and invalidated connections of an engine"""
+    for name, counter in (
+        ("checkout", "checkouts"), ("checkin", "checkins"),
+        ("connect", "connects"), ("invalidate", "invalidations"),
+    ):
+        event.listen(engine, name, lambda *args, counter=counter: pool_stats.increment(counter))
+
+
+def warm_up_pool(engine: Engine, connections: int) -> int:
+    """Open up to `connections` pooled connections ahead of the first requests"""
+    if not isinstance(engine.pool, QueuePool) or connections <= 0:
+        return 0
+    opened = []
+    try:
+        for _ in range(min(connections, engine.pool.size())):
+            opened.append(engine.connect())
+    except Exception:
+        logger.warning("Database pool warm-up failed", exc_info=True)
+    finally:
+        for connection in opened:
+            connection.close()
+    logger.info(f"Database pool warmed up with {len(opened)} connections")
+    return len(opened)
+
+
+async def warm_up_async_pool(engine: AsyncEngine, connections: int) -> int:
+    """Open up to `connections` pooled connections of an async engine, concurrently"""
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, QueuePool) or connections <= 0:
+        return 0
+    opened = await asyncio.gather(
+        *(engine.connect().start() for _ in range(min(connections, pool.size()))),
+        return_exceptions=True
+    )
+    connected = [c for c in opened if not isinstance(c, BaseException)]
+    failed = [c for c in opened if isinstance(c, BaseException)]
+    if failed:
+        logger.warning(f"Database pool warm-up failed: {failed[0]!r}")
+    for connection in connected:
+        await connection.close()
+    logger.info(f"Database pool warmed up with {len(connected)} connections")
+    return len(connected)
@@ -0,0 +1,61 @@
+"""
+Per-request SQL statement budget.
+
+Counts every statement executed while a request is being handled and
+compares it against QUERY_BUDGET_PER_REQUEST. Over-budget requests are
+logged, or fail outright when QUERY_BUDGET_ENFORCE is set (as in the test
+suite), so a new N+1 shows up in CI rather than in production latency.
+"""
+import logging
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised when a request issues more statements than the budget allows"""
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class QueryBudgetMiddleware:
+    """ASGI middleware checking the statement count of each HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        budget = settings.QUERY_BUDGET_PER_REQUEST
+        if scope["type"] != "http" or budget <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        counter = [0]
+        token = _request_queries.set(counter)
+
+        async def checked_send(message):
+            if message["type"] == "http.response.start" and counter[0] > budget:
+                detail = (
+                    f"{scope['method']} {scope['path']} issued {counter[0]} SQL statements "
+                    f"(budget {budget})"
+                )
+                if settings.QUERY_BUDGET_ENFORCE:
+                    raise QueryBudgetExceeded(detail)
+                logger.warning(f"Query budget exceeded: {detail}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, checked_send)
+        finally:
+            _request_queries.reset(token)
@@ -0,0 +1,293 @@
+"""
+In-process response cache for the public dashboard endpoints.
+
+Dashboard traffic concentrates on a few filter combinations, so complete
+200 responses are kept in an LRU keyed on the path and the normalized query
+parameters: values that mean "no filter" ("All Regions", "All Cities", an
+empty search, default paging) are dropped, so e.g. region=All Regions and no
+region share an entry. A fresh entry is served as is, answering
+If-None-Match from its stored ETag. Past DASHBOARD_CACHE_TTL_SECONDS an
+entry is still served for up to DASHBOARD_CACHE_STALE_SECONDS while a
+background request refreshes it.
+
+Entries also keep their gzip/brotli encodings once a client asked for
+them, so hits on popular responses are not compressed again.
+
+Admin workflow endpoints and submissions clear the cache of the worker that
+handled them; other workers catch up once their entries go stale. Every
+clear starts a new generation: a response rendered while the cache was
+cleared is not stored, since it may predate the change. Concurrent misses
+on one key share a single run of the endpoint.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl
+from .compression import compress, encoded_headers, is_compressible, negotiate_encoding
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHED_PATH_PREFIX = "/api/dashboard/"
+# Streamed downloads of the whole dataset: never buffered in memory
+UNCACHED_PATHS = {"/api/dashboard/export"}
+
+# Query values equivalent to leaving the parameter out
+NEUTRAL_VALUES = {
+    "region": {"All Regions"},
+    "city": {"All Cities"},
+    "funded_by": {"All"},
+    "sdg": {"0"},
+    "page": {"1"},
+    "page_size": {"20"},
+    "sort_order": {"desc"},
+    "view": {"full"},
+    # Dashboard totals are always exact
+    "total_mode": {"exact", "approximate"},
+}
+
+# Request headers that would turn the response into a 304 or vary it
+_CONDITIONAL_HEADERS = {b"if-none-match", b"if-modified-since"}
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def normalize_query(query_string: str) -> Tuple[Tuple[str, str], ...]:
+    """Canonical form of a dashboard query string"""
+    items = []
+    for name, value in parse_qsl(query_string, keep_blank_values=True):
+        value = value.strip()
+        if name == "search":
+            # Search matches lowercase word tokens, so only those matter
+            value = " ".join(re.findall(r"\w+", value.lower()))
+        if not value or value in NEUTRAL_VALUES.get(name, ()):
+            continue
+        items.append((name, value))
+    return tuple(sorted(items))
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    created_at: float = field(default_factory=time.monotonic)
+    encodings: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def etag(self) -> Optional[bytes]:
+        return next((value for name, value in self.headers if name == b"etag"), None)
+
+    @property
+    def content_type(self) -> Optional[str]:
+        value = next((value for name, value in self.headers if name == b"content-type"), None)
+        return value.decode("latin-1") if value is not None else None
+
+    def encoded(self, encoding: str) -> bytes:
+        """The body in the given content coding, compressed on first use"""
+        if encoding not in self.encodings:
+            self.encodings[encoding] = compress(self.body, encoding)
+        return self.encodings[encoding]
+
+
+class ResponseCache:
+    """LRU + TTL map of cache keys to complete responses, with hit/miss counters"""
+
+    def __init__(self):
+        self.entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self.refreshing: Set[CacheKey] = set()
+        # Fetches of missing entries in flight, with the generation they started in
+        self.pending: Dict[CacheKey, Tuple[int, "asyncio.Future[CachedResponse]"]] = {}
+        # Incremented by every invalidate()
+        self.generation = 0
+        self.stats: Dict[str, int] = {}
+        self.reset_stats()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.DASHBOARD_CACHE_MAX_ENTRIES > 0
+
+    def reset_stats(self) -> None:
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "evictions": 0}
+
+    def lookup(self, key: CacheKey) -> Tuple[Optional[CachedResponse], bool]:
+        """Return (entry, is_fresh); expired entries past the stale window are dropped"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None, False
+
+        age = time.monotonic() - entry.created_at
+        ttl = settings.DASHBOARD_CACHE_TTL_SECONDS
+        if age <= ttl:
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry, True
+        if age <= ttl + settings.DASHBOARD_CACHE_STALE_SECONDS:
+            self.entries.move_to_end(key)
+            self.stats["stale_hits"] += 1
+            return entry, False
+
+        del self.entries[key]
+        self.stats["misses"] += 1
+        return None, False
+
+    def store(self, key: CacheKey, entry: CachedResponse, generation: Optional[int] = None) -> bool:
+        """Keep a response, unless the cache was invalidated since `generation` began"""
+        if generation is not None and generation != self.generation:
+            return False
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > settings.DASHBOARD_CACHE_MAX_ENTRIES:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+        return True
+
+    def invalidate(self) -> None:
+        """Drop every entry, e.g. after the dataset changed"""
+        self.entries.clear()
+        self.generation += 1
+
+    def info(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self.entries),
+            "hit_ratio": (self.stats["hits"] + self.stats["stale_hits"]) / lookups if lookups else 0.0,
+        }
+
+
+# One cache per worker process
+dashboard_cache = ResponseCache()
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving GET /api/dashboard/* from the response cache"""
+
+    def __init__(self, app, cache: ResponseCache = dashboard_cache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(CACHED_PATH_PREFIX)
+            or scope["path"] in UNCACHED_PATHS
+            or not self.cache.enabled
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["path"], normalize_query(scope["query_string"].decode("latin-1")))
+        entry, fresh = self.cache.lookup(key)
+
+        if entry is None:
+            entry = await self._fetch_missing(scope, key)
+            await self._respond(scope, send, entry, b"MISS")
+            return
+
+        if not fresh and key not in self.cache.refreshing:
+            self.cache.refreshing.add(key)
+            asyncio.get_running_loop().create_task(self._refresh(scope, key))
+        await self._respond(scope, send, entry, b"HIT" if fresh else b"STALE")
+
+    async def _fetch_missing(self, scope, key: CacheKey) -> CachedResponse:
+        """Fetch and store a missing entry, joining a fetch of the same key already in flight"""
+        generation = self.cache.generation
+        pending = self.cache.pending.get(key)
+        if pending is None or pending[0] != generation:
+            task = asyncio.ensure_future(self._fetch_and_store(scope, key, generation))
+            self.cache.pending[key] = (generation, task)
+            task.add_done_callback(lambda done: self._fetched(key, done))
+        else:
+            task = pending[1]
+        # A disconnecting client must not cancel the fetch other requests wait for
+        return await asyncio.shield(task)
+
+    async def _fetch_and_store(self, scope, key: CacheKey, generation: int) -> CachedResponse:
+        entry = await self._fetch(scope)
+        if entry.status == 200:
+            self.cache.store(key, entry, generation)
+        return entry
+
+    def _fetched(self, key: CacheKey, task: "asyncio.Future[CachedResponse]") -> None:
+        if self.cache.pending.get(key, (None, None))[1] is task:
+            del self.cache.pending[key]
+        if not task.cancelled():
+            # Raised in the requests waiting for it; retrieved here in case they all left
+            task.exception()
+
+    async def _fetch(self, scope) -> CachedResponse:
+        """Run the request through the app unconditionally and capture the response"""
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"] if name not in _CONDITIONAL_HEADERS
+        ]
+        response = {"status": 500, "headers": [], "body": []}
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Nothing more will arrive (streaming responses wait here for a disconnect)
+            await asyncio.Event().wait()
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    (name, value) for name, value in message.get("headers", [])
+                    if name != b"content-length"
+                ]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        return CachedResponse(response["status"], response["headers"], b"".join(response["body"]))
+
+    async def _refresh(self, scope, key: CacheKey) -> None:
+        generation = self.cache.generation
+        try:
+            entry = await self._fetch(scope)
+            if entry.status == 200 and self.cache.store(key, entry, generation):
+                self.cache.stats["refreshes"] += 1
+        except Exception:
+            logger.exception(f"Refreshing cached response for {scope['path']} failed")
+        finally:
+            self.cache.refreshing.discard(key)
+
+    async def _respond(self, scope, send, entry: CachedResponse, state: bytes) -> None:
+        request_headers = dict(scope["headers"])
+        if_none_match = request_headers.get(b"if-none-match")
+        etag = entry.etag
+        not_modified = (
+            entry.status == 200 and etag is not None and if_none_match is not None
+            and (if_none_match.strip() == b"*"
+                 or etag in (tag.strip().removeprefix(b"W/") for tag in if_none_match.split(b",")))
+        )
+
+        headers = list(entry.headers) + [(b"x-cache", state)]
+        if not_modified:
+            headers = [(name, value) for name, value in headers if name != b"content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        body = entry.body
+        encoding = negotiate_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if (
+            encoding is not None and settings.COMPRESSION_ENABLED and entry.status == 200
+            and len(body) >= settings.COMPRESSION_MIN_SIZE and is_compressible(entry.content_type)
+        ):
+            body = entry.encoded(encoding)
+            headers = encoded_headers(headers, encoding)
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,39 @@
+"""
+Fast JSON responses for trusted, already-shaped payloads.
+
+When an endpoint returns a dict, FastAPI validates it against the route's
+response_model, converts the result to JSON-compatible Python and only then
+encodes it. The list endpoints build their payloads from database rows or
+the dashboard snapshot in exactly the response shape, so they return a
+TrustedJSONResponse instead: orjson encodes the dicts (UUIDs, datetimes and
+all) straight to bytes. The routes keep their response_model, so the
+OpenAPI schema is unchanged.
+"""
+from typing import Any, Optional
+import orjson
+from fastapi import Response
+
+
+class TrustedJSONResponse(Response):
+    """JSON response serialized with orjson, bypassing response_model validation"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def trusted_json(content: Any, response: Optional[Response] = None) -> TrustedJSONResponse:
+    """
+    Wrap an already-shaped payload in a TrustedJSONResponse
+
+    Pass the endpoint's injected Response to keep the headers dependencies set
+    on it (ETag, Cache-Control, ...); FastAPI only copies those onto responses
+    it builds itself.
+    """
+    result = TrustedJSONResponse(content)
+    if response is not None:
+        result.headers.raw.extend(
+            (name, value) for name, value in response.headers.raw if name != b"content-length"
+        )
+    return result
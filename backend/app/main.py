@@ -1,17 +1,48 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
+from .core.compression import CompressionMiddleware
 from .core.config import settings
+from .core.database import async_engine
+from .core.loop_monitor import LoopMonitorMiddleware, loop_monitor
+from .core.pool import warm_up_async_pool
+from .core.query_budget import QueryBudgetMiddleware
+from .core.response_cache import ResponseCacheMiddleware
+from .services.email import smtp_configured
+from .services.email_outbox import email_outbox
+from .services.recaptcha import close_captcha_verifier
 from .api import auth, projects, dashboard, admin, debug
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start pooled connections and background workers; drain and close them on shutdown"""
+    await warm_up_async_pool(async_engine, settings.DB_POOL_WARMUP_CONNECTIONS)
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    if not settings.EMAIL_OUTBOX_WORKER_ENABLED:
+        logger.info("Email outbox worker disabled; queued emails wait for another process")
+    elif not smtp_configured():
+        logger.warning(f"SMTP not configured (HOST={settings.SMTP_HOST}). Queued emails are kept unsent.")
+    else:
+        email_outbox.start()
+    yield
+    await email_outbox.stop()
+    await close_captcha_verifier()
+    await loop_monitor.stop()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title="Atlas 3+3 API",
     description="API for sustainable development projects platform",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS configuration
@@ -42,7 +73,15 @@ if not origins_list and not settings.CORS_ORIGIN_REGEX:
     cors_kwargs["allow_origins"] = ["http://localhost:5173"]
 
 logger.info(f"Final CORS configuration: {cors_kwargs}")
+# Added before CORS so it runs inside it: cached responses carry no CORS headers
+app.add_middleware(ResponseCacheMiddleware)
 app.add_middleware(CORSMiddleware, **cors_kwargs)
+app.add_middleware(QueryBudgetMiddleware)
+# Outermost, so it also compresses error responses; cached responses arrive
+# already encoded and pass through
+app.add_middleware(CompressionMiddleware)
+# Attributes event-loop stalls to the request being served (no-op unless enabled)
+app.add_middleware(LoopMonitorMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
@@ -1,5 +1,9 @@
 from .user import User
-from .project import Project, ProjectSDG, ProjectTypology, ProjectRequirement, ProjectImage
+from .project import Project, ProjectSDG, ProjectTypology, ProjectRequirement, ProjectImage, ImageVariant, ImageCheck
+from .dataset import DatasetVersion
+from .email import EmailOutbox
+from . import search  # noqa: F401  (registers full-text search DDL)
+from . import spatial  # noqa: F401  (registers spatial index DDL)
 
 __all__ = [
     "User",
@@ -8,4 +12,8 @@ __all__ = [
     "ProjectTypology",
     "ProjectRequirement",
     "ProjectImage",
+    "ImageVariant",
+    "ImageCheck",
+    "DatasetVersion",
+    "EmailOutbox",
 ]
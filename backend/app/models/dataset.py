@@ -0,0 +1,22 @@
+from sqlalchemy import BigInteger, Column, DateTime, DDL, Integer, event
+from datetime import datetime
+from ..core.database import Base
+
+
+class DatasetVersion(Base):
+    """Single-row counter bumped whenever the public (approved) dataset changes"""
+
+    __tablename__ = "dataset_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<DatasetVersion {self.version}>"
+
+
+event.listen(
+    DatasetVersion.__table__, "after_create",
+    DDL("INSERT INTO dataset_version (id, version, updated_at) VALUES (1, 1, CURRENT_TIMESTAMP)"),
+)
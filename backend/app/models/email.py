@@ -0,0 +1,36 @@
+from sqlalchemy import Column, DateTime, Enum, Index, Integer, String, Text
+from datetime import datetime
+import enum
+from ..core.database import Base
+
+
+class EmailStatus(str, enum.Enum):
+    """Delivery state of an outbox email"""
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class EmailOutbox(Base):
+    """Email queued in the transaction of the change it reports, sent by the outbox worker"""
+
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(500), nullable=False)
+    html_content = Column(Text, nullable=False)
+    status = Column(Enum(EmailStatus), nullable=False, default=EmailStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Due time of the next attempt; pushed ahead while a worker holds the email
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox {self.id} {self.status} to {self.to_email}>"
@@ -1,9 +1,10 @@
-from sqlalchemy import Column, String, Integer, Float, Text, DateTime, ForeignKey, Enum, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, Float, Text, DateTime, ForeignKey, Enum, Boolean, UniqueConstraint
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 import uuid
 import enum
 from ..core.database import Base
+from ..core.config import settings
 
 # For SQLite compatibility, use String for UUID
 try:
@@ -13,6 +14,15 @@ except:
     UUID = String(36)
 
 
+# Child collections must be loaded explicitly (see app/core/loading.py);
+# with RAISE_ON_LAZY_LOAD a missing eager load raises instead of querying
+CHILDREN_LAZY = "raise_on_sql" if settings.RAISE_ON_LAZY_LOAD else "select"
+
+# Deferred group of the long-form texts: only detail views load them, with
+# undefer_group(CONTENT_GROUP) or load_only (see app/core/loading.py)
+CONTENT_GROUP = "content"
+
+
 class ProjectStatus(str, enum.Enum):
     """Project implementation status"""
     PLANNED = "planned"
@@ -72,14 +82,20 @@ class Project(Base):
     # Coordinates
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
-    # Note: PostGIS Geography column removed for SQLite compatibility
-    # For production with PostgreSQL, uncomment:
-    # location = Column(Geography(geometry_type='POINT', srid=4326), nullable=True)
+    # Derived from latitude/longitude on write (see app/models/spatial.py),
+    # which also sets up the SQLite R*Tree and optional PostGIS location column
+    geohash = Column(String(12), nullable=True, index=True)
 
     # Descriptions
-    brief_description = Column(Text, nullable=False)
-    detailed_description = Column(Text, nullable=False)
-    success_factors = Column(Text, nullable=False)
+    brief_description = deferred(
+        Column(Text, nullable=False), group=CONTENT_GROUP, raiseload=settings.RAISE_ON_LAZY_LOAD
+    )
+    detailed_description = deferred(
+        Column(Text, nullable=False), group=CONTENT_GROUP, raiseload=settings.RAISE_ON_LAZY_LOAD
+    )
+    success_factors = deferred(
+        Column(Text, nullable=False), group=CONTENT_GROUP, raiseload=settings.RAISE_ON_LAZY_LOAD
+    )
 
     # Other requirement text (for custom "Other" option)
     other_requirement_text = Column(Text, nullable=True)
@@ -88,6 +104,9 @@ class Project(Base):
     rejection_reason = Column(Text, nullable=True)
     reviewer_notes = Column(Text, nullable=True)
     edit_token = Column(String(255), nullable=True, index=True)
+
+    # Natural key of projects written by the bulk importer (app/services/project_import.py)
+    import_key = Column(String(64), nullable=True, unique=True, index=True)
     
     # Compliance
     gdpr_consent = Column(Boolean, default=False, nullable=False)
@@ -97,10 +116,10 @@ class Project(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
-    sdgs = relationship("ProjectSDG", back_populates="project", cascade="all, delete-orphan")
-    typologies = relationship("ProjectTypology", back_populates="project", cascade="all, delete-orphan")
-    requirements = relationship("ProjectRequirement", back_populates="project", cascade="all, delete-orphan")
-    images = relationship("ProjectImage", back_populates="project", cascade="all, delete-orphan")
+    sdgs = relationship("ProjectSDG", back_populates="project", cascade="all, delete-orphan", lazy=CHILDREN_LAZY)
+    typologies = relationship("ProjectTypology", back_populates="project", cascade="all, delete-orphan", lazy=CHILDREN_LAZY)
+    requirements = relationship("ProjectRequirement", back_populates="project", cascade="all, delete-orphan", lazy=CHILDREN_LAZY)
+    images = relationship("ProjectImage", back_populates="project", cascade="all, delete-orphan", lazy=CHILDREN_LAZY)
 
     @property
     def image_urls(self):
@@ -159,3 +178,57 @@ class ProjectImage(Base):
     display_order = Column(Integer, default=0)
 
     project = relationship("Project", back_populates="images")
+
+    # Resized copies of the image file (app/services/image_variants.py), smallest first
+    variants = relationship(
+        "ImageVariant",
+        primaryjoin="foreign(ImageVariant.source_url) == ProjectImage.image_url",
+        viewonly=True,
+        order_by="(ImageVariant.width, ImageVariant.format)",
+        lazy=CHILDREN_LAZY,
+    )
+
+
+class ImageVariant(Base):
+    """A resized, re-encoded copy of an image file
+
+    Keyed by the source URL rather than a ProjectImage row: projects sharing
+    an image share its variants, and rows reused for another URL on edit
+    pick up that URL's variants.
+    """
+
+    __tablename__ = "image_variants"
+    __table_args__ = (UniqueConstraint("source_url", "variant", "format"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    source_url = Column(String(1000), nullable=False, index=True)
+    # SHA-256 of the source file the variant was made from
+    source_hash = Column(String(64), nullable=False)
+    variant = Column(String(20), nullable=False)  # 'thumbnail', 'card', 'hero'
+    format = Column(String(10), nullable=False)  # 'avif', 'webp'
+    url = Column(String(1000), nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ImageCheck(Base):
+    """Last verification of an image URL (app/services/image_checks.py)"""
+
+    __tablename__ = "image_checks"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    url = Column(String(1000), nullable=False, unique=True, index=True)
+    # Answered with an image whose header could be read
+    ok = Column(Boolean, nullable=False)
+    status_code = Column(Integer, nullable=True)  # None when no response came
+    error = Column(String(500), nullable=True)
+    content_type = Column(String(100), nullable=True)
+    bytes = Column(Integer, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    # Validators sent back on the next check, which a 304 answers
+    etag = Column(String(200), nullable=True)
+    last_modified = Column(String(100), nullable=True)
+    checked_at = Column(DateTime, nullable=False, index=True)
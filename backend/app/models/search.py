@@ -0,0 +1,77 @@
+"""
+Full-text search schema for projects.
+
+PostgreSQL gets a generated, weighted tsvector column with a GIN index;
+SQLite gets an FTS5 table over the same columns, kept in sync by triggers.
+Either way the database maintains the index incrementally on every insert,
+update and delete of a project, whichever code path writes it.
+
+Both fold diacritics, so "medellin" and "Medellín" match each other on
+either backend: FTS5 through its remove_diacritics tokenizer option,
+PostgreSQL through the unaccent extension. unaccent() is only STABLE, which
+generated columns do not accept, so it is wrapped in an IMMUTABLE function
+(UNACCENT_FUNCTION) that the query side applies to the search terms too.
+
+The DDL is attached to the projects table so metadata.create_all() (tests,
+local setups) builds it too; existing databases get it from the migration.
+"""
+from sqlalchemy import DDL, event
+from .project import Project
+
+SEARCH_COLUMNS = (
+    "project_name", "city", "country",
+    "brief_description", "detailed_description", "success_factors",
+)
+
+UNACCENT_FUNCTION = "immutable_unaccent"
+
+# The extension lives in public, or in extensions on Supabase
+POSTGRES_UNACCENT_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"CREATE OR REPLACE FUNCTION {UNACCENT_FUNCTION}(text) RETURNS text "
+    f"LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT SET search_path = public, extensions "
+    f"AS $$ SELECT unaccent('unaccent', $1) $$",
+)
+
+# Relevance weights: name first, then place, then summary, then long text
+POSTGRES_SEARCH_VECTOR = (
+    f"setweight(to_tsvector('simple', {UNACCENT_FUNCTION}(coalesce(project_name, ''))), 'A') || "
+    f"setweight(to_tsvector('simple', {UNACCENT_FUNCTION}("
+    f"coalesce(city, '') || ' ' || coalesce(country, ''))), 'B') || "
+    f"setweight(to_tsvector('simple', {UNACCENT_FUNCTION}(coalesce(brief_description, ''))), 'C') || "
+    f"setweight(to_tsvector('simple', {UNACCENT_FUNCTION}("
+    f"coalesce(detailed_description, '') || ' ' || coalesce(success_factors, ''))), 'D')"
+)
+
+POSTGRES_DDL = POSTGRES_UNACCENT_DDL + (
+    f"ALTER TABLE projects ADD COLUMN search_vector tsvector "
+    f"GENERATED ALWAYS AS ({POSTGRES_SEARCH_VECTOR}) STORED",
+    "CREATE INDEX ix_projects_search_vector ON projects USING GIN (search_vector)",
+)
+
+_columns = ", ".join(SEARCH_COLUMNS)
+_new_values = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+_old_values = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+
+SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS project_search USING fts5({_columns}, "
+    f"content='projects', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS project_search_ai AFTER INSERT ON projects BEGIN "
+    f"INSERT INTO project_search(rowid, {_columns}) VALUES (new.rowid, {_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS project_search_ad AFTER DELETE ON projects BEGIN "
+    f"INSERT INTO project_search(project_search, rowid, {_columns}) "
+    f"VALUES ('delete', old.rowid, {_old_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS project_search_au AFTER UPDATE OF {_columns} ON projects BEGIN "
+    f"INSERT INTO project_search(project_search, rowid, {_columns}) "
+    f"VALUES ('delete', old.rowid, {_old_values}); "
+    f"INSERT INTO project_search(rowid, {_columns}) VALUES (new.rowid, {_new_values}); END",
+)
+
+for statement in POSTGRES_DDL:
+    event.listen(Project.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_DDL:
+    event.listen(Project.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Project.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS project_search").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,87 @@
+"""
+Spatial index schema for project coordinates.
+
+Every database gets a geohash column with a B-tree index, filled in from
+latitude/longitude whenever a project is written through the ORM; a bounding
+box becomes a handful of geohash prefix ranges. On top of that SQLite gets
+an R*Tree table kept in sync by triggers, and PostgreSQL with PostGIS gets a
+generated geography column with a GiST index (created by the migration when
+the extension is available, used when POSTGIS_ENABLED is set).
+"""
+from typing import Optional
+from sqlalchemy import DDL, event
+from ..core.config import settings
+from .project import Project
+
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a coordinate as a base32 geohash"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        if coordinate >= middle:
+            value = (value << 1) | 1
+            interval[0] = middle
+        else:
+            value <<= 1
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def project_geohash(latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+    if latitude is None or longitude is None:
+        return None
+    return encode_geohash(latitude, longitude)
+
+
+@event.listens_for(Project, "before_insert")
+@event.listens_for(Project, "before_update")
+def _set_geohash(mapper, connection, project: Project) -> None:
+    project.geohash = project_geohash(project.latitude, project.longitude)
+
+
+POSTGIS_DDL = (
+    "ALTER TABLE projects ADD COLUMN location geography(Point, 4326) GENERATED ALWAYS AS ("
+    "CASE WHEN latitude IS NOT NULL AND longitude IS NOT NULL "
+    "THEN ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography END) STORED",
+    "CREATE INDEX ix_projects_location ON projects USING GIST (location)",
+)
+
+_new_point = "new.rowid, new.latitude, new.latitude, new.longitude, new.longitude"
+_has_point = "new.latitude IS NOT NULL AND new.longitude IS NOT NULL"
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS project_rtree USING rtree("
+    "id, min_lat, max_lat, min_lon, max_lon)",
+    f"CREATE TRIGGER IF NOT EXISTS project_rtree_ai AFTER INSERT ON projects BEGIN "
+    f"INSERT INTO project_rtree SELECT {_new_point} WHERE {_has_point}; END",
+    "CREATE TRIGGER IF NOT EXISTS project_rtree_ad AFTER DELETE ON projects BEGIN "
+    "DELETE FROM project_rtree WHERE id = old.rowid; END",
+    f"CREATE TRIGGER IF NOT EXISTS project_rtree_au AFTER UPDATE OF latitude, longitude ON projects BEGIN "
+    f"DELETE FROM project_rtree WHERE id = old.rowid; "
+    f"INSERT INTO project_rtree SELECT {_new_point} WHERE {_has_point}; END",
+)
+
+
+def _postgis_enabled(ddl, target, bind, **kw) -> bool:
+    return bind.dialect.name == "postgresql" and settings.POSTGIS_ENABLED
+
+
+for statement in POSTGIS_DDL:
+    event.listen(Project.__table__, "after_create", DDL(statement).execute_if(callable_=_postgis_enabled))
+for statement in SQLITE_DDL:
+    event.listen(Project.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Project.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS project_rtree").execute_if(dialect="sqlite"),
+)
@@ -5,7 +5,10 @@ from .project import (
     ProjectUpdate,
     ProjectResponse,
     ProjectListResponse,
+    ProjectSummary,
+    ProjectSummaryListResponse,
     DashboardKPIs,
+    DashboardBundle,
     FilterOptions,
 )
 
@@ -19,6 +22,9 @@ __all__ = [
     "ProjectUpdate",
     "ProjectResponse",
     "ProjectListResponse",
+    "ProjectSummary",
+    "ProjectSummaryListResponse",
     "DashboardKPIs",
+    "DashboardBundle",
     "FilterOptions",
 ]
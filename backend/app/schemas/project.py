@@ -1,9 +1,18 @@
 from pydantic import BaseModel, EmailStr, HttpUrl, field_validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from uuid import UUID
 
 
+class ResponsiveImage(BaseModel):
+    """Schema for the variant of a project's first image that fits where it is shown"""
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    sources: Dict[str, str] = {}  # media type -> URL, e.g. image/avif
+    original_url: Optional[str] = None  # fallback if the variant fails to load
+
+
 class ProjectBase(BaseModel):
     """Base project schema with common fields"""
     project_name: str
@@ -107,6 +116,7 @@ class ProjectResponse(ProjectBase):
     funding_spent: float
     rejection_reason: Optional[str] = None
     reviewer_notes: Optional[str] = None
+    image: Optional[ResponsiveImage] = None
     created_at: datetime
     updated_at: datetime
 
@@ -116,11 +126,46 @@ class ProjectResponse(ProjectBase):
 class ProjectListResponse(BaseModel):
     """Schema for paginated project list"""
     total: int
+    total_is_approximate: bool = False
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
     projects: List[ProjectResponse]
 
 
+class ProjectSummary(BaseModel):
+    """Schema for a project in summary listings (view=summary)"""
+    id: UUID
+    project_name: str
+    organization_name: str
+    project_status: str
+    workflow_status: str
+    funding_needed: float
+    funding_spent: float
+    uia_region: str
+    city: str
+    country: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    typologies: List[str]
+    funding_requirements: List[str]
+    sdgs: List[int]
+    image_urls: List[str]
+    image: Optional[ResponsiveImage] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class ProjectSummaryListResponse(BaseModel):
+    """Schema for paginated summary project list"""
+    total: int
+    total_is_approximate: bool = False
+    page: int
+    page_size: int
+    next_cursor: Optional[str] = None
+    projects: List[ProjectSummary]
+
+
 class DashboardKPIs(BaseModel):
     """Schema for dashboard KPI metrics"""
     total_projects: int
@@ -130,6 +175,16 @@ class DashboardKPIs(BaseModel):
     total_funding_spent: float
 
 
+class DashboardBundle(BaseModel):
+    """Schema for the combined dashboard payload"""
+    filters: dict
+    kpis: DashboardKPIs
+    map_markers: List[dict]
+    sdg_distribution: List[dict]
+    regional_distribution: List[dict]
+    typology_distribution: List[dict]
+
+
 class FilterOptions(BaseModel):
     """Schema for dashboard filter options"""
     region: Optional[str] = None
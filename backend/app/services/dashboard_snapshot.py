@@ -0,0 +1,580 @@
+"""
+In-memory snapshot of approved projects for the public dashboard.
+
+The approved dataset only changes when an admin acts, so each worker keeps a
+read-optimized copy of it: columnar lists indexed by slot, plus bitmaps
+(Python ints, one bit per slot) per SDG, region, city, funding source and
+typology. Dashboard filters are answered by intersecting bitmaps, without
+touching the database; only a text search asks the full-text index for the
+matching ids first. A grid cluster index over the coordinates serves the
+zoom-aware map clusters the same way.
+
+The admin workflow endpoints keep the snapshot current by upserting or
+removing single projects. Every request compares the snapshot with the
+dataset version in the database, so other workers rebuild as soon as they
+fall behind; DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS additionally bounds the age
+of a copy. A rebuild loads the rows on the request's async connection
+(AsyncSession.run_sync), then builds the indexes and formatted records in a
+worker thread and swaps them in under the lock, so the event loop keeps
+serving requests meanwhile (sharing the GIL with the build). Incremental
+updates and queries run on the loop: they touch one project or walk
+bitmaps. Output ordering and float sums do not depend on slot layout, so
+two workers at the same version return identical bodies (and ETags).
+"""
+import asyncio
+import logging
+import math
+from datetime import datetime
+import threading
+from bisect import bisect_left, bisect_right
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import get_db
+from ..core.loading import SUMMARY_FIELDS, project_loading_options
+from ..models.project import Project, WorkflowStatus
+from .dataset_version import DatasetState, get_dataset_version
+from .image_variants import MARKER_IMAGE_WIDTH, image_for_width, primary_image
+from .map_clusters import MAX_CLUSTER_ZOOM, ClusterIndex
+from .spatial import BoundingBox, in_bbox
+
+logger = logging.getLogger(__name__)
+
+
+def iter_slots(mask: int) -> Iterator[int]:
+    """Yield the slot numbers of the bits set in a bitmap"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _index_add(index: Dict, key, bit: int) -> None:
+    if key is None:
+        return
+    index[key] = index.get(key, 0) | bit
+
+
+def _index_remove(index: Dict, key, bit: int) -> None:
+    if key not in index:
+        return
+    remaining = index[key] & ~bit
+    if remaining:
+        index[key] = remaining
+    else:
+        del index[key]
+
+
+class DashboardSnapshot:
+    """Columnar, bitmap-indexed view of all approved projects"""
+
+    # Columns kept per slot, in addition to the summary response record
+    COLUMNS = (
+        "id", "project_name", "city", "country", "latitude", "longitude",
+        "region", "status", "funding_needed", "funding_spent", "created_at",
+        "sdgs", "typologies", "funding_sources", "image", "record",
+    )
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loaded_at: Optional[float] = None
+        # Dataset version and modification time the snapshot reflects
+        self.version: Optional[int] = None
+        self.modified_at: Optional[datetime] = None
+        self._clear()
+
+    def _clear(self) -> None:
+        self.columns: Dict[str, List] = {name: [] for name in self.COLUMNS}
+        self.slot_by_id: Dict[UUID, int] = {}
+        self.free_slots: List[int] = []
+        self.live = 0
+        self.with_coordinates = 0
+        self.by_sdg: Dict[int, int] = {}
+        self.by_region: Dict[str, int] = {}
+        self.by_city: Dict[str, int] = {}
+        self.by_funding: Dict[str, int] = {}
+        self.by_typology: Dict[str, int] = {}
+        self.clusters = ClusterIndex()
+        # Ascending (sort key, slot) orders per sort column, built on demand
+        self._orders: Dict[str, Tuple[List[tuple], List[int]]] = {}
+
+    # ------------------------------------------------------------------
+    # Loading and incremental maintenance
+    # ------------------------------------------------------------------
+
+    @property
+    def is_stale(self) -> bool:
+        if self.loaded_at is None:
+            return True
+        max_age = settings.DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS
+        return max_age > 0 and time.monotonic() - self.loaded_at > max_age
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        """Build the snapshot on first use, once it has expired or when the dataset changed"""
+        version, modified_at = await db.run_sync(get_dataset_version)
+        if not self.is_stale and self.version == version:
+            return
+        projects = await db.run_sync(self.load_projects)
+        # Concurrent first requests may each build one; the newest version wins
+        built = await asyncio.get_running_loop().run_in_executor(
+            None, self.build, projects, version, modified_at
+        )
+        self._adopt(built)
+        logger.info(f"Dashboard snapshot built with {len(projects)} approved projects")
+
+    def rebuild(
+        self,
+        db: Session,
+        version: Optional[int] = None,
+        modified_at: Optional[datetime] = None,
+    ) -> None:
+        """Load every approved project from the database, in the calling thread"""
+        if version is None:
+            version, modified_at = get_dataset_version(db)
+        projects = self.load_projects(db)
+        self._adopt(self.build(projects, version, modified_at))
+        logger.info(f"Dashboard snapshot built with {len(projects)} approved projects")
+
+    @staticmethod
+    def load_projects(db: Session) -> List[Project]:
+        """The approved projects with everything the snapshot reads"""
+        # Summary columns only: long texts and contact details are never read
+        return db.query(Project).options(*project_loading_options(SUMMARY_FIELDS))\
+            .filter(Project.workflow_status == WorkflowStatus.APPROVED).all()
+
+    @classmethod
+    def build(
+        cls,
+        projects: List[Project],
+        version: Optional[int],
+        modified_at: Optional[datetime],
+    ) -> "DashboardSnapshot":
+        """A new snapshot of loaded projects; CPU work only, so it can run off the event loop"""
+        snapshot = cls()
+        for project in projects:
+            snapshot._add(project)
+        snapshot.loaded_at = time.monotonic()
+        snapshot.version = version
+        snapshot.modified_at = modified_at
+        return snapshot
+
+    def _adopt(self, built: "DashboardSnapshot") -> None:
+        """Take over the indexes of a snapshot built elsewhere, unless this one is newer"""
+        with self._lock:
+            if self.loaded_at is not None and self.version is not None and self.version > built.version:
+                return
+            state = dict(vars(built))
+            del state["_lock"]
+            vars(self).update(state)
+
+    def invalidate(self) -> None:
+        """Drop the snapshot so the next request rebuilds it"""
+        with self._lock:
+            self._clear()
+            self.loaded_at = None
+            self.version = None
+            self.modified_at = None
+
+    def sync_project(self, project: Project, version: Optional[DatasetState] = None) -> None:
+        """Reflect the current state of a single project, committed as the given dataset version"""
+        with self._lock:
+            if self.loaded_at is None:
+                return
+            self._remove(project.id)
+            if project.workflow_status == WorkflowStatus.APPROVED:
+                self._add(project)
+            self._advance(version)
+
+    def remove(self, project_id: UUID, version: Optional[DatasetState] = None) -> None:
+        """Drop a single project, e.g. after it was deleted"""
+        with self._lock:
+            if self.loaded_at is None:
+                return
+            self._remove(project_id)
+            self._advance(version)
+
+    def _advance(self, version: Optional[DatasetState]) -> None:
+        if version is None:
+            return
+        if self.version is not None and version.version == self.version + 1:
+            # The time stored with the version, so all workers send the same Last-Modified
+            self.version, self.modified_at = version
+        else:
+            # Another worker changed the dataset in between; rebuild on next use
+            self.loaded_at = None
+
+    def _add(self, project: Project) -> None:
+        from ..api.projects import _format_project_response
+
+        self._orders.clear()
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.columns["id"])
+            for values in self.columns.values():
+                values.append(None)
+        bit = 1 << slot
+
+        region = project.uia_region.value if project.uia_region else None
+        funding_sources = tuple(
+            r.requirement for r in project.requirements if r.requirement_type == 'funding'
+        )
+        row = {
+            "id": project.id,
+            "project_name": project.project_name,
+            "city": project.city,
+            "country": project.country,
+            "latitude": project.latitude,
+            "longitude": project.longitude,
+            "region": region,
+            "status": project.project_status.value if project.project_status else None,
+            "funding_needed": float(project.funding_needed or 0.0),
+            "funding_spent": float(project.funding_spent or 0.0),
+            "created_at": project.created_at,
+            "sdgs": tuple(sorted(s.sdg_number for s in project.sdgs)),
+            "typologies": tuple(t.typology for t in project.typologies),
+            "funding_sources": funding_sources,
+            # Popups show the smallest variant wider than the popup
+            "image": image_for_width(primary_image(project), MARKER_IMAGE_WIDTH),
+            "record": _format_project_response(project, SUMMARY_FIELDS),
+        }
+        for name, value in row.items():
+            self.columns[name][slot] = value
+
+        self.slot_by_id[project.id] = slot
+        self.live |= bit
+        if project.latitude is not None and project.longitude is not None:
+            self.with_coordinates |= bit
+            self.clusters.add(slot, project.latitude, project.longitude)
+        _index_add(self.by_region, region, bit)
+        _index_add(self.by_city, project.city, bit)
+        for sdg in row["sdgs"]:
+            _index_add(self.by_sdg, sdg, bit)
+        for source in set(funding_sources):
+            _index_add(self.by_funding, source, bit)
+        for typology in set(row["typologies"]):
+            _index_add(self.by_typology, typology, bit)
+
+    def _remove(self, project_id: UUID) -> None:
+        slot = self.slot_by_id.pop(project_id, None)
+        if slot is None:
+            return
+        bit = 1 << slot
+        columns = self.columns
+
+        self._orders.clear()
+        self.live &= ~bit
+        if self.with_coordinates & bit:
+            self.clusters.remove(slot, columns["latitude"][slot], columns["longitude"][slot])
+        self.with_coordinates &= ~bit
+        _index_remove(self.by_region, columns["region"][slot], bit)
+        _index_remove(self.by_city, columns["city"][slot], bit)
+        for sdg in columns["sdgs"][slot]:
+            _index_remove(self.by_sdg, sdg, bit)
+        for source in set(columns["funding_sources"][slot]):
+            _index_remove(self.by_funding, source, bit)
+        for typology in set(columns["typologies"][slot]):
+            _index_remove(self.by_typology, typology, bit)
+
+        for values in columns.values():
+            values[slot] = None
+        self.free_slots.append(slot)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def filter_masks(
+        self,
+        region: Optional[str] = None,
+        sdg: Optional[int] = None,
+        city: Optional[str] = None,
+        funded_by: Optional[str] = None,
+        matches: Optional[Dict[UUID, float]] = None,
+        bbox: Optional[BoundingBox] = None,
+    ) -> Dict[str, int]:
+        """
+        Return one bitmap per active dashboard filter
+
+        Search is resolved by the full-text index beforehand and passed in as
+        matches, the ids of the matching projects.
+        """
+        with self._lock:
+            masks = {}
+            if region and region != "All Regions":
+                masks["region"] = self.by_region.get(region, 0)
+            if city and city != "All Cities":
+                masks["city"] = self.by_city.get(city, 0)
+            if sdg:
+                masks["sdg"] = self.by_sdg.get(sdg, 0)
+            if funded_by and funded_by != "All":
+                masks["funded_by"] = self.by_funding.get(funded_by, 0)
+            if matches is not None:
+                bits = 0
+                for project_id in matches:
+                    slot = self.slot_by_id.get(project_id)
+                    if slot is not None:
+                        bits |= 1 << slot
+                masks["search"] = bits
+            if bbox is not None:
+                masks["bbox"] = self.in_bbox(bbox)
+            return masks
+
+    def in_bbox(self, bbox: BoundingBox) -> int:
+        """Return the bitmap of projects located inside a bounding box"""
+        west, south, east, north = bbox
+        # Pick the grid level where the box spans a few cells, then check
+        # the coordinates of the candidates in those cells
+        width = (east - west) % 360 or 360
+        zoom = int(math.log2(360 / max(width, north - south, 1e-9)))
+        zoom = max(0, min(MAX_CLUSTER_ZOOM, zoom))
+        with self._lock:
+            candidates = 0
+            for _, bits in self.clusters.cells_in_view(zoom, west, south, east, north):
+                candidates |= bits
+            latitudes, longitudes = self.columns["latitude"], self.columns["longitude"]
+            mask = 0
+            for slot in iter_slots(candidates):
+                if in_bbox(latitudes[slot], longitudes[slot], bbox):
+                    mask |= 1 << slot
+            return mask
+
+    def combine(self, masks: Dict[str, int], ignore: Optional[str] = None) -> int:
+        """Intersect filter bitmaps, optionally leaving one filter out"""
+        mask = self.live
+        for name, bits in masks.items():
+            if name != ignore:
+                mask &= bits
+        return mask
+
+    def select(self, **filters) -> int:
+        """Return the bitmap of projects matching the dashboard filters"""
+        return self.combine(self.filter_masks(**filters))
+
+    def filter_options(self) -> dict:
+        with self._lock:
+            return {
+                "cities": sorted(c for c in self.by_city if c),
+                "funding_sources": sorted(f for f in self.by_funding if f),
+            }
+
+    def kpis(self, mask: int) -> dict:
+        with self._lock:
+            columns = self.columns
+            slots = list(iter_slots(mask))
+            return {
+                "total_projects": len(slots),
+                "cities_engaged": sum(1 for bits in self.by_city.values() if bits & mask),
+                "countries_represented": len({columns["country"][slot] for slot in slots}),
+                "total_funding_needed": math.fsum(columns["funding_needed"][slot] for slot in slots),
+                "total_funding_spent": math.fsum(columns["funding_spent"][slot] for slot in slots),
+            }
+
+    def sdg_distribution(self, mask: int) -> List[dict]:
+        with self._lock:
+            counts = ((sdg, bin(bits & mask).count("1")) for sdg, bits in self.by_sdg.items())
+            return [{"sdg": sdg, "count": count} for sdg, count in sorted(counts) if count]
+
+    def regional_distribution(self, mask: int) -> List[dict]:
+        with self._lock:
+            funding_needed = self.columns["funding_needed"]
+            result = []
+            for region in sorted(self.by_region):
+                bits = self.by_region[region] & mask
+                if not bits:
+                    continue
+                result.append({
+                    "region": region,
+                    "project_count": bin(bits).count("1"),
+                    "funding_needed": math.fsum(funding_needed[slot] for slot in iter_slots(bits)),
+                })
+            return result
+
+    def typology_distribution(self, mask: int) -> List[dict]:
+        with self._lock:
+            counts = [
+                (typology, bin(bits & mask).count("1"))
+                for typology, bits in self.by_typology.items()
+            ]
+            counts.sort(key=lambda item: (-item[1], item[0]))
+            return [{"typology": typology, "count": count} for typology, count in counts if count]
+
+    def _marker(self, slot: int) -> dict:
+        columns = self.columns
+        return {
+            "id": str(columns["id"][slot]),
+            "project_name": columns["project_name"][slot],
+            "city": columns["city"][slot],
+            "country": columns["country"][slot],
+            "latitude": columns["latitude"][slot],
+            "longitude": columns["longitude"][slot],
+            "region": columns["region"][slot],
+            "status": columns["status"][slot],
+            "funding_needed": columns["funding_needed"][slot],
+            "primary_sdg": columns["sdgs"][slot][0] if columns["sdgs"][slot] else None,
+            "image_url": columns["image"][slot]["url"] if columns["image"][slot] else None,
+            "image": columns["image"][slot],
+        }
+
+    def _markers(self, mask: int) -> List[dict]:
+        """Markers for the slots in a bitmap, ordered by project id"""
+        markers = [self._marker(slot) for slot in iter_slots(mask)]
+        markers.sort(key=lambda marker: marker["id"])
+        return markers
+
+    def markers(self, mask: int) -> List[dict]:
+        with self._lock:
+            return self._markers(mask & self.with_coordinates)
+
+    def _most_common(self, index: Dict, bits: int):
+        """Return the index key shared by most of the given slots"""
+        best, best_count = None, 0
+        for key in sorted(index):
+            count = bin(index[key] & bits).count("1")
+            if count > best_count:
+                best, best_count = key, count
+        return best
+
+    def clusters_in_view(
+        self,
+        mask: int,
+        zoom: int,
+        bbox: BoundingBox,
+    ) -> dict:
+        """
+        Return map clusters and single markers inside a bounding box.
+
+        Up to MAX_CLUSTER_ZOOM the precomputed grid cells are intersected with
+        the filter bitmap: cells with several matching projects become a
+        cluster at their members' mean position, cells with one become a
+        plain marker. Above it every matching marker in the box is returned.
+        """
+        with self._lock:
+            columns = self.columns
+            mask &= self.with_coordinates
+            clusters, singles = [], 0
+            west, south, east, north = bbox
+
+            if zoom > MAX_CLUSTER_ZOOM:
+                markers = self._markers(mask & self.in_bbox(bbox))
+                return {"zoom": zoom, "clusters": [], "markers": markers}
+
+            for (x, y), bits in self.clusters.cells_in_view(zoom, west, south, east, north):
+                bits &= mask
+                if not bits:
+                    continue
+                count = bin(bits).count("1")
+                if count == 1:
+                    singles |= bits
+                    continue
+                slots = list(iter_slots(bits))
+                clusters.append({
+                    "id": f"{zoom}/{x}/{y}",
+                    "latitude": math.fsum(columns["latitude"][slot] for slot in slots) / count,
+                    "longitude": math.fsum(columns["longitude"][slot] for slot in slots) / count,
+                    "count": count,
+                    "primary_sdg": self._most_common(self.by_sdg, bits),
+                    "region": self._most_common(self.by_region, bits),
+                })
+
+            clusters.sort(key=lambda cluster: (-cluster["count"], cluster["id"]))
+            return {"zoom": zoom, "clusters": clusters, "markers": self._markers(singles)}
+
+    def bundle(self, **filters) -> dict:
+        """
+        Compute every dashboard aggregate from a single evaluation of the filters.
+
+        As with the individual endpoints, each distribution ignores the filter
+        on its own dimension (and the typology chart ignores the city filter).
+        """
+        with self._lock:
+            masks = self.filter_masks(**filters)
+            mask = self.combine(masks)
+            return {
+                "filters": self.filter_options(),
+                "kpis": self.kpis(mask),
+                "map_markers": self.markers(mask),
+                "sdg_distribution": self.sdg_distribution(self.combine(masks, ignore="sdg")),
+                "regional_distribution": self.regional_distribution(self.combine(masks, ignore="region")),
+                "typology_distribution": self.typology_distribution(self.combine(masks, ignore="city")),
+            }
+
+    def _order(
+        self, sort_by: str, ranks: Optional[Dict[UUID, float]] = None
+    ) -> Tuple[List[tuple], List[int]]:
+        if sort_by == "relevance":
+            ids = self.columns["id"]
+            keyed = sorted(
+                ((ranks.get(ids[slot], 0.0), str(ids[slot])), slot)
+                for slot in iter_slots(self.live)
+            )
+            return [key for key, _ in keyed], [slot for _, slot in keyed]
+
+        order = self._orders.get(sort_by)
+        if order is None:
+            values = self.columns[sort_by]
+            ids = self.columns["id"]
+            keyed = sorted(
+                ((values[slot], str(ids[slot])), slot) for slot in iter_slots(self.live)
+            )
+            order = ([key for key, _ in keyed], [slot for _, slot in keyed])
+            self._orders[sort_by] = order
+        return order
+
+    def page(
+        self,
+        mask: int,
+        sort_by: str,
+        sort_order: str,
+        limit: int,
+        offset: int = 0,
+        after: Optional[Tuple[Any, str]] = None,
+        ranks: Optional[Dict[UUID, float]] = None,
+    ) -> Tuple[List[dict], Optional[tuple]]:
+        """
+        Return summary records (SUMMARY_FIELDS) for one page of the listing.
+
+        Pages start after the (sort value, id) key of a cursor, or at an
+        offset. Sorting by relevance orders by the search ranks. The second
+        item is the key of the last record when another page follows,
+        otherwise None.
+        """
+        with self._lock:
+            keys, slots = self._order(sort_by, ranks)
+            if sort_order == "asc":
+                start = bisect_right(keys, after) if after else 0
+                positions = range(start, len(slots))
+            else:
+                start = bisect_left(keys, after) if after else len(slots)
+                positions = range(start - 1, -1, -1)
+
+            picked = []
+            for position in positions:
+                if not (mask >> slots[position]) & 1:
+                    continue
+                if offset:
+                    offset -= 1
+                    continue
+                picked.append(position)
+                if len(picked) > limit:
+                    break
+
+            records = self.columns["record"]
+            next_key = keys[picked[limit - 1]] if len(picked) > limit else None
+            return [records[slots[position]] for position in picked[:limit]], next_key
+
+
+# One snapshot per worker process
+dashboard_snapshot = DashboardSnapshot()
+
+
+async def get_dashboard_snapshot(db: AsyncSession = Depends(get_db)) -> DashboardSnapshot:
+    """Dependency returning the loaded dashboard snapshot"""
+    await dashboard_snapshot.ensure_loaded(db)
+    return dashboard_snapshot
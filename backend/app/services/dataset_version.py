@@ -0,0 +1,48 @@
+"""
+Version counter of the public dataset.
+
+Every workflow transition and every edit of an approved project bumps the
+version in the same transaction as the change. Readers compare it with what
+they have cached: the dashboard snapshot rebuilds when it falls behind, and
+the public endpoints derive their ETags and Last-Modified from it.
+"""
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy.orm import Session
+from ..models.dataset import DatasetVersion
+
+DATASET_VERSION_ID = 1
+
+
+class DatasetState(NamedTuple):
+    """A dataset version and when it was made, as stored in dataset_version"""
+    version: int
+    modified_at: Optional[datetime]
+
+
+def get_dataset_version(db: Session) -> DatasetState:
+    """Return the current (version, last modified) of the public dataset"""
+    row = db.query(DatasetVersion.version, DatasetVersion.updated_at)\
+        .filter(DatasetVersion.id == DATASET_VERSION_ID).first()
+    if not row:
+        return DatasetState(0, None)
+    return DatasetState(row.version, row.updated_at)
+
+
+def bump_dataset_version(db: Session) -> DatasetState:
+    """Increment the version as part of the current transaction and return the new state
+
+    The modification time is read back from the row, so every worker
+    reports the same Last-Modified for a version.
+    """
+    now = datetime.utcnow()
+    updated = db.query(DatasetVersion)\
+        .filter(DatasetVersion.id == DATASET_VERSION_ID)\
+        .update(
+            {DatasetVersion.version: DatasetVersion.version + 1, DatasetVersion.updated_at: now},
+            synchronize_session=False
+        )
+    if not updated:
+        db.add(DatasetVersion(id=DATASET_VERSION_ID, version=1, updated_at=now))
+        db.flush()
+    return get_dataset_version(db)
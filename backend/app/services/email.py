@@ -1,37 +1,37 @@
-import aiosmtplib
+"""
+Notification emails.
+
+The queue_* functions add the email to the outbox in the caller's session,
+so it is committed together with the workflow change it reports (or not at
+all); the outbox worker (app/services/email_outbox.py) delivers it after the
+response. Nothing here talks to the SMTP server.
+"""
 from email.message import EmailMessage
 from ..core.config import settings
-import logging
+from ..models.email import EmailOutbox
+
 
-logger = logging.getLogger(__name__)
+def smtp_configured() -> bool:
+    return bool(settings.SMTP_HOST) and settings.SMTP_HOST != "smtp.example.com"
 
-async def send_email(to_email: str, subject: str, html_content: str):
-    """Send an email using SMTP settings"""
-    if not settings.SMTP_HOST or settings.SMTP_HOST == "smtp.example.com":
-        logger.warning(f"SMTP not configured (HOST={settings.SMTP_HOST}). Email to {to_email} suppressed.")
-        return
 
+def build_message(email: EmailOutbox) -> EmailMessage:
+    """The MIME message of an outbox email"""
     message = EmailMessage()
     message["From"] = f"{settings.SMTP_FROM_NAME} <{settings.SMTP_FROM_EMAIL}>"
-    message["To"] = to_email
-    message["Subject"] = subject
-    message.set_content(html_content, subtype="html")
+    message["To"] = email.to_email
+    message["Subject"] = email.subject
+    message.set_content(email.html_content, subtype="html")
+    return message
+
 
-    try:
-        await aiosmtplib.send(
-            message,
-            hostname=settings.SMTP_HOST,
-            port=settings.SMTP_PORT,
-            username=settings.SMTP_USER,
-            password=settings.SMTP_PASSWORD,
-            use_tls=True if settings.SMTP_PORT == 465 else False,
-            start_tls=True if settings.SMTP_PORT == 587 else False,
-        )
-        logger.info(f"Email sent to {to_email}")
-    except Exception as e:
-        logger.error(f"Failed to send email to {to_email}: {str(e)}")
+def queue_email(db, to_email: str, subject: str, html_content: str) -> EmailOutbox:
+    """Add an email to the outbox of the current transaction (sync or async session)"""
+    email = EmailOutbox(to_email=to_email, subject=subject, html_content=html_content)
+    db.add(email)
+    return email
 
-async def send_changes_requested_email(to_email: str, project_name: str, edit_link: str, notes: str):
+def queue_changes_requested_email(db, to_email: str, project_name: str, edit_link: str, notes: str):
     subject = f"Action Required: Update your submission for {project_name}"
     content = f"""
     <html>
@@ -52,9 +52,9 @@ async def send_changes_requested_email(to_email: str, project_name: str, edit_li
     </body>
     </html>
     """
-    await send_email(to_email, subject, content)
+    return queue_email(db, to_email, subject, content)
 
-async def send_approval_email(to_email: str, project_name: str, public_link: str):
+def queue_approval_email(db, to_email: str, project_name: str, public_link: str):
     subject = f"Your project {project_name} has been published!"
     content = f"""
     <html>
@@ -67,9 +67,9 @@ async def send_approval_email(to_email: str, project_name: str, public_link: str
     </body>
     </html>
     """
-    await send_email(to_email, subject, content)
+    return queue_email(db, to_email, subject, content)
 
-async def send_rejection_email(to_email: str, project_name: str, reason: str):
+def queue_rejection_email(db, to_email: str, project_name: str, reason: str):
     subject = f"Update on your submission for {project_name}"
     content = f"""
     <html>
@@ -81,9 +81,9 @@ async def send_rejection_email(to_email: str, project_name: str, reason: str):
     </body>
     </html>
     """
-    await send_email(to_email, subject, content)
+    return queue_email(db, to_email, subject, content)
 
-async def send_submission_notification(admin_email: str, project_name: str, review_link: str):
+def queue_submission_notification(db, admin_email: str, project_name: str, review_link: str):
     subject = f"New Project Submission: {project_name}"
     content = f"""
     <html>
@@ -96,4 +96,4 @@ async def send_submission_notification(admin_email: str, project_name: str, revi
     </body>
     </html>
     """
-    await send_email(admin_email, subject, content)
+    return queue_email(db, admin_email, subject, content)
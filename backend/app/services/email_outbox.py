@@ -0,0 +1,224 @@
+"""
+Background delivery of the email outbox.
+
+Routers queue emails in the transaction of the workflow change they report
+(app/services/email.py) and wake the worker after the commit. The worker
+claims due emails in batches of EMAIL_OUTBOX_BATCH_SIZE, sends them over one
+SMTP connection that stays open between batches (closed after
+EMAIL_SMTP_IDLE_SECONDS without use), and records the outcome:
+
+- sent: status SENT
+- temporary failure (connection errors, 4xx replies): retried after an
+  exponential backoff from EMAIL_RETRY_BASE_SECONDS up to
+  EMAIL_RETRY_MAX_SECONDS, until EMAIL_MAX_ATTEMPTS
+- permanent failure (5xx replies) or attempts exhausted: status FAILED
+
+Claiming pushes next_attempt_at ahead by EMAIL_OUTBOX_LEASE_SECONDS (and
+skips rows locked by another worker on PostgreSQL), so each email is sent
+by one worker at a time, and an email whose worker died is picked up again
+once the lease runs out. Delivery is at least once.
+
+On shutdown the worker keeps sending what is due for up to
+EMAIL_OUTBOX_DRAIN_SECONDS before closing the connection.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import aiosmtplib
+from sqlalchemy import select, update
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models.email import EmailOutbox, EmailStatus
+from .email import build_message
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the attempt following `attempts` failed ones"""
+    seconds = settings.EMAIL_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.EMAIL_RETRY_MAX_SECONDS))
+
+
+def is_permanent(error: Exception) -> bool:
+    """5xx replies will not succeed on retry"""
+    return isinstance(error, aiosmtplib.SMTPResponseException) and 500 <= error.code < 600
+
+
+class EmailOutboxWorker:
+    """Sends outbox emails in the background over a reused SMTP connection"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._last_used = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info("Email outbox worker started")
+
+    def wake(self) -> None:
+        """Check for due emails now rather than at the next poll"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def stop(self) -> None:
+        """Send what is due (within EMAIL_OUTBOX_DRAIN_SECONDS), then close the connection"""
+        if not self.running:
+            return
+        self._stopping = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._task, settings.EMAIL_OUTBOX_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Email outbox not drained before shutdown; the rest is sent on restart")
+        self._task = None
+        self._wake = None
+        await self._close()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                claimed = await self.process_batch()
+            except Exception:
+                logger.exception("Email outbox batch failed")
+                claimed = 0
+            if claimed >= settings.EMAIL_OUTBOX_BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.EMAIL_OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+        try:
+            await self.drain()
+        except Exception:
+            logger.exception("Email outbox drain failed")
+
+    async def drain(self) -> int:
+        """Send batches until nothing is due; returns the number of emails handled"""
+        handled = 0
+        while True:
+            claimed = await self.process_batch()
+            handled += claimed
+            if claimed < settings.EMAIL_OUTBOX_BATCH_SIZE:
+                return handled
+
+    async def process_batch(self) -> int:
+        """Claim up to EMAIL_OUTBOX_BATCH_SIZE due emails, send them and record the outcome"""
+        emails = await self._claim()
+        if not emails:
+            return 0
+        results = []
+        for email in emails:
+            results.append((email, await self._send(email)))
+        await self._record(results)
+        return len(emails)
+
+    async def _claim(self) -> List[EmailOutbox]:
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            emails = (await db.scalars(
+                select(EmailOutbox)
+                .where(EmailOutbox.status == EmailStatus.PENDING, EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.id)
+                .limit(settings.EMAIL_OUTBOX_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )).all()
+            for email in emails:
+                email.attempts += 1
+                email.next_attempt_at = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+            await db.commit()
+        return list(emails)
+
+    async def _send(self, email: EmailOutbox) -> Optional[Exception]:
+        """Send one email; returns the error, if any"""
+        message = build_message(email)
+        for attempt in (1, 2):
+            reused = self._smtp is not None
+            try:
+                smtp = await self._connection()
+                await smtp.send_message(message)
+                self._last_used = time.monotonic()
+                logger.info(f"Email {email.id} sent to {email.to_email}")
+                return None
+            except (aiosmtplib.SMTPServerDisconnected, ConnectionError) as error:
+                await self._close()
+                # The server may have dropped an idle connection: reconnect once
+                if reused and attempt == 1:
+                    continue
+                return error
+            except Exception as error:
+                if not isinstance(error, aiosmtplib.SMTPResponseException):
+                    await self._close()
+                return error
+
+    async def _record(self, results: List[Tuple[EmailOutbox, Optional[Exception]]]) -> None:
+        now = datetime.utcnow()
+        sent = [email.id for email, error in results if error is None]
+        async with AsyncSessionLocal() as db:
+            if sent:
+                await db.execute(
+                    update(EmailOutbox).where(EmailOutbox.id.in_(sent))
+                    .values(status=EmailStatus.SENT, sent_at=now, last_error=None)
+                )
+            for email, error in results:
+                if error is None:
+                    continue
+                values = {"last_error": f"{type(error).__name__}: {error}"[:2000]}
+                if is_permanent(error) or email.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+                    values["status"] = EmailStatus.FAILED
+                    logger.error(f"Email {email.id} to {email.to_email} failed for good: {error}")
+                else:
+                    values["next_attempt_at"] = now + retry_delay(email.attempts)
+                    logger.warning(
+                        f"Email {email.id} to {email.to_email} failed (attempt {email.attempts}), "
+                        f"retrying in {retry_delay(email.attempts).total_seconds():.0f}s: {error}"
+                    )
+                await db.execute(update(EmailOutbox).where(EmailOutbox.id == email.id).values(**values))
+            await db.commit()
+
+    async def _connection(self) -> aiosmtplib.SMTP:
+        """The open SMTP connection, or a new one if it is missing or idle for too long"""
+        idle = time.monotonic() - self._last_used
+        if self._smtp is not None and (not self._smtp.is_connected or idle > settings.EMAIL_SMTP_IDLE_SECONDS):
+            await self._close()
+        if self._smtp is None:
+            smtp = aiosmtplib.SMTP(
+                hostname=settings.SMTP_HOST,
+                port=settings.SMTP_PORT,
+                username=settings.SMTP_USER or None,
+                password=settings.SMTP_PASSWORD or None,
+                use_tls=settings.SMTP_PORT == 465,
+                start_tls=settings.SMTP_PORT == 587,
+                timeout=settings.EMAIL_SMTP_TIMEOUT_SECONDS,
+            )
+            await smtp.connect()
+            self._smtp = smtp
+        return self._smtp
+
+    async def _close(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            if smtp.is_connected:
+                await smtp.quit()
+        except Exception:
+            smtp.close()
+
+
+# One worker per process
+email_outbox = EmailOutboxWorker()
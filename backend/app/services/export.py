@@ -0,0 +1,266 @@
+"""
+Streaming export of the approved projects.
+
+The projects are read through a server-side cursor (AsyncSession.stream)
+EXPORT_CHUNK_SIZE at a time; each chunk loads its SDGs, typologies,
+requirements and images with one SELECT ... IN per child table, is
+encoded and handed on before the next one is fetched. Memory stays at one
+chunk however large the dataset is. Rows are read as plain tuples rather
+than ORM objects, which would cost more than the encoding, and formatted
+with the same labels as the listing endpoints.
+
+Formats:
+
+- csv: list fields joined with "; ", so the file can go back through
+  scripts/bulk_import.py
+- ndjson: one JSON object per line
+- geojson: a FeatureCollection of points (geometry null without coordinates)
+- parquet: one row group per chunk; needs pyarrow
+
+Over HTTP, CompressionMiddleware gzips (or brotli-encodes) the text formats
+chunk by chunk as they are sent; Parquet is compressed by its own codec.
+"""
+import csv
+import io
+from typing import AsyncIterator, Callable, Dict, List, Optional
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from ..core.config import settings
+from ..models.project import (
+    Project, ProjectImage, ProjectRequirement, ProjectSDG, ProjectTypology, WorkflowStatus
+)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional: no Parquet export
+    pyarrow = None
+
+# Public fields of a project, as the listing endpoints format them
+EXPORT_FIELDS = (
+    "id", "project_name", "organization_name", "contact_person", "contact_email",
+    "project_status", "funding_needed", "funding_spent", "uia_region", "city", "country",
+    "latitude", "longitude", "brief_description", "detailed_description", "success_factors",
+    "typologies", "funding_requirements", "government_requirements", "other_requirements",
+    "other_requirement_text", "sdgs", "image_urls", "created_at", "updated_at",
+)
+LIST_FIELDS = (
+    "typologies", "funding_requirements", "government_requirements", "other_requirements", "sdgs", "image_urls",
+)
+CSV_LIST_SEPARATOR = "; "
+
+
+class ExportUnavailable(RuntimeError):
+    """Raised when a format needs a package that is not installed"""
+
+
+class ExportFormat:
+    """Encodes chunks of formatted projects into the bytes of one file"""
+    media_type = "application/octet-stream"
+    extension = ""
+
+    def begin(self) -> bytes:
+        return b""
+
+    def encode(self, records: List[dict]) -> bytes:
+        raise NotImplementedError
+
+    def end(self) -> bytes:
+        return b""
+
+
+class CSVFormat(ExportFormat):
+    media_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def begin(self) -> bytes:
+        return self.encode_rows([EXPORT_FIELDS])
+
+    def encode(self, records: List[dict]) -> bytes:
+        return self.encode_rows([
+            [
+                CSV_LIST_SEPARATOR.join(str(item) for item in record[name]) if name in LIST_FIELDS
+                else "" if record[name] is None else record[name]
+                for name in EXPORT_FIELDS
+            ]
+            for record in records
+        ])
+
+    @staticmethod
+    def encode_rows(rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+
+class NDJSONFormat(ExportFormat):
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def encode(self, records: List[dict]) -> bytes:
+        return b"".join(orjson.dumps(record) + b"\n" for record in records)
+
+
+class GeoJSONFormat(ExportFormat):
+    media_type = "application/geo+json"
+    extension = "geojson"
+
+    def __init__(self):
+        self.first = True
+
+    def begin(self) -> bytes:
+        return b'{"type":"FeatureCollection","features":['
+
+    def encode(self, records: List[dict]) -> bytes:
+        features = b",".join(orjson.dumps(self.feature(record)) for record in records)
+        if features and not self.first:
+            features = b"," + features
+        self.first = self.first and not features
+        return features
+
+    def end(self) -> bytes:
+        return b"]}"
+
+    @staticmethod
+    def feature(record: dict) -> dict:
+        properties = {name: value for name, value in record.items() if name not in ("latitude", "longitude")}
+        geometry = None
+        if record["latitude"] is not None and record["longitude"] is not None:
+            geometry = {"type": "Point", "coordinates": [record["longitude"], record["latitude"]]}
+        return {"type": "Feature", "id": str(record["id"]), "geometry": geometry, "properties": properties}
+
+
+class _ParquetSink:
+    """Write-only file object handing on what the Parquet writer wrote so far"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+class ParquetFormat(ExportFormat):
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self):
+        if pyarrow is None:
+            raise ExportUnavailable("Parquet export needs pyarrow (pip install pyarrow)")
+        text, number = pyarrow.string(), pyarrow.float64()
+        types = {
+            "funding_needed": number, "funding_spent": number, "latitude": number, "longitude": number,
+            "sdgs": pyarrow.list_(pyarrow.int8()),
+            "created_at": pyarrow.timestamp("us"), "updated_at": pyarrow.timestamp("us"),
+        }
+        types.update((name, pyarrow.list_(text)) for name in LIST_FIELDS if name not in types)
+        self.schema = pyarrow.schema([(name, types.get(name, text)) for name in EXPORT_FIELDS])
+        self.sink = _ParquetSink()
+        self.writer = pyarrow.parquet.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+    def encode(self, records: List[dict]) -> bytes:
+        if records:
+            rows = [{**record, "id": str(record["id"])} for record in records]
+            self.writer.write_table(pyarrow.Table.from_pylist(rows, schema=self.schema))
+        return self.sink.take()
+
+    def end(self) -> bytes:
+        self.writer.close()
+        return self.sink.take()
+
+
+EXPORT_FORMATS: Dict[str, type] = {
+    "csv": CSVFormat,
+    "ndjson": NDJSONFormat,
+    "geojson": GeoJSONFormat,
+    "parquet": ParquetFormat,
+}
+
+
+# Columns read from the projects table, and how children become list fields
+PROJECT_COLUMNS = tuple(name for name in EXPORT_FIELDS if name in Project.__table__.c)
+CHILD_LISTS = (
+    (ProjectSDG, ProjectSDG.sdg_number, None, ("sdgs",)),
+    (ProjectTypology, ProjectTypology.typology, None, ("typologies",)),
+    (ProjectRequirement, ProjectRequirement.requirement, ProjectRequirement.requirement_type,
+     ("funding_requirements", "government_requirements", "other_requirements")),
+    (ProjectImage, ProjectImage.image_url, None, ("image_urls",)),
+)
+
+
+def _record(row, status_labels: Dict[str, str], region_labels: Dict[str, str]) -> dict:
+    """A project row formatted as the listing endpoints format it"""
+    record = dict(row._mapping)
+    record["project_status"] = status_labels.get(row.project_status.value, row.project_status.value)
+    record["uia_region"] = region_labels.get(row.uia_region.value, row.uia_region.value)
+    for _, _, _, fields in CHILD_LISTS:
+        for name in fields:
+            record[name] = []
+    return record
+
+
+async def _add_children(db, records: Dict[object, dict]) -> None:
+    """Fill in the list fields of a chunk of projects, one SELECT per child table"""
+    ids = list(records)
+    for model, value, kind, fields in CHILD_LISTS:
+        statement = select(model.project_id, value, *([kind] if kind is not None else []))\
+            .where(model.project_id.in_(ids))
+        if model is ProjectImage:
+            statement = statement.order_by(model.project_id, model.display_order)
+        for row in await db.execute(statement):
+            name = fields[0] if kind is None else f"{row[2]}_requirements"
+            records[row[0]][name].append(row[1])
+
+
+async def export_projects(
+    session_factory: async_sessionmaker,
+    export_format: ExportFormat,
+    chunk_size: Optional[int] = None,
+    on_chunk: Optional[Callable[[int], None]] = None,
+) -> AsyncIterator[bytes]:
+    """Stream the approved projects encoded in export_format, chunk by chunk"""
+    from ..api.projects import REGION_LABELS, STATUS_LABELS
+
+    header = export_format.begin()
+    if header:
+        yield header
+    statement = (
+        select(*(Project.__table__.c[name] for name in PROJECT_COLUMNS))
+        .where(Project.workflow_status == WorkflowStatus.APPROVED)
+        .order_by(Project.created_at, Project.id)
+        # A server-side cursor, fetched chunk_size rows at a time
+        .execution_options(yield_per=chunk_size or settings.EXPORT_CHUNK_SIZE)
+    )
+    async with session_factory() as db:
+        # Plain rows rather than ORM objects: nothing is kept in the session
+        result = await db.stream(statement)
+        async for rows in result.partitions():
+            records = {row.id: _record(row, STATUS_LABELS, REGION_LABELS) for row in rows}
+            await _add_children(db, records)
+            if on_chunk is not None:
+                on_chunk(len(records))
+            data = export_format.encode([
+                {name: record[name] for name in EXPORT_FIELDS} for record in records.values()
+            ])
+            if data:
+                yield data
+    yield export_format.end()
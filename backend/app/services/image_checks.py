@@ -0,0 +1,214 @@
+"""
+Verification of the project image URLs.
+
+check_images fetches every URL a ProjectImage points to and records in
+image_checks whether it answers with an image, its status, content type,
+size and pixel dimensions. Broken links and oversized images show up there
+(and in scripts/check_image_urls.py's report) rather than in a visitor's
+browser.
+
+- Requests run concurrently, at most IMAGE_CHECK_CONCURRENCY at once and
+  IMAGE_CHECK_PER_HOST against any one host, through one pooled client.
+- Only the start of each body is read: the dimensions come from the image
+  header (Pillow's incremental parser) and the size from Content-Length.
+  Bodies without a Content-Length are read to the end to be counted.
+- Runs are incremental: only URLs never checked, or checked more than
+  IMAGE_CHECK_MAX_AGE_HOURS ago, are fetched, oldest first. A re-check
+  sends the stored ETag/Last-Modified, and a 304 keeps what is recorded.
+- Relative URLs (/project_images/...) are fetched from
+  IMAGE_CHECK_BASE_URL, FRONTEND_URL by default, where browsers load them.
+
+Results are written in batches as they come in; checks of URLs no project
+uses any more are deleted.
+"""
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+import httpx
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from ..core.config import settings
+from ..models.project import ImageCheck, ProjectImage
+
+try:
+    from PIL import ImageFile
+except ImportError:  # Optional: no dimensions without Pillow
+    ImageFile = None
+
+WRITE_BATCH_SIZE = 100
+# Columns a 304 leaves as they were recorded
+KEPT_ON_NOT_MODIFIED = ("ok", "error", "content_type", "bytes", "width", "height", "etag", "last_modified")
+
+
+@dataclass
+class ImageCheckStats:
+    """Outcome of a check_images run"""
+    urls: int = 0
+    due: int = 0
+    checked: int = 0
+    ok: int = 0
+    broken: int = 0
+    not_modified: int = 0
+    pruned: int = 0
+    started: float = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def absolute_url(url: str, base_url: Optional[str] = None) -> str:
+    """Where an image URL is fetched from: relative ones are resolved against the base URL"""
+    base = httpx.URL(base_url or settings.IMAGE_CHECK_BASE_URL or settings.FRONTEND_URL)
+    return str(base.join(url))
+
+
+def _upsert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Image checks do not support the {dialect} dialect")
+    table = ImageCheck.__table__
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.url],
+        set_={name: statement.excluded[name] for name in table.c.keys() if name not in ("id", "url")},
+    )
+
+
+async def fetch_image_metadata(client: httpx.AsyncClient, url: str, previous: Optional[ImageCheck] = None) -> dict:
+    """Check one URL; returns the image_checks column values"""
+    row = {
+        "url": url, "ok": False, "status_code": None, "error": None, "content_type": None,
+        "bytes": None, "width": None, "height": None, "etag": None, "last_modified": None,
+        "checked_at": datetime.utcnow(),
+    }
+    headers = {}
+    if previous is not None and previous.etag:
+        headers["If-None-Match"] = previous.etag
+    if previous is not None and previous.last_modified:
+        headers["If-Modified-Since"] = previous.last_modified
+    try:
+        async with client.stream("GET", absolute_url(url), headers=headers) as response:
+            row["status_code"] = response.status_code
+            if response.status_code == 304 and previous is not None:
+                row.update((name, getattr(previous, name)) for name in KEPT_ON_NOT_MODIFIED)
+                return row
+            if response.status_code != 200:
+                row["error"] = f"HTTP {response.status_code}"
+                return row
+            row["content_type"] = response.headers.get("content-type", "").split(";")[0].strip().lower() or None
+            row["etag"] = response.headers.get("etag")
+            row["last_modified"] = response.headers.get("last-modified")
+            length = response.headers.get("content-length")
+            parser = ImageFile.Parser() if ImageFile is not None else None
+            received = 0
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                if parser is not None and parser.image is None:
+                    try:
+                        parser.feed(chunk)
+                    except Exception:  # Corrupt data after the header; the header is all that is used
+                        pass
+                if length is not None and (parser is None or parser.image is not None):
+                    # Size and dimensions known: the rest of the body is not needed
+                    break
+            row["bytes"] = int(length) if length is not None else received
+    except (httpx.HTTPError, ValueError) as error:
+        row["error"] = f"{type(error).__name__}: {error}"[:500]
+        return row
+
+    if parser is not None and parser.image is not None:
+        row["width"], row["height"] = parser.image.size
+    if not (row["content_type"] or "").startswith("image/"):
+        row["error"] = f"Not an image: {row['content_type'] or 'no content type'}"
+    elif parser is not None and parser.image is None:
+        row["error"] = "Unreadable image"
+    else:
+        row["ok"] = True
+    return row
+
+
+def image_check_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """A client pooling up to IMAGE_CHECK_CONCURRENCY connections"""
+    return httpx.AsyncClient(
+        transport=transport,
+        follow_redirects=True,
+        timeout=httpx.Timeout(settings.IMAGE_CHECK_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=settings.IMAGE_CHECK_CONCURRENCY,
+            max_keepalive_connections=settings.IMAGE_CHECK_CONCURRENCY,
+        ),
+    )
+
+
+async def check_images(
+    session_factory: async_sessionmaker,
+    force: bool = False,
+    limit: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    per_host: Optional[int] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> ImageCheckStats:
+    """Check the image URLs that are due (all of them with force), at most limit of them"""
+    stats = ImageCheckStats(started=time.perf_counter())
+    stale_before = datetime.utcnow() - timedelta(hours=settings.IMAGE_CHECK_MAX_AGE_HOURS)
+    async with session_factory() as db:
+        urls = set((await db.execute(select(ProjectImage.image_url).distinct())).scalars())
+        checks: Dict[str, ImageCheck] = {check.url: check for check in (await db.execute(select(ImageCheck))).scalars()}
+        gone = [url for url in checks if url not in urls]
+        if gone:
+            await db.execute(delete(ImageCheck).where(ImageCheck.url.in_(gone)))
+            await db.commit()
+        dialect = db.get_bind().dialect.name
+    stats.urls, stats.pruned = len(urls), len(gone)
+
+    # Never checked first, then the oldest checks
+    due = sorted(
+        (url for url in urls if force or url not in checks or checks[url].checked_at < stale_before),
+        key=lambda url: (url in checks, checks[url].checked_at if url in checks else datetime.min, url),
+    )[:limit]
+    stats.due = len(due)
+    if not due:
+        return stats
+
+    overall = asyncio.Semaphore(concurrency or settings.IMAGE_CHECK_CONCURRENCY)
+    hosts: Dict[str, asyncio.Semaphore] = defaultdict(
+        lambda: asyncio.Semaphore(per_host or settings.IMAGE_CHECK_PER_HOST)
+    )
+    batch: List[dict] = []
+
+    async def flush() -> None:
+        async with session_factory() as db:
+            await db.execute(_upsert(dialect), batch)
+            await db.commit()
+        batch.clear()
+
+    async with image_check_client(transport) as client:
+        async def check(url: str) -> dict:
+            # The host's slot first: waiting for a busy host does not hold an overall one
+            async with hosts[httpx.URL(absolute_url(url)).host], overall:
+                return await fetch_image_metadata(client, url, checks.get(url))
+
+        for result in asyncio.as_completed([check(url) for url in due]):
+            row = await result
+            stats.checked += 1
+            stats.not_modified += row["status_code"] == 304
+            if row["ok"]:
+                stats.ok += 1
+            else:
+                stats.broken += 1
+            if progress is not None:
+                progress(row)
+            batch.append(row)
+            if len(batch) >= WRITE_BATCH_SIZE:
+                await flush()
+        if batch:
+            await flush()
+    return stats
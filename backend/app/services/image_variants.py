@@ -0,0 +1,255 @@
+"""
+Responsive variants of project images.
+
+Every image file referenced by a ProjectImage is rendered as a thumbnail,
+a card and a hero image (VARIANT_WIDTHS, never upscaled) in each of
+IMAGE_VARIANT_FORMATS. File names carry a hash of their content, so they
+can be cached forever. The variants are recorded in image_variants with
+their size, keyed by the source URL and the hash of the source file: a run
+only renders images that are new or whose file changed.
+
+Only images served from the frontend's public folder (URLs under
+PROJECT_IMAGES_URL_PREFIX) are rendered; other URLs keep being served as
+they are. The variants folder is committed with the images and deployed
+with the frontend: a variant is only recorded once the deployed frontend
+(IMAGE_CHECK_BASE_URL, FRONTEND_URL by default) serves it, so the API never
+points at a file that is not there yet.
+
+The API picks the smallest variant at least as wide as the slot an image is
+shown in (fitting_variant): map popups get a thumbnail, listing cards a
+card, falling back to the original image when it has no variants.
+"""
+import hashlib
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import httpx
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..models.project import ImageVariant, Project, ProjectImage
+from .dataset_version import bump_dataset_version
+from .image_checks import absolute_url
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Optional: only needed to render variants
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Largest width of each variant, smallest first
+VARIANT_WIDTHS = {"thumbnail": 320, "card": 640, "hero": 1600}
+QUALITY = {"avif": 60, "webp": 80}
+MEDIA_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+# Format every browser shows; the URL clients get when they do not pick a source
+FALLBACK_FORMAT = "webp"
+VARIANTS_FOLDER = "variants"
+
+# CSS widths images are displayed at
+MARKER_IMAGE_WIDTH = 280
+LIST_IMAGE_WIDTH = 480
+
+
+def variant_formats() -> List[str]:
+    """Configured formats this Pillow build can write"""
+    formats = [name.strip().lower() for name in settings.IMAGE_VARIANT_FORMATS.split(",") if name.strip()]
+    unknown = set(formats) - set(MEDIA_TYPES)
+    if unknown:
+        raise ValueError(f"Unsupported image variant formats: {', '.join(sorted(unknown))}")
+    if Image is None:
+        raise RuntimeError("Rendering image variants needs Pillow (pip install Pillow)")
+    available = [name for name in formats if features.check(name)]
+    for name in set(formats) - set(available):
+        logger.warning(f"Pillow cannot write {name}; skipping {name} variants")
+    return available
+
+
+def local_image_path(url: str) -> Optional[Path]:
+    """File behind an image URL served from the public folder, None for other URLs"""
+    prefix = settings.PROJECT_IMAGES_URL_PREFIX
+    if not url.startswith(prefix):
+        return None
+    base = Path(settings.PROJECT_IMAGES_DIR).resolve()
+    path = (base / url[len(prefix):].split("?")[0]).resolve()
+    return path if path.is_relative_to(base) else None
+
+
+def render_variants(data: bytes, stem: str, formats: Sequence[str]) -> List[dict]:
+    """Encode the variants of an image; returns their column values and file content"""
+    rendered = []
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA"):
+            transparent = "A" in image.mode or "transparency" in image.info
+            image = image.convert("RGBA" if transparent else "RGB")
+        previous_width = None
+        for variant, max_width in VARIANT_WIDTHS.items():
+            width = min(max_width, image.width)
+            if width == previous_width:
+                # The source is narrower than this variant: the previous one is all there is
+                break
+            previous_width = width
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for name in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, name.upper(), quality=QUALITY[name])
+                content = buffer.getvalue()
+                digest = hashlib.sha256(content).hexdigest()[:12]
+                rendered.append({
+                    "variant": variant, "format": name, "width": width, "height": height,
+                    "bytes": len(content), "filename": f"{stem}-{width}w.{digest}.{name}", "content": content,
+                })
+    return rendered
+
+
+def fitting_variant(variants: Sequence[ImageVariant], width: int, image_format: str = FALLBACK_FORMAT):
+    """Smallest variant of a format at least `width` wide, else the widest one"""
+    candidates = sorted((v for v in variants if v.format == image_format), key=lambda v: v.width)
+    if not candidates:
+        return None
+    return next((v for v in candidates if v.width >= width), candidates[-1])
+
+
+def image_for_width(image: Optional[ProjectImage], width: int) -> Optional[dict]:
+    """What to show for an image in a slot `width` CSS pixels wide: a URL, its size and per-format sources"""
+    if image is None:
+        return None
+    fitting = {
+        name: variant for name in MEDIA_TYPES
+        for variant in [fitting_variant(image.variants, width, name)] if variant is not None
+    }
+    shown = fitting.get(FALLBACK_FORMAT) or next(iter(fitting.values()), None)
+    return {
+        "url": shown.url if shown else image.image_url,
+        "width": shown.width if shown else None,
+        "height": shown.height if shown else None,
+        "sources": {MEDIA_TYPES[name]: variant.url for name, variant in fitting.items()},
+        # What clients fall back to if a variant fails to load
+        "original_url": image.image_url,
+    }
+
+
+def primary_image(project: Project) -> Optional[ProjectImage]:
+    """The first image of a project"""
+    return min(project.images, key=lambda image: image.display_order or 0, default=None)
+
+
+@dataclass
+class VariantStats:
+    """Outcome of a generate_image_variants run"""
+    images: int = 0
+    rendered: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    failed: int = 0
+    files: int = 0
+    source_bytes: int = 0
+    variant_bytes: int = 0
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    # Source URLs whose variants were written but are not served yet
+    unpublished: List[str] = field(default_factory=list)
+
+
+def _unpublished(client: httpx.Client, urls: Sequence[str]) -> List[str]:
+    """The variant URLs the deployed frontend does not serve"""
+    missing = []
+    for url in urls:
+        try:
+            if client.head(absolute_url(url)).status_code != 200:
+                missing.append(url)
+        except httpx.HTTPError:
+            missing.append(url)
+    return missing
+
+
+def _render(job: Tuple[str, bytes, str, Sequence[str]]) -> Tuple[str, List[dict], Optional[str]]:
+    """Render one image's variants; returns its URL, the variants and the error, if any"""
+    url, data, stem, formats = job
+    try:
+        return url, render_variants(data, stem, formats), None
+    except Exception as error:  # Unreadable or unsupported image
+        return url, [], f"{type(error).__name__}: {error}"
+
+
+def generate_image_variants(
+    db: Session,
+    force: bool = False,
+    workers: int = 1,
+    progress: Optional[Callable[[str, int], None]] = None,
+    verify: bool = True,
+    transport: Optional[httpx.BaseTransport] = None,
+) -> VariantStats:
+    """Render the variants of every new or changed image file, one commit per image
+
+    With verify, an image's variants are recorded only once all of them are
+    served at their URL; until then they are only written to the folder.
+    """
+    formats = variant_formats()
+    output = Path(settings.PROJECT_IMAGES_DIR) / VARIANTS_FOLDER
+    output.mkdir(parents=True, exist_ok=True)
+    url_prefix = f"{settings.PROJECT_IMAGES_URL_PREFIX}{VARIANTS_FOLDER}/"
+
+    stats = VariantStats()
+    urls = [url for (url,) in db.query(ProjectImage.image_url).distinct().order_by(ProjectImage.image_url)]
+    known: Dict[str, str] = dict(db.query(ImageVariant.source_url, ImageVariant.source_hash).distinct())
+
+    jobs, hashes = [], {}
+    for url in urls:
+        stats.images += 1
+        path = local_image_path(url)
+        if path is None or path.parent.name == VARIANTS_FOLDER:
+            stats.skipped += 1
+            continue
+        if not path.is_file():
+            stats.failed += 1
+            stats.errors.append((url, f"file not found: {path}"))
+            continue
+        data = path.read_bytes()
+        hashes[url] = hashlib.sha256(data).hexdigest()
+        if not force and known.get(url) == hashes[url]:
+            stats.unchanged += 1
+            continue
+        stats.source_bytes += len(data)
+        jobs.append((url, data, path.stem, formats))
+
+    client = httpx.Client(transport=transport, follow_redirects=True, timeout=settings.IMAGE_CHECK_TIMEOUT_SECONDS)
+    executor = ProcessPoolExecutor(workers) if workers > 1 and len(jobs) > 1 else None
+    results = executor.map(_render, jobs) if executor else map(_render, jobs)
+    try:
+        for url, rendered, error in results:
+            if error is not None:
+                stats.failed += 1
+                stats.errors.append((url, error))
+                continue
+            for item in rendered:
+                target = output / item["filename"]
+                if not target.exists():
+                    target.write_bytes(item["content"])
+                stats.files += 1
+                stats.variant_bytes += item["bytes"]
+            if verify and _unpublished(client, [url_prefix + item["filename"] for item in rendered]):
+                stats.unpublished.append(url)
+                continue
+            db.query(ImageVariant).filter(ImageVariant.source_url == url).delete(synchronize_session=False)
+            db.add_all(
+                ImageVariant(
+                    source_url=url, source_hash=hashes[url], url=url_prefix + item["filename"],
+                    **{name: item[name] for name in ("variant", "format", "width", "height", "bytes")},
+                )
+                for item in rendered
+            )
+            # Markers and listings now point at the variants
+            bump_dataset_version(db)
+            db.commit()
+            stats.rendered += 1
+            if progress is not None:
+                progress(url, len(rendered))
+    finally:
+        client.close()
+        if executor is not None:
+            executor.shutdown()
+    return stats
@@ -0,0 +1,84 @@
+"""
+Hierarchical grid cluster index for map markers.
+
+Points are projected to Web Mercator and bucketed into square cells roughly
+CLUSTER_RADIUS_PX screen pixels wide at every zoom level up to
+MAX_CLUSTER_ZOOM. Cell sizes halve from one zoom to the next, so a cell's
+key at zoom z is its key at the deepest zoom shifted right by the zoom
+difference and the levels nest exactly. Each cell holds a bitmap of
+dashboard snapshot slots, so filter bitmaps can be applied to the
+precomputed clusters directly.
+"""
+import math
+from typing import Dict, Iterator, List, Tuple
+
+TILE_SIZE = 256
+CLUSTER_RADIUS_PX = 64
+# Beyond this zoom level markers are returned individually
+MAX_CLUSTER_ZOOM = 14
+
+# Cells per world axis at zoom 0; doubles with every zoom level
+_BASE_CELLS = TILE_SIZE // CLUSTER_RADIUS_PX
+_MAX_LATITUDE = 85.05112878
+
+
+def _project(latitude: float, longitude: float) -> Tuple[float, float]:
+    """Project to normalized Web Mercator coordinates in [0, 1)"""
+    latitude = max(-_MAX_LATITUDE, min(_MAX_LATITUDE, latitude))
+    x = (longitude + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(latitude))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return min(max(x, 0.0), 1 - 1e-12), min(max(y, 0.0), 1 - 1e-12)
+
+
+def _cell(latitude: float, longitude: float, zoom: int) -> Tuple[int, int]:
+    x, y = _project(latitude, longitude)
+    cells = _BASE_CELLS << zoom
+    return int(x * cells), int(y * cells)
+
+
+class ClusterIndex:
+    """Per-zoom grid cells mapping to bitmaps of snapshot slots"""
+
+    def __init__(self):
+        self.levels: List[Dict[Tuple[int, int], int]] = [
+            {} for _ in range(MAX_CLUSTER_ZOOM + 1)
+        ]
+
+    def add(self, slot: int, latitude: float, longitude: float) -> None:
+        bit = 1 << slot
+        cx, cy = _cell(latitude, longitude, MAX_CLUSTER_ZOOM)
+        for zoom, cells in enumerate(self.levels):
+            shift = MAX_CLUSTER_ZOOM - zoom
+            key = (cx >> shift, cy >> shift)
+            cells[key] = cells.get(key, 0) | bit
+
+    def remove(self, slot: int, latitude: float, longitude: float) -> None:
+        bit = 1 << slot
+        cx, cy = _cell(latitude, longitude, MAX_CLUSTER_ZOOM)
+        for zoom, cells in enumerate(self.levels):
+            shift = MAX_CLUSTER_ZOOM - zoom
+            key = (cx >> shift, cy >> shift)
+            remaining = cells.get(key, 0) & ~bit
+            if remaining:
+                cells[key] = remaining
+            else:
+                cells.pop(key, None)
+
+    def cells_in_view(
+        self, zoom: int, west: float, south: float, east: float, north: float
+    ) -> Iterator[Tuple[Tuple[int, int], int]]:
+        """Yield (cell key, slot bitmap) for the cells overlapping a bounding box"""
+        x_min, y_min = _cell(north, west, zoom)
+        x_max, y_max = _cell(south, east, zoom)
+        # A box crossing the antimeridian wraps around the x axis
+        wraps = west > east
+        for key, bits in self.levels[zoom].items():
+            x, y = key
+            if not y_min <= y <= y_max:
+                continue
+            if wraps:
+                if x >= x_min or x <= x_max:
+                    yield key, bits
+            elif x_min <= x <= x_max:
+                yield key, bits
@@ -0,0 +1,213 @@
+"""
+Child rows of a project: SDGs, typologies, requirements and images.
+
+Writes go through multi-row statements instead of one ORM unit of work
+entry per row:
+
+- new projects: child_rows builds every row from the payload, with its id,
+  and insert_children writes one INSERT per child table. attach_children
+  then sets the same values as the Project's loaded collections, so the
+  response is formatted without reading them back.
+- edits: sync_children compares the payload lists with the stored rows and
+  writes only the difference. Rows that match are left alone; the others
+  are reused for new values (one UPDATE), and whatever is left over is
+  inserted or deleted, each kind in one statement per table. Changing one
+  SDG updates one row; resubmitting unchanged lists writes nothing.
+  sync_children_bulk does the same for a batch of projects (the importer).
+"""
+import uuid
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, NamedTuple, Set, Tuple
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from ..models.project import Project, ProjectImage, ProjectRequirement, ProjectSDG, ProjectTypology
+
+# Values per IN list of the batched statements
+MAX_IN_VALUES = 5000
+
+# Relationship name -> child model
+CHILD_MODELS = {
+    "sdgs": ProjectSDG,
+    "typologies": ProjectTypology,
+    "requirements": ProjectRequirement,
+    "images": ProjectImage,
+}
+
+
+class ChildField(NamedTuple):
+    """How a payload list maps to child rows"""
+    relationship: str
+    # Columns shared by all rows of the list (its scope within the table)
+    scope: Dict[str, str]
+    # Column values of the item at a position
+    values: Callable[[object, int], dict]
+
+
+# Payload list field -> its rows
+CHILD_FIELDS: Dict[str, ChildField] = {
+    "sdgs": ChildField("sdgs", {}, lambda number, _: {"sdg_number": number}),
+    "typologies": ChildField("typologies", {}, lambda typology, _: {"typology": typology}),
+    "funding_requirements": ChildField(
+        "requirements", {"requirement_type": "funding"}, lambda requirement, _: {"requirement": requirement}
+    ),
+    "government_requirements": ChildField(
+        "requirements", {"requirement_type": "government"}, lambda requirement, _: {"requirement": requirement}
+    ),
+    "other_requirements": ChildField(
+        "requirements", {"requirement_type": "other"}, lambda requirement, _: {"requirement": requirement}
+    ),
+    "image_urls": ChildField(
+        "images", {}, lambda url, position: {"image_url": url, "display_order": position}
+    ),
+}
+
+
+def _desired(field: ChildField, items) -> List[dict]:
+    return [{**field.scope, **field.values(item, position)} for position, item in enumerate(items)]
+
+
+def _value_columns(field: ChildField) -> List[str]:
+    """Columns a list field's rows are compared on"""
+    return [*field.scope, *field.values(None, 0)]
+
+
+def child_rows(project_id: uuid.UUID, data) -> Dict[str, List[dict]]:
+    """Column values of every child row of a project payload, by relationship"""
+    rows: Dict[str, List[dict]] = {relationship: [] for relationship in CHILD_MODELS}
+    for name, field in CHILD_FIELDS.items():
+        rows[field.relationship].extend(
+            {"id": uuid.uuid4(), "project_id": project_id, **values}
+            for values in _desired(field, getattr(data, name))
+        )
+    return rows
+
+
+async def insert_children(db: AsyncSession, rows: Dict[str, List[dict]]) -> None:
+    """Insert the rows with one multi-row INSERT per child table"""
+    for relationship, values in rows.items():
+        if values:
+            await db.execute(insert(CHILD_MODELS[relationship]).values(values))
+
+
+def attach_children(project: Project, rows: Dict[str, List[dict]]) -> None:
+    """Set the project's collections to the written rows, as if loaded from the database"""
+    for relationship, values in rows.items():
+        model = CHILD_MODELS[relationship]
+        children = [model(**row) for row in values]
+        if relationship == "images":
+            # New image URLs have no variants until generate_image_variants runs
+            for child in children:
+                set_committed_value(child, "variants", [])
+        set_committed_value(project, relationship, children)
+
+
+def diff_rows(existing: List[dict], desired: List[dict]) -> Tuple[List[dict], List[dict], List[dict]]:
+    """(inserts, updates, delete ids) turning the existing rows (with ids) into the desired values"""
+    wanted = Counter(tuple(sorted(values.items())) for values in desired)
+    unmatched_existing = []
+    for row in existing:
+        key = tuple(sorted((column, value) for column, value in row.items() if column != "id"))
+        if wanted[key] > 0:
+            wanted[key] -= 1
+        else:
+            unmatched_existing.append(row)
+
+    unmatched_desired = []
+    for values in desired:
+        key = tuple(sorted(values.items()))
+        if wanted[key] > 0:
+            wanted[key] -= 1
+            unmatched_desired.append(values)
+
+    # Reuse rows that are no longer wanted for the new values
+    updates = []
+    for row, values in zip(unmatched_existing, unmatched_desired):
+        changed = {column: value for column, value in values.items() if row[column] != value}
+        updates.append({"id": row["id"], **changed})
+    reused = len(updates)
+    inserts = unmatched_desired[reused:]
+    deletes = [row["id"] for row in unmatched_existing[reused:]]
+    return inserts, updates, deletes
+
+
+async def sync_children(db: AsyncSession, project_id: uuid.UUID, lists: Dict[str, list]) -> Dict[str, int]:
+    """Make the child rows of the given payload lists match them, writing only the difference
+
+    `lists` maps CHILD_FIELDS names to their new items; lists not given are
+    left as they are. Returns the number of rows inserted, updated and deleted.
+    """
+    counts, _ = await sync_children_bulk(db, {project_id: lists})
+    return counts
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def sync_children_bulk(
+    db: AsyncSession, lists_by_project: Dict[uuid.UUID, Dict[str, list]]
+) -> Tuple[Dict[str, int], Set[uuid.UUID]]:
+    """sync_children for many projects at once, with one SELECT per child table
+
+    Every project must give the same list fields. Returns the row counts and
+    the ids of the projects whose rows changed.
+    """
+    counts = {"inserted": 0, "updated": 0, "deleted": 0}
+    changed: Set[uuid.UUID] = set()
+    if not lists_by_project:
+        return counts, changed
+    project_ids = list(lists_by_project)
+    fields_by_relationship: Dict[str, List[str]] = defaultdict(list)
+    for name in lists_by_project[project_ids[0]]:
+        fields_by_relationship[CHILD_FIELDS[name].relationship].append(name)
+
+    for relationship, names in fields_by_relationship.items():
+        model = CHILD_MODELS[relationship]
+        columns = [model.id, model.project_id] + [
+            model.__table__.c[column] for column in _value_columns(CHILD_FIELDS[names[0]])
+        ]
+        scopes = [CHILD_FIELDS[name].scope for name in names]
+        existing_by_project: Dict[uuid.UUID, List[dict]] = defaultdict(list)
+        for ids in _chunks(project_ids, MAX_IN_VALUES):
+            statement = select(*columns).where(model.project_id.in_(ids))
+            if scopes[0]:
+                # Requirements: only the types being replaced
+                statement = statement.where(
+                    model.requirement_type.in_([scope["requirement_type"] for scope in scopes])
+                )
+            if relationship == "images":
+                statement = statement.order_by(model.project_id, model.display_order)
+            for row in await db.execute(statement):
+                values = dict(row._mapping)
+                existing_by_project[values.pop("project_id")].append(values)
+
+        inserts, updates, deletes = [], [], []
+        for project_id, lists in lists_by_project.items():
+            existing = existing_by_project.get(project_id, [])
+            for name in names:
+                field = CHILD_FIELDS[name]
+                in_scope = [row for row in existing if all(row[c] == v for c, v in field.scope.items())]
+                field_inserts, field_updates, field_deletes = diff_rows(in_scope, _desired(field, lists[name]))
+                inserts.extend({"id": uuid.uuid4(), "project_id": project_id, **values} for values in field_inserts)
+                updates.extend(field_updates)
+                deletes.extend(field_deletes)
+                if field_inserts or field_updates or field_deletes:
+                    changed.add(project_id)
+
+        for ids in _chunks(deletes, MAX_IN_VALUES):
+            await db.execute(delete(model).where(model.id.in_(ids)))
+        if updates:
+            await db.execute(update(model), updates)
+        if inserts:
+            if len(lists_by_project) == 1:
+                await db.execute(insert(model).values(inserts))
+            else:
+                # Many projects' rows: multi-row INSERTs paged under the drivers'
+                # parameter limits by SQLAlchemy, without compiling a statement per batch
+                await db.execute(insert(model), inserts)
+        counts["inserted"] += len(inserts)
+        counts["updated"] += len(updates)
+        counts["deleted"] += len(deletes)
+    return counts, changed
@@ -0,0 +1,440 @@
+"""
+Bulk import of projects from CSV, NDJSON and XLS/XLSX files.
+
+Records are streamed from the file (read_records), validated with
+ProjectCreate and written in batches (import_records):
+
+- one SELECT finds which of the batch's natural keys already exist
+- multi-row INSERT .. ON CONFLICT (import_key) DO UPDATE writes the
+  projects; the update only applies where a column actually differs, so
+  re-importing an unchanged file leaves the rows (and updated_at) alone
+- sync_children_bulk writes the difference in SDGs, typologies,
+  requirements and images, a few statements per child table
+- the batch commits, bumping the dataset version if anything changed
+
+The natural key is a hash of some record fields (by default project name,
+city and country), stored in projects.import_key. Workflow status is only
+set on insert: a re-import does not undo an admin's review.
+
+Spreadsheet and CSV columns are matched to ProjectCreate fields by name,
+ignoring case and punctuation ("Project Name" is project_name). List
+fields hold items separated by ";" or "|", or a JSON array. Status and
+region accept values, names or labels ("In Progress", "Section I - Western
+Europe"). Records without gdpr_consent count as consented: imports are
+curated by admins.
+"""
+import csv
+import hashlib
+import json
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from pydantic import ValidationError
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from ..models.project import Project, ProjectStatus, UIARegion, WorkflowStatus
+from ..models.spatial import project_geohash
+from ..schemas.project import ProjectCreate
+from .dataset_version import bump_dataset_version
+from .project_children import CHILD_FIELDS, sync_children_bulk
+
+FORMATS = ("csv", "ndjson", "xls", "xlsx")
+EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".xls": "xls", ".xlsx": "xlsx"}
+
+NATURAL_KEY = ("project_name", "city", "country")
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+# Other column names found in exports of the dataset
+COLUMN_ALIASES = {
+    "name": "project_name",
+    "status": "project_status",
+    "region": "uia_region",
+    "funding_needed_usd": "funding_needed",
+    "funding_spent_usd": "funding_spent",
+    "lat": "latitude",
+    "lon": "longitude",
+    "lng": "longitude",
+    "images": "image_urls",
+}
+
+REQUIRED_COLUMNS = {
+    name for name, info in ProjectCreate.model_fields.items()
+    if info.is_required() and name not in CHILD_FIELDS and name != "gdpr_consent"
+}
+TEXT_COLUMNS = {name for name, info in ProjectCreate.model_fields.items() if info.annotation in (str, Optional[str])}
+
+# Project columns an import writes; id, import_key, workflow_status and
+# created_at are only set on insert
+IMPORTED_COLUMNS = (
+    "project_name", "organization_name", "contact_person", "contact_email", "project_status",
+    "funding_needed", "funding_spent", "uia_region", "city", "country", "latitude", "longitude",
+    "geohash", "brief_description", "detailed_description", "success_factors",
+    "other_requirement_text", "gdpr_consent",
+)
+
+
+class ImportFormatError(ValueError):
+    """Raised when a file cannot be read as a project table"""
+
+
+class RecordError(ValueError):
+    """A record that cannot be imported"""
+
+
+def _normalize_name(name) -> str:
+    return re.sub(r"[^0-9a-z]+", "_", str(name or "").strip().lower()).strip("_")
+
+
+def column_name(header) -> str:
+    """The record field a column header stands for"""
+    name = _normalize_name(header)
+    return COLUMN_ALIASES.get(name, name)
+
+
+def _lookup(enum_class, labels: Dict[str, str]) -> Dict[str, str]:
+    names = {}
+    for member in enum_class:
+        names[_normalize_name(member.name)] = member.value
+        names[_normalize_name(member.value)] = member.value
+    for value, label in labels.items():
+        names[_normalize_name(label)] = value
+        # "Section I - Western Europe" is also "Section I"
+        names[_normalize_name(label.split(" - ")[0])] = value
+    return names
+
+
+STATUS_NAMES = _lookup(ProjectStatus, {})
+REGION_NAMES = _lookup(UIARegion, {
+    "SECTION_I": "Section I - Western Europe",
+    "SECTION_II": "Section II - Eastern Europe & Central Asia",
+    "SECTION_III": "Section III - Middle East & Africa",
+    "SECTION_IV": "Section IV - Asia & Pacific",
+    "SECTION_V": "Section V - Americas",
+})
+WORKFLOW_NAMES = _lookup(WorkflowStatus, {})
+
+
+# Readers: each yields (location, raw record); a record that cannot be parsed is a RecordError
+
+def detect_format(path: Path) -> str:
+    file_format = EXTENSIONS.get(path.suffix.lower())
+    if file_format is None:
+        raise ImportFormatError(f"Cannot tell the format of {path.name}; pass one of {', '.join(FORMATS)}")
+    return file_format
+
+
+def _table(rows: Iterable[Sequence], label: str) -> Iterator[Tuple[str, dict]]:
+    """Records of a table whose first non-empty row holds the column names"""
+    columns = None
+    for number, row in enumerate(rows, 1):
+        if not any(value not in (None, "") for value in row):
+            continue
+        if columns is None:
+            columns = [column_name(header) for header in row]
+            missing = REQUIRED_COLUMNS.difference(columns)
+            if missing:
+                found = ", ".join(str(header) for header in row if header not in (None, ""))[:200]
+                raise ImportFormatError(
+                    f"{label} is not a project table: missing columns {', '.join(sorted(missing))} "
+                    f"(row {number} has: {found})"
+                )
+            continue
+        yield f"{label} row {number}", {
+            name: value for name, value in zip(columns, row) if name
+        }
+    if columns is None:
+        raise ImportFormatError(f"{label} is empty")
+
+
+def _read_csv(path: Path, sheet: Optional[str]) -> Iterator[Tuple[str, dict]]:
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        yield from _table(csv.reader(file), path.name)
+
+
+def _read_ndjson(path: Path, sheet: Optional[str]) -> Iterator[Tuple[str, Union[dict, RecordError]]]:
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            location = f"{path.name} line {number}"
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                yield location, RecordError(f"invalid JSON: {error}")
+                continue
+            if not isinstance(record, dict):
+                yield location, RecordError("not a JSON object")
+                continue
+            yield location, {column_name(name): value for name, value in record.items()}
+
+
+def _read_xlsx(path: Path, sheet: Optional[str]) -> Iterator[Tuple[str, dict]]:
+    try:
+        import openpyxl
+    except ImportError as error:
+        raise ImportFormatError("Reading .xlsx files needs openpyxl (pip install openpyxl)") from error
+    # Read-only mode streams rows from the archive instead of loading the workbook
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        yield from _table(worksheet.iter_rows(values_only=True), f"{path.name} [{worksheet.title}]")
+    finally:
+        workbook.close()
+
+
+def _read_xls(path: Path, sheet: Optional[str]) -> Iterator[Tuple[str, dict]]:
+    try:
+        import xlrd
+    except ImportError as error:
+        raise ImportFormatError("Reading .xls files needs xlrd (pip install xlrd)") from error
+    # The legacy format cannot be streamed; on_demand at least only parses the sheet read
+    workbook = xlrd.open_workbook(path, on_demand=True)
+    try:
+        worksheet = workbook.sheet_by_name(sheet) if sheet else workbook.sheet_by_index(0)
+        rows = (worksheet.row_values(index) for index in range(worksheet.nrows))
+        yield from _table(rows, f"{path.name} [{worksheet.name}]")
+    finally:
+        workbook.release_resources()
+
+
+READERS = {"csv": _read_csv, "ndjson": _read_ndjson, "xls": _read_xls, "xlsx": _read_xlsx}
+
+
+def read_records(path, file_format: Optional[str] = None, sheet: Optional[str] = None):
+    """Stream the raw records of a file as (location, record) pairs"""
+    path = Path(path)
+    return READERS[file_format or detect_format(path)](path, sheet)
+
+
+# Validation
+
+def _split(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if isinstance(value, float) and value.is_integer():
+        return [int(value)]
+    if not isinstance(value, str):
+        return [value]
+    value = value.strip()
+    if value.startswith("["):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return [item.strip() for item in re.split(r"[;|]", value) if item.strip()]
+
+
+def _text(value):
+    """Spreadsheet cells of text columns may hold numbers"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+def _member(names: Dict[str, str], value, column: str) -> str:
+    member = names.get(_normalize_name(value))
+    if member is None:
+        raise RecordError(f"{column}: unknown value {value!r}")
+    return member
+
+
+def natural_key(record: dict, fields: Sequence[str] = NATURAL_KEY) -> str:
+    """Hash of the key fields, ignoring case and spacing"""
+    parts = []
+    for name in fields:
+        value = record.get(name)
+        if value in (None, ""):
+            raise RecordError(f"{name}: natural key field is empty")
+        parts.append(" ".join(str(_text(value)).split()).casefold())
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+@dataclass
+class ImportRow:
+    """A validated record, ready to write"""
+    key: str
+    values: dict
+    lists: Dict[str, list]
+
+
+def prepare_record(
+    raw: dict, key_fields: Sequence[str] = NATURAL_KEY, workflow_status: str = WorkflowStatus.APPROVED.value
+) -> ImportRow:
+    """Validate a raw record; raises RecordError with every problem found"""
+    record = {name: value for name, value in raw.items() if value not in (None, "")}
+    for name in TEXT_COLUMNS.intersection(record):
+        record[name] = _text(record[name])
+    for name in CHILD_FIELDS:
+        record[name] = _split(record.get(name))
+    record.setdefault("gdpr_consent", True)
+    try:
+        project = ProjectCreate.model_validate(record)
+    except ValidationError as error:
+        raise RecordError("; ".join(
+            f"{'.'.join(str(part) for part in problem['loc'])}: {problem['msg']}" for problem in error.errors()
+        )) from None
+
+    funding_spent = record.get("funding_spent", 0.0)
+    try:
+        funding_spent = float(funding_spent)
+    except (TypeError, ValueError):
+        raise RecordError(f"funding_spent: not a number: {funding_spent!r}") from None
+    if funding_spent < 0:
+        raise RecordError("funding_spent: cannot be negative")
+
+    values = project.model_dump(include=set(IMPORTED_COLUMNS))
+    values.update(
+        project_status=ProjectStatus(_member(STATUS_NAMES, project.project_status, "project_status")),
+        uia_region=UIARegion(_member(REGION_NAMES, project.uia_region, "uia_region")),
+        funding_spent=funding_spent,
+        geohash=project_geohash(project.latitude, project.longitude),
+        workflow_status=WorkflowStatus(
+            _member(WORKFLOW_NAMES, record.get("workflow_status", workflow_status), "workflow_status")
+        ),
+    )
+    return ImportRow(
+        key=natural_key(record, key_fields),
+        values=values,
+        lists={name: getattr(project, name) for name in CHILD_FIELDS},
+    )
+
+
+# Writing
+
+@dataclass
+class ImportStats:
+    """Running totals of an import"""
+    read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    rejected: int = 0
+    duplicates: int = 0
+    child_rows: int = 0
+    batches: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self) -> float:
+        """Records read per second"""
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+    def reject(self, location: str, message: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((location, message))
+
+
+def _upsert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ImportFormatError(f"Bulk import does not support the {dialect} dialect")
+    table = Project.__table__
+    statement = insert(table)
+    excluded = statement.excluded
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.import_key],
+        set_={**{name: excluded[name] for name in IMPORTED_COLUMNS}, "updated_at": excluded.updated_at},
+        where=or_(*(table.c[name].is_distinct_from(excluded[name]) for name in IMPORTED_COLUMNS)),
+    ).returning(table.c.import_key)
+
+
+async def write_batch(db: AsyncSession, batch: List[ImportRow], stats: ImportStats) -> None:
+    """Upsert a batch of rows and their children, in the session's transaction"""
+    rows_by_key: Dict[str, ImportRow] = {}
+    for row in batch:
+        # The last occurrence of a key in the batch wins
+        rows_by_key[row.key] = row
+    stats.duplicates += len(batch) - len(rows_by_key)
+
+    existing = dict((await db.execute(
+        select(Project.import_key, Project.id).where(Project.import_key.in_(list(rows_by_key)))
+    )).all())
+
+    now = datetime.utcnow()
+    ids, values = {}, []
+    for key, row in rows_by_key.items():
+        ids[key] = existing.get(key) or uuid.uuid4()
+        values.append({**row.values, "id": ids[key], "import_key": key, "created_at": now, "updated_at": now})
+    dialect = db.get_bind().dialect.name
+    # Executed with a list of rows, the statement is sent as multi-row INSERTs (SQLAlchemy's
+    # insertmanyvalues) paged under the drivers' parameter limits, and compiled only once
+    written = set((await db.execute(_upsert(dialect), values)).scalars())
+
+    counts, changed_children = await sync_children_bulk(
+        db, {ids[key]: row.lists for key, row in rows_by_key.items()}
+    )
+    # Projects whose only changes are in their lists still count as updated
+    touched = {key for key in rows_by_key if ids[key] in changed_children and key in existing} - written
+    if touched:
+        await db.execute(
+            Project.__table__.update()
+            .where(Project.import_key.in_(list(touched)))
+            .values(updated_at=now)
+        )
+
+    inserted = len(rows_by_key) - len(existing)
+    updated = len(written) - inserted + len(touched)
+    stats.inserted += inserted
+    stats.updated += updated
+    stats.unchanged += len(existing) - updated
+    stats.child_rows += sum(counts.values())
+    stats.batches += 1
+    if inserted or updated:
+        await db.run_sync(bump_dataset_version)
+
+
+async def import_records(
+    session_factory: async_sessionmaker,
+    records: Iterable[Tuple[str, Union[dict, RecordError]]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    key_fields: Sequence[str] = NATURAL_KEY,
+    workflow_status: str = WorkflowStatus.APPROVED.value,
+    dry_run: bool = False,
+    progress: Optional[Callable[[ImportStats], None]] = None,
+) -> ImportStats:
+    """Validate and write records in batches of batch_size, one transaction per batch"""
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    stats = ImportStats()
+
+    async def flush(batch: List[ImportRow]) -> None:
+        if batch and not dry_run:
+            async with session_factory() as db:
+                await write_batch(db, batch, stats)
+                await db.commit()
+        if progress is not None:
+            progress(stats)
+
+    batch: List[ImportRow] = []
+    for location, raw in records:
+        stats.read += 1
+        try:
+            if isinstance(raw, RecordError):
+                raise raw
+            batch.append(prepare_record(raw, key_fields, workflow_status))
+        except RecordError as error:
+            stats.reject(location, str(error))
+        if stats.read % batch_size == 0:
+            await flush(batch)
+            batch = []
+    if batch or stats.read % batch_size:
+        await flush(batch)
+    return stats
@@ -0,0 +1,210 @@
+"""
+reCAPTCHA verification for the public submit endpoint.
+
+One verifier per process (get_captcha_verifier), picked by
+RECAPTCHA_VERIFIER:
+
+- google: calls siteverify through an application-scoped httpx client, so
+  submissions reuse pooled keep-alive connections instead of a new TLS
+  handshake each. Calls are bounded by RECAPTCHA_TIMEOUT_SECONDS, and
+  RECAPTCHA_BREAKER_FAILURES consecutive failures (timeouts, network
+  errors, 5xx) open a circuit breaker: for RECAPTCHA_BREAKER_RESET_SECONDS
+  submissions fail fast with 503 instead of each waiting for the timeout,
+  then one trial call decides whether to close it again.
+- local: accepts any token except ones starting with "invalid", after
+  RECAPTCHA_STUB_LATENCY_MS; for offline development and load tests.
+
+Tokens Google accepted are remembered for RECAPTCHA_CACHE_SECONDS (about
+their own lifetime), since Google answers a second check of the same token
+with timeout-or-duplicate: a client retrying a submission whose response it
+lost is not rejected. The remembered token is used up by that one retry, so
+a solved challenge never admits more than the submission and its retry.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+import httpx
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+VERIFIER_KINDS = ("google", "local")
+CACHE_MAX_TOKENS = 10000
+
+
+class CaptchaUnavailable(RuntimeError):
+    """Raised when the verification service cannot give an answer"""
+
+
+class CircuitBreaker:
+    """Fails fast after repeated failures, until a trial call succeeds"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_running:
+                logger.warning(f"reCAPTCHA circuit opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+
+    def release(self) -> None:
+        """End a call that gave no verdict (e.g. cancelled), so the next one may be the trial"""
+        self._trial_running = False
+
+
+class TokenCache:
+    """Recently verified tokens (hashed), each accepted once more within a fixed time"""
+
+    def __init__(self, ttl_seconds: float, max_tokens: int = CACHE_MAX_TOKENS):
+        self.ttl_seconds = ttl_seconds
+        self.max_tokens = max_tokens
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def take(self, token: str) -> bool:
+        """Whether the token was verified recently; it is forgotten either way"""
+        expiry = self._expiry.pop(self._key(token), None)
+        return expiry is not None and expiry >= time.monotonic()
+
+    def add(self, token: str) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        key = self._key(token)
+        self._expiry[key] = time.monotonic() + self.ttl_seconds
+        self._expiry.move_to_end(key)
+        while len(self._expiry) > self.max_tokens:
+            self._expiry.popitem(last=False)
+
+
+class GoogleCaptchaVerifier:
+    """siteverify client with a shared connection pool, timeouts, breaker and token cache"""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.breaker = CircuitBreaker(settings.RECAPTCHA_BREAKER_FAILURES, settings.RECAPTCHA_BREAKER_RESET_SECONDS)
+        self.cache = TokenCache(settings.RECAPTCHA_CACHE_SECONDS)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                timeout=httpx.Timeout(
+                    settings.RECAPTCHA_TIMEOUT_SECONDS, connect=settings.RECAPTCHA_CONNECT_TIMEOUT_SECONDS
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.RECAPTCHA_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.RECAPTCHA_MAX_CONNECTIONS,
+                ),
+            )
+        return self._client
+
+    async def verify(self, token: str) -> bool:
+        """Whether Google accepts the token; raises CaptchaUnavailable when it cannot tell"""
+        if self.cache.take(token):
+            return True
+        if not self.breaker.allow():
+            raise CaptchaUnavailable("reCAPTCHA verification is temporarily unavailable")
+        try:
+            response = await self.client.post(
+                settings.RECAPTCHA_VERIFY_URL,
+                data={"secret": settings.RECAPTCHA_SECRET_KEY, "response": token},
+            )
+            response.raise_for_status()
+            result = response.json()
+        except (httpx.HTTPError, ValueError) as error:
+            self.breaker.record_failure()
+            logger.warning(f"reCAPTCHA verification failed: {type(error).__name__}: {error}")
+            raise CaptchaUnavailable("Unable to verify reCAPTCHA") from error
+        except BaseException:
+            # Cancelled, e.g. because the submission failed validation: no verdict on Google
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        if result.get("success"):
+            self.cache.add(token)
+            return True
+        return False
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+class LocalCaptchaVerifier:
+    """Offline stand-in accepting every token not starting with 'invalid'"""
+
+    def __init__(self, latency_ms: Optional[int] = None):
+        self.latency_ms = settings.RECAPTCHA_STUB_LATENCY_MS if latency_ms is None else latency_ms
+
+    async def verify(self, token: str) -> bool:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return not token.startswith("invalid")
+
+    async def aclose(self) -> None:
+        pass
+
+
+_verifier = None
+
+
+def get_captcha_verifier():
+    """The process-wide verifier (a FastAPI dependency, so tests can swap it)"""
+    global _verifier
+    if _verifier is None:
+        kind = settings.RECAPTCHA_VERIFIER
+        if kind not in VERIFIER_KINDS:
+            raise ValueError(f"RECAPTCHA_VERIFIER must be one of {', '.join(VERIFIER_KINDS)}, not {kind!r}")
+        if kind == "local":
+            logger.warning("Using the local reCAPTCHA stub: submissions are not checked against Google")
+            _verifier = LocalCaptchaVerifier()
+        else:
+            _verifier = GoogleCaptchaVerifier()
+    return _verifier
+
+
+async def close_captcha_verifier() -> None:
+    """Close the pooled connections on shutdown"""
+    global _verifier
+    verifier, _verifier = _verifier, None
+    if verifier is not None:
+        await verifier.aclose()
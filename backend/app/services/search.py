@@ -0,0 +1,77 @@
+"""
+Ranked full-text search over projects.
+
+Queries the tsvector column on PostgreSQL and the FTS5 table on SQLite
+(see app/models/search.py). Every word of the user's input must match,
+as a prefix, somewhere in the name, place or description texts; accents
+are ignored on both sides.
+"""
+import re
+from typing import Dict, List, Optional
+from uuid import UUID
+from fastapi import Depends, Query
+from sqlalchemy import or_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..core.database import get_db
+from ..models.project import Project, WorkflowStatus
+from ..models.search import SEARCH_COLUMNS, UNACCENT_FUNCTION
+
+# Terms are unaccented like the indexed texts (see app/models/search.py)
+POSTGRES_QUERY = text(f"""
+    SELECT id, ts_rank_cd(search_vector, query) AS rank
+    FROM projects, to_tsquery('simple', {UNACCENT_FUNCTION}(:query)) AS query
+    WHERE search_vector @@ query AND workflow_status = :status
+""")
+
+# bm25() is lower-is-better, with one weight per FTS5 column
+SQLITE_QUERY = text("""
+    SELECT projects.id, -bm25(project_search, 10.0, 5.0, 5.0, 2.0, 1.0, 1.0) AS rank
+    FROM project_search JOIN projects ON projects.rowid = project_search.rowid
+    WHERE project_search MATCH :query AND projects.workflow_status = :status
+""")
+
+
+def search_terms(search: str) -> List[str]:
+    """Split user input into lowercase word tokens"""
+    return re.findall(r"\w+", search.lower())
+
+
+def search_projects(db: Session, search: str) -> Dict[UUID, float]:
+    """Return approved project ids matching the search, mapped to relevance (higher is better)"""
+    terms = search_terms(search)
+    if not terms:
+        return {}
+
+    status = WorkflowStatus.APPROVED.name
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        query = " & ".join(f"{term}:*" for term in terms)
+        rows = db.execute(POSTGRES_QUERY, {"query": query, "status": status})
+    elif dialect == "sqlite":
+        query = " ".join(f'"{term}"*' for term in terms)
+        rows = db.execute(SQLITE_QUERY, {"query": query, "status": status})
+    else:
+        # No full-text index on other databases: unranked substring match
+        filters = [
+            or_(*(getattr(Project, column).ilike(f"%{term}%") for column in SEARCH_COLUMNS))
+            for term in terms
+        ]
+        rows = db.query(Project.id, text("1.0"))\
+            .filter(Project.workflow_status == WorkflowStatus.APPROVED, *filters)
+
+    return {
+        value if isinstance(value, UUID) else UUID(str(value)): float(rank)
+        for value, rank in rows
+    }
+
+
+async def get_search_matches(
+    search: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db)
+) -> Optional[Dict[UUID, float]]:
+    """Dependency resolving the search parameter to ranked project ids"""
+    # Input without word tokens (e.g. "!!!") is no search, as the response cache keys it
+    if not search or not search_terms(search):
+        return None
+    return await db.run_sync(search_projects, search)
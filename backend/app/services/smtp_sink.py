@@ -0,0 +1,125 @@
+"""
+Local SMTP sink for development and tests.
+
+Accepts every message (AUTH included, without checking credentials) and
+keeps it in memory instead of delivering it. Point SMTP_HOST/SMTP_PORT at
+it to watch the outbox worker send:
+
+    python -m app.services.smtp_sink --port 1025
+
+Tests run it in-process (SMTPSink.start on port 0) and can make it refuse
+the next messages with a given reply to exercise retries.
+"""
+import argparse
+import asyncio
+import logging
+from email import message_from_bytes
+from email.message import Message
+from typing import List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPSink:
+    """In-memory SMTP server recording the messages it receives"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.messages: List[Message] = []
+        self.connections = 0
+        # Replies for the next DATA commands, e.g. (451, "Try again later")
+        self.refusals: List[Tuple[int, str]] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._sessions: Set[Tuple[asyncio.Task, asyncio.StreamWriter]] = set()
+
+    async def start(self) -> "SMTPSink":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Close connections clients left open, and let their handlers finish
+            sessions, self._sessions = self._sessions, set()
+            for _, writer in sessions:
+                writer.close()
+            await asyncio.gather(*(task for task, _ in sessions), return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "SMTPSink":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        session = (asyncio.current_task(), writer)
+        self._sessions.add(session)
+
+        async def reply(code: int, *lines: str) -> None:
+            lines = lines or ("OK",)
+            for i, line in enumerate(lines):
+                separator = "-" if i < len(lines) - 1 else " "
+                writer.write(f"{code}{separator}{line}\r\n".encode())
+            await writer.drain()
+
+        await reply(220, "atlas smtp sink")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("latin-1").strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    await reply(250, "atlas", "AUTH PLAIN LOGIN", "8BITMIME", "SMTPUTF8")
+                elif verb == "HELO":
+                    await reply(250, "atlas")
+                elif verb == "AUTH":
+                    await reply(235, "Authentication successful")
+                elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                    await reply(250)
+                elif verb == "DATA":
+                    await reply(354, "End data with <CR><LF>.<CR><LF>")
+                    data = await reader.readuntil(b"\r\n.\r\n")
+                    if self.refusals:
+                        await reply(*self.refusals.pop(0))
+                        continue
+                    # Undo dot-stuffing
+                    body = data[:-5].replace(b"\r\n..", b"\r\n.")
+                    self.messages.append(message_from_bytes(body))
+                    await reply(250, "Queued")
+                elif verb == "QUIT":
+                    await reply(221, "Bye")
+                    break
+                else:
+                    await reply(502, "Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._sessions.discard(session)
+            writer.close()
+
+
+async def _serve(host: str, port: int) -> None:
+    sink = await SMTPSink(host, port).start()
+    logger.info(f"SMTP sink listening on {sink.host}:{sink.port}")
+    seen = 0
+    while True:
+        await asyncio.sleep(0.5)
+        for message in sink.messages[seen:]:
+            logger.info(f"Received '{message['Subject']}' for {message['To']}")
+        seen = len(sink.messages)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Local SMTP sink")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    asyncio.run(_serve(args.host, args.port))
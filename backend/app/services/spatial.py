@@ -0,0 +1,124 @@
+"""
+Bounding-box filtering of projects.
+
+A bbox is west,south,east,north in degrees; west > east means the box
+crosses the antimeridian. Database queries use the spatial index the
+dialect has (see app/models/spatial.py): the R*Tree on SQLite, the PostGIS
+location column when enabled, and geohash prefix ranges otherwise. The
+exact coordinate comparison is always applied on top, since the indexes
+only narrow the candidates.
+"""
+import math
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Select, and_, or_, text
+from ..core.config import settings
+from ..models.project import Project
+from ..models.spatial import GEOHASH_PRECISION, encode_geohash
+
+BoundingBox = Tuple[float, float, float, float]
+
+# Upper bound on the number of geohash ranges a bbox is turned into
+MAX_GEOHASH_RANGES = 32
+
+# Index lookups per box; {i} numbers the bind parameters of each box
+SQLITE_RTREE = (
+    "projects.rowid IN (SELECT id FROM project_rtree WHERE max_lat >= :south_{i} "
+    "AND min_lat <= :north_{i} AND max_lon >= :west_{i} AND min_lon <= :east_{i})"
+)
+POSTGIS_ENVELOPE = (
+    "projects.location && "
+    "ST_MakeEnvelope(:west_{i}, :south_{i}, :east_{i}, :north_{i}, 4326)::geography"
+)
+
+
+def parse_bbox(bbox: str) -> BoundingBox:
+    """Parse a west,south,east,north bounding box in degrees"""
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox must be west,south,east,north"
+        )
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= north <= 90):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox is out of range"
+        )
+    return west, south, east, north
+
+
+def get_bbox(
+    bbox: Optional[str] = Query(None, description="west,south,east,north in degrees")
+) -> Optional[BoundingBox]:
+    """Dependency parsing the optional bbox parameter"""
+    return parse_bbox(bbox) if bbox else None
+
+
+def split_antimeridian(bbox: BoundingBox) -> List[BoundingBox]:
+    """Split a box crossing the antimeridian into two that do not"""
+    west, south, east, north = bbox
+    if west <= east:
+        return [bbox]
+    return [(west, south, 180.0, north), (-180.0, south, east, north)]
+
+
+def in_bbox(latitude: float, longitude: float, bbox: BoundingBox) -> bool:
+    west, south, east, north = bbox
+    if not south <= latitude <= north:
+        return False
+    if west <= east:
+        return west <= longitude <= east
+    return longitude >= west or longitude <= east
+
+
+def geohash_prefixes(bbox: BoundingBox) -> List[str]:
+    """Return geohash prefixes whose cells cover the box"""
+    prefixes = set()
+    for west, south, east, north in split_antimeridian(bbox):
+        # Use the longest prefix that covers the box in few enough cells
+        for precision in range(GEOHASH_PRECISION, 0, -1):
+            lon_bits = math.ceil(5 * precision / 2)
+            lat_bits = 5 * precision // 2
+            width, height = 360.0 / 2 ** lon_bits, 180.0 / 2 ** lat_bits
+            columns = range(int((west + 180) // width), int((min(east, 179.9999999) + 180) // width) + 1)
+            rows = range(int((south + 90) // height), int((min(north, 89.9999999) + 90) // height) + 1)
+            if len(columns) * len(rows) <= MAX_GEOHASH_RANGES or precision == 1:
+                break
+        for row in rows:
+            for column in columns:
+                latitude = -90 + (row + 0.5) * height
+                longitude = -180 + (column + 0.5) * width
+                prefixes.add(encode_geohash(latitude, longitude, precision))
+    return sorted(prefixes)
+
+
+def _coordinate_filter(bbox: BoundingBox):
+    west, south, east, north = bbox
+    latitude = Project.latitude.between(south, north)
+    if west <= east:
+        return and_(latitude, Project.longitude.between(west, east))
+    return and_(latitude, or_(Project.longitude >= west, Project.longitude <= east))
+
+
+def filter_bbox(statement: Select, bbox: BoundingBox, dialect: str) -> Select:
+    """Restrict a select(Project) to projects located inside the box"""
+    boxes = split_antimeridian(bbox)
+
+    if dialect == "sqlite" or (dialect == "postgresql" and settings.POSTGIS_ENABLED):
+        template = SQLITE_RTREE if dialect == "sqlite" else POSTGIS_ENVELOPE
+        index_filter = or_(*(
+            text(template.format(i=i)).bindparams(
+                **{f"west_{i}": w, f"south_{i}": s, f"east_{i}": e, f"north_{i}": n}
+            )
+            for i, (w, s, e, n) in enumerate(boxes)
+        ))
+    else:
+        # "~" sorts after every geohash character, closing each prefix range
+        index_filter = or_(*(
+            and_(Project.geohash >= prefix, Project.geohash < prefix + "~")
+            for prefix in geohash_prefixes(bbox)
+        ))
+
+    return statement.where(index_filter, _coordinate_filter(bbox))
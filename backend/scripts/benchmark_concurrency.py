@@ -0,0 +1,142 @@
+"""
+Measure API throughput under parallel load with sync and async database access.
+
+Serves the project detail query (the statement behind GET /api/projects/{id})
+from two routes of a throwaway app:
+
+- sync: an async route querying through a sync Session, as the routers did
+  before the async engine; every query blocks the event loop
+- async: the same query through an AsyncSession from the async engine, as
+  the routers do now
+
+Requests are sent in-process (httpx over ASGI) by --concurrency clients.
+The projects live in a temporary SQLite file; --latency-ms adds a database
+round-trip delay to each detail query (a SQL function sleeping inside the
+driver), standing in for a database on another host.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from uuid import UUID
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base, async_database_url
+from app.core.loading import PROJECT_DETAIL_LOADING
+from app.core.pool import engine_options
+from app.models.project import Project
+from benchmark_list_payload import make_project
+
+
+def add_latency(engine, latency_ms: float) -> None:
+    """Register db_latency(), which sleeps in the driver's thread like a network round trip"""
+    def db_latency():
+        time.sleep(latency_ms / 1000)
+        return 0
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function("db_latency", 0, db_latency)
+
+
+def detail_statement(project_id):
+    return (
+        select(Project).options(*PROJECT_DETAIL_LOADING)
+        .where(Project.id == project_id, func.db_latency() == 0)
+    )
+
+
+def build_app(url: str, latency_ms: float) -> FastAPI:
+    sync_engine = create_engine(url, **engine_options(url))
+    async_url = async_database_url(url)
+    async_engine = create_async_engine(async_url, **engine_options(async_url))
+    add_latency(sync_engine, latency_ms)
+    add_latency(async_engine.sync_engine, latency_ms)
+    SyncSession = sessionmaker(bind=sync_engine)
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    app = FastAPI()
+
+    @app.get("/sync/{project_id}")
+    async def sync_detail(project_id: UUID):
+        with SyncSession() as db:
+            project = db.execute(detail_statement(project_id)).scalar_one()
+            return {"id": str(project.id), "sdgs": len(project.sdgs)}
+
+    @app.get("/async/{project_id}")
+    async def async_detail(project_id: UUID):
+        async with AsyncSession() as db:
+            project = (await db.execute(detail_statement(project_id))).scalar_one()
+            return {"id": str(project.id), "sdgs": len(project.sdgs)}
+
+    app.state.engines = (sync_engine, async_engine)
+    return app
+
+
+async def run_load(app: FastAPI, mode: str, ids, requests: int, concurrency: int) -> dict:
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def worker(offset: int):
+            for i in range(offset, requests, concurrency):
+                start = time.perf_counter()
+                response = await client.get(f"/{mode}/{ids[i % len(ids)]}")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main(args) -> None:
+    directory = tempfile.mkdtemp(prefix="atlas-benchmark-")
+    url = f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+    app = build_app(url, args.latency_ms)
+    sync_engine, async_engine = app.state.engines
+
+    Base.metadata.create_all(bind=sync_engine)
+    with sessionmaker(bind=sync_engine)() as db:
+        projects = [make_project(i) for i in range(args.projects)]
+        db.add_all(projects)
+        db.commit()
+        ids = [str(p.id) for p in projects]
+
+    print(f"{args.requests} requests, {args.latency_ms:g} ms database latency")
+    print(f"{'mode':<8}{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for concurrency in args.concurrency:
+        for mode in ("sync", "async"):
+            result = await run_load(app, mode, ids, args.requests, concurrency)
+            print(
+                f"{mode:<8}{concurrency:>8}{result['throughput']:>10.1f}"
+                f"{result['p50']:>10.1f}{result['p95']:>10.1f}"
+            )
+
+    sync_engine.dispose()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    asyncio.run(main(parser.parse_args()))
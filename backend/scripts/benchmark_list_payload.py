@@ -0,0 +1,122 @@
+"""
+Measure how many bytes one page of the project listing reads and sends.
+
+Compares three ways of loading a page of projects:
+
+- inline: every projects column, as before the long-form texts became a
+  deferred column group
+- deferred: the default loading of list queries, which leaves the texts out
+- summary: view=summary, only the columns listing cards need
+
+"read" is the size of the projects row values fetched from the database
+(child collections are the same in every mode and left out); "json" is the
+size of the response body. Runs against a throwaway in-memory SQLite
+database filled with synthetic projects.
+"""
+import argparse
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, undefer_group
+from app.core.database import Base
+from app.core.loading import (
+    FULL_FIELDS, PROJECT_CHILDREN_LOADING, SUMMARY_FIELDS, project_loading_options
+)
+from app.core.responses import TrustedJSONResponse
+from app.models.project import (
+    CONTENT_GROUP, Project, ProjectImage, ProjectRequirement, ProjectSDG, ProjectStatus,
+    ProjectTypology, UIARegion, WorkflowStatus
+)
+from app.api.projects import _format_project_response
+
+PAGE_SIZES = (20, 100, 1000)
+
+LOADINGS = {
+    "inline": (FULL_FIELDS, (*PROJECT_CHILDREN_LOADING, undefer_group(CONTENT_GROUP))),
+    "deferred": (
+        tuple(f for f in FULL_FIELDS if f not in ("brief_description", "detailed_description", "success_factors")),
+        PROJECT_CHILDREN_LOADING,
+    ),
+    "summary": (SUMMARY_FIELDS, project_loading_options(SUMMARY_FIELDS)),
+}
+
+
+def make_project(i: int) -> Project:
+    created = datetime(2025, 1, 1) + timedelta(hours=i)
+    project = Project(
+        id=uuid.uuid4(),
+        organization_name="City Council",
+        contact_person="Maria Silva",
+        contact_email=f"contact{i}@example.org",
+        project_name=f"Urban resilience project {i}",
+        project_status=ProjectStatus.IN_PROGRESS,
+        workflow_status=WorkflowStatus.APPROVED,
+        funding_needed=250000.0 + i,
+        funding_spent=1000.0 * i,
+        uia_region=UIARegion.SECTION_V,
+        city="São Paulo",
+        country="Brazil",
+        latitude=-23.55,
+        longitude=-46.63,
+        brief_description="Green corridors connecting neighbourhoods. " * 5,
+        detailed_description="Detailed plan for nature-based drainage. " * 60,
+        success_factors="Community engagement and municipal funding. " * 20,
+        gdpr_consent=True,
+        created_at=created,
+        updated_at=created,
+    )
+    project.sdgs = [ProjectSDG(sdg_number=n) for n in (6, 11, 13)]
+    project.typologies = [ProjectTypology(typology=t) for t in ("Infrastructure", "Public Space")]
+    project.requirements = [ProjectRequirement(requirement_type="funding", requirement="Private Investment")]
+    project.images = [ProjectImage(image_url=f"/project_images/project_{i}.jpg", display_order=0)]
+    return project
+
+
+def value_size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, str)):
+        return len(value.encode() if isinstance(value, str) else value)
+    return len(str(value))
+
+
+def measure(session, size: int, fields, loading) -> tuple:
+    """(bytes of projects row values read, bytes of the JSON page) for one page"""
+    query = session.query(Project).order_by(Project.created_at.desc()).limit(size)
+    rows = session.connection().execute(query.options(*loading).statement).fetchall()
+    read = sum(value_size(value) for row in rows for value in row)
+
+    session.expunge_all()
+    projects = query.options(*loading).all()
+    body = TrustedJSONResponse({"projects": [_format_project_response(p, fields) for p in projects]}).body
+    return read, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--projects", type=int, default=max(PAGE_SIZES), help="synthetic projects to create")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all(make_project(i) for i in range(args.projects))
+    session.commit()
+
+    print(f"{'projects':>8}  {'mode':>8}  {'read bytes':>11}  {'json bytes':>11}  {'read saved':>10}")
+    for size in PAGE_SIZES:
+        baseline = None
+        for mode, (fields, loading) in LOADINGS.items():
+            read, sent = measure(session, size, fields, loading)
+            baseline = baseline or read
+            print(f"{size:>8}  {mode:>8}  {read:>11}  {sent:>11}  {1 - read / baseline:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark of the two ways list endpoints serialize a page of projects.
+
+- validated: what FastAPI does with a returned dict, i.e. validate against
+  ProjectListResponse, convert to JSON-compatible Python and encode with
+  the stdlib json module (JSONResponse)
+- trusted: TrustedJSONResponse, i.e. orjson straight from the dicts
+
+Runs on synthetic, already-formatted projects, so no database is needed.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.core.responses import TrustedJSONResponse
+from app.schemas.project import ProjectListResponse
+
+PAGE_SIZES = (20, 100, 1000)
+
+
+def make_project(i: int) -> dict:
+    created = datetime(2025, 1, 1) + timedelta(hours=i)
+    return {
+        "id": uuid.uuid4(),
+        "project_name": f"Urban resilience project {i}",
+        "organization_name": "City Council",
+        "contact_person": "Maria Silva",
+        "contact_email": f"contact{i}@example.org",
+        "project_status": "In Progress",
+        "workflow_status": "approved",
+        "funding_needed": 250000.0 + i,
+        "funding_spent": 1000.0 * i,
+        "uia_region": "Section V - Americas",
+        "city": "São Paulo",
+        "country": "Brazil",
+        "latitude": -23.55,
+        "longitude": -46.63,
+        "brief_description": "Green corridors connecting neighbourhoods. " * 5,
+        "detailed_description": "Detailed plan for nature-based drainage. " * 60,
+        "success_factors": "Community engagement and municipal funding. " * 20,
+        "typologies": ["Infrastructure", "Public Space"],
+        "funding_requirements": ["Public Sector Funding", "Private Investment"],
+        "government_requirements": ["Permits"],
+        "other_requirements": [],
+        "other_requirement_text": None,
+        "gdpr_consent": True,
+        "sdgs": [6, 11, 13],
+        "image_urls": [f"/project_images/project_{i}.jpg"],
+        "rejection_reason": None,
+        "reviewer_notes": None,
+        "created_at": created,
+        "updated_at": created,
+    }
+
+
+def make_page(size: int) -> dict:
+    return {
+        "total": size,
+        "total_is_approximate": False,
+        "page": 1,
+        "page_size": size,
+        "next_cursor": None,
+        "projects": [make_project(i) for i in range(size)],
+    }
+
+
+FIELD = create_model_field(name="Response_list", type_=ProjectListResponse, mode="serialization")
+LOOP = asyncio.new_event_loop()
+
+
+def validated(page: dict) -> bytes:
+    content = LOOP.run_until_complete(serialize_response(field=FIELD, response_content=page))
+    return JSONResponse(content).body
+
+
+def trusted(page: dict) -> bytes:
+    return TrustedJSONResponse(page).body
+
+
+def measure(function, page: dict, repeat: int) -> float:
+    """Best-of-repeat time of one call, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(page)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="runs per measurement (best is kept)")
+    args = parser.parse_args()
+
+    print(f"{'projects':>8}  {'validated ms':>12}  {'trusted ms':>10}  {'speedup':>7}  {'bytes':>9}")
+    for size in PAGE_SIZES:
+        page = make_page(size)
+        slow = measure(validated, page, args.repeat)
+        fast = measure(trusted, page, args.repeat)
+        print(f"{size:>8}  {slow:>12.2f}  {fast:>10.2f}  {slow / fast:>6.1f}x  {len(trusted(page)):>9}")
+
+
+if __name__ == "__main__":
+    main()
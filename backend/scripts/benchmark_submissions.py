@@ -0,0 +1,148 @@
+"""
+Measure submissions per second of the project submission write path.
+
+Compares two ways of writing a submission and building its response:
+
+- per-row: one ORM add per SDG, typology, requirement and image, then the
+  project read back with its collections, as before bulk inserts
+- bulk: the current path (_create_project in app/api/projects.py), one
+  multi-row INSERT per child table and the response built from the payload
+
+Both queue the admin notification in the same transaction. Submissions are
+written one after another to a temporary SQLite file; --latency-ms adds a
+round-trip delay to every statement, standing in for a database on another
+host, which is where the number of statements shows.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.core.config import settings
+from app.core.database import Base, async_database_url
+from app.core.loading import load_project
+from app.core.pool import engine_options
+from app.models.project import (
+    Project, ProjectImage, ProjectRequirement, ProjectSDG, ProjectTypology, WorkflowStatus
+)
+from app.schemas.project import ProjectCreate
+from app.services.email import queue_submission_notification
+from app.api.projects import _create_project, _format_project_response
+
+SUBMISSION = {
+    "project_name": "Riverside Parks",
+    "organization_name": "City Council",
+    "contact_person": "Ana Costa",
+    "contact_email": "ana@example.org",
+    "project_status": "planned",
+    "funding_needed": 120000,
+    "uia_region": "SECTION_I",
+    "city": "Porto",
+    "country": "Portugal",
+    "latitude": 41.15,
+    "longitude": -8.61,
+    "brief_description": "Green corridors along the river. " * 5,
+    "detailed_description": "Restores the riverbanks as a continuous park. " * 40,
+    "success_factors": "Community stewardship. " * 10,
+    "typologies": ["Green Infrastructure", "Public Space"],
+    "funding_requirements": ["Public Sector Funding", "Private Investment"],
+    "government_requirements": ["Permits"],
+    "other_requirements": ["Volunteers"],
+    "sdgs": [6, 11, 13, 15],
+    "image_urls": [f"/project_images/riverside_{i}.jpg" for i in range(3)],
+    "gdpr_consent": True,
+    "captcha_token": "benchmark",
+}
+
+
+async def per_row_submit(db, project_data: ProjectCreate) -> dict:
+    """The submission path before bulk inserts"""
+    project = Project(
+        organization_name=project_data.organization_name,
+        contact_person=project_data.contact_person,
+        contact_email=project_data.contact_email,
+        project_name=project_data.project_name,
+        project_status=project_data.project_status,
+        workflow_status=WorkflowStatus.SUBMITTED,
+        funding_needed=project_data.funding_needed,
+        uia_region=project_data.uia_region,
+        city=project_data.city,
+        country=project_data.country,
+        latitude=project_data.latitude,
+        longitude=project_data.longitude,
+        brief_description=project_data.brief_description,
+        detailed_description=project_data.detailed_description,
+        success_factors=project_data.success_factors,
+        other_requirement_text=project_data.other_requirement_text,
+        gdpr_consent=project_data.gdpr_consent,
+    )
+    db.add(project)
+    await db.flush()
+    for number in project_data.sdgs:
+        db.add(ProjectSDG(project_id=project.id, sdg_number=number))
+    for typology in project_data.typologies:
+        db.add(ProjectTypology(project_id=project.id, typology=typology))
+    for field, requirement_type in (
+        ("funding_requirements", "funding"), ("government_requirements", "government"),
+        ("other_requirements", "other"),
+    ):
+        for requirement in getattr(project_data, field):
+            db.add(ProjectRequirement(project_id=project.id, requirement_type=requirement_type, requirement=requirement))
+    for order, url in enumerate(project_data.image_urls):
+        db.add(ProjectImage(project_id=project.id, image_url=url, display_order=order))
+    queue_submission_notification(db, settings.ADMIN_EMAIL, project.project_name, "/admin")
+    await db.commit()
+    return _format_project_response(await load_project(db, project.id))
+
+
+async def bulk_submit(db, project_data: ProjectCreate) -> dict:
+    return _format_project_response(await _create_project(db, project_data))
+
+
+async def run(Session, submit, count: int, statements: list) -> dict:
+    project_data = ProjectCreate.model_validate(SUBMISSION)
+    statements.clear()
+    start = time.perf_counter()
+    for _ in range(count):
+        async with Session() as db:
+            await submit(db, project_data)
+    elapsed = time.perf_counter() - start
+    return {"per_second": count / elapsed, "statements": len(statements) / count}
+
+
+async def main(args) -> None:
+    directory = tempfile.mkdtemp(prefix="atlas-benchmark-")
+    url = f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+    Base.metadata.create_all(bind=create_engine(url))
+    async_url = async_database_url(url)
+    engine = create_async_engine(async_url, **engine_options(async_url))
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def round_trip(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+        if args.latency_ms:
+            time.sleep(args.latency_ms / 1000)
+
+    print(f"{args.submissions} sequential submissions, {args.latency_ms:g} ms per statement")
+    print(f"{'path':<10}{'subs/s':>10}{'statements':>12}")
+    for name, submit in (("per-row", per_row_submit), ("bulk", bulk_submit)):
+        result = await run(Session, submit, args.submissions, statements)
+        print(f"{name:<10}{result['per_second']:>10.1f}{result['statements']:>12.1f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    asyncio.run(main(parser.parse_args()))
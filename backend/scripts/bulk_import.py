@@ -0,0 +1,74 @@
+"""
+Import projects from a CSV, NDJSON or XLS/XLSX file into the database.
+
+Streams the file, validates every record with ProjectCreate and upserts
+them in batches on a natural key (see app/services/project_import.py), so
+running it again with the same file changes nothing. Prints progress after
+every batch and the records it rejected at the end.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models.project import WorkflowStatus
+from app.services.project_import import (
+    DEFAULT_BATCH_SIZE, FORMATS, NATURAL_KEY, ImportFormatError, ImportStats, import_records, read_records
+)
+
+
+def report(stats: ImportStats) -> None:
+    print(
+        f"{stats.read:>9,} read {stats.inserted:>9,} new {stats.updated:>8,} updated "
+        f"{stats.unchanged:>8,} unchanged {stats.rejected:>7,} rejected  {stats.rate:>8,.0f} records/s",
+        flush=True,
+    )
+
+
+async def main(args) -> int:
+    try:
+        stats = await import_records(
+            AsyncSessionLocal,
+            read_records(args.path, args.format, args.sheet),
+            batch_size=args.batch_size,
+            key_fields=args.key.split(","),
+            workflow_status=args.workflow_status,
+            dry_run=args.dry_run,
+            progress=report,
+        )
+    except (ImportFormatError, OSError) as error:
+        print(f"ERROR - {error}", file=sys.stderr)
+        return 1
+    finally:
+        await async_engine.dispose()
+
+    print(
+        f"\n{'Validated' if args.dry_run else 'Imported'} {stats.read:,} records in {stats.elapsed:.1f}s "
+        f"({stats.rate:,.0f} records/s, {stats.batches} batches, {stats.child_rows:,} child rows written)"
+    )
+    if stats.duplicates:
+        print(f"{stats.duplicates:,} records repeated a natural key within their batch; the last one was kept")
+    for location, message in stats.errors:
+        print(f"  {location}: {message}")
+    if stats.rejected > len(stats.errors):
+        print(f"  ... and {stats.rejected - len(stats.errors):,} more rejected records")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--sheet", help="worksheet of a spreadsheet (default: the first)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--key", default=",".join(NATURAL_KEY), help="comma-separated natural key fields")
+    parser.add_argument(
+        "--workflow-status", default=WorkflowStatus.APPROVED.value,
+        help="status of new projects without a workflow_status column",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="validate without writing")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,86 @@
+"""
+Check that every project image URL answers with an image, and how large it is.
+
+Fetches the URLs that are due (never checked, or checked more than
+IMAGE_CHECK_MAX_AGE_HOURS ago) concurrently, records status, content type,
+size and dimensions in image_checks (see app/services/image_checks.py),
+then lists the broken images and those above IMAGE_CHECK_MAX_BYTES with
+the projects using them. Run it after seed_github_images.py,
+seed_production_images.py or update_image_urls.py. Exits with 1 when an
+image is broken.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models.project import ImageCheck, Project, ProjectImage
+from app.services.image_checks import check_images
+
+
+async def report(max_bytes: int) -> int:
+    """Print the broken and oversized images; returns how many are broken"""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(ImageCheck, Project.project_name)
+            .join(ProjectImage, ProjectImage.image_url == ImageCheck.url)
+            .join(Project, Project.id == ProjectImage.project_id)
+            .where((ImageCheck.ok.is_(False)) | (ImageCheck.bytes > max_bytes))
+            .order_by(ImageCheck.url, Project.project_name)
+        )).all()
+    projects = {}
+    for check, name in rows:
+        projects.setdefault(check.url, (check, []))[1].append(name)
+
+    broken = 0
+    for url, (check, names) in projects.items():
+        used_by = ", ".join(names)
+        if not check.ok:
+            broken += 1
+            print(f"[BROKEN] {url}: {check.error} ({used_by})")
+        else:
+            print(
+                f"[LARGE] {url}: {check.bytes / 1e6:.1f} MB, {check.width}x{check.height} "
+                f"{check.content_type} ({used_by})"
+            )
+    return broken
+
+
+async def main(args) -> int:
+    if args.base_url:
+        settings.IMAGE_CHECK_BASE_URL = args.base_url
+
+    def progress(row: dict) -> None:
+        if args.verbose:
+            state = "OK" if row["ok"] else "BROKEN"
+            print(f"[{state}] {row['status_code']} {row['url']}")
+
+    stats = await check_images(
+        AsyncSessionLocal, force=args.force, limit=args.limit,
+        concurrency=args.concurrency, per_host=args.per_host, progress=progress,
+    )
+    print(
+        f"{stats.urls} image URLs, {stats.due} due: {stats.ok} ok, {stats.broken} broken, "
+        f"{stats.not_modified} not modified, {stats.pruned} unused checks dropped in {stats.elapsed:.1f}s"
+    )
+    broken = await report(args.max_bytes)
+    await async_engine.dispose()
+    return 1 if broken else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="check every URL, not only the stale ones")
+    parser.add_argument("--limit", type=int, help="check at most this many URLs, oldest first")
+    parser.add_argument("--concurrency", type=int, default=settings.IMAGE_CHECK_CONCURRENCY)
+    parser.add_argument("--per-host", type=int, default=settings.IMAGE_CHECK_PER_HOST)
+    parser.add_argument("--base-url", help="where relative URLs are fetched from (default: IMAGE_CHECK_BASE_URL or FRONTEND_URL)")
+    parser.add_argument("--max-bytes", type=int, default=settings.IMAGE_CHECK_MAX_BYTES, help="report images above this size")
+    parser.add_argument("--verbose", action="store_true", help="print every URL as it is checked")
+    sys.exit(asyncio.run(main(parser.parse_args())))
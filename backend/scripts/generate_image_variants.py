@@ -0,0 +1,67 @@
+"""
+Render the thumbnail, card and hero variants of the project images.
+
+Reads every image URL of the projects, renders the files served from the
+frontend's public folder as WebP and AVIF (IMAGE_VARIANT_FORMATS) into its
+variants/ folder and records them in image_variants (see
+app/services/image_variants.py). Variants are recorded only once the
+deployed frontend serves them: commit and deploy the variants folder, then
+run the script again to record them. Images whose file has not changed since
+the last recorded run are skipped; --force renders them all again. Prints how
+many bytes the variants take against their source files.
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.image_variants import generate_image_variants
+
+
+def main(args) -> int:
+    def progress(url: str, files: int) -> None:
+        print(f"[OK] {url}: {files} variants")
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        stats = generate_image_variants(
+            db, force=args.force, workers=args.workers, progress=progress, verify=not args.no_verify
+        )
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+
+    for url, error in stats.errors:
+        print(f"[ERROR] {url}: {error}", file=sys.stderr)
+    print(
+        f"{stats.images} images: {stats.rendered} rendered, {stats.unchanged} unchanged, "
+        f"{stats.skipped} not local, {stats.failed} failed in {elapsed:.1f}s"
+    )
+    if stats.unpublished:
+        print(
+            f"{len(stats.unpublished)} images have variants the frontend does not serve yet: commit and deploy "
+            f"{settings.PROJECT_IMAGES_DIR}/variants, then run this script again to record them"
+        )
+    if stats.files:
+        print(
+            f"{stats.files} variant files, {stats.variant_bytes / 1e6:.2f} MB "
+            f"for {stats.source_bytes / 1e6:.2f} MB of source images"
+        )
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="render unchanged images again")
+    parser.add_argument(
+        "--no-verify", action="store_true",
+        help="record variants without checking that the frontend serves them (it serves this folder)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes encoding images")
+    sys.exit(main(parser.parse_args()))
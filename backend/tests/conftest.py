@@ -1,27 +1,49 @@
+import os
+import tempfile
+
+# The API (aiosqlite) and the fixtures (pysqlite) share one SQLite file
+TEST_DATABASE = os.path.join(tempfile.mkdtemp(prefix="atlas-tests-"), "test.db")
+
+# Settings are read at import time; provide defaults so the suite runs without a .env
+for key, value in {
+    "DATABASE_URL": f"sqlite:///{TEST_DATABASE}",
+    "SECRET_KEY": "test-secret-key",
+    "RECAPTCHA_SECRET_KEY": "test-recaptcha-secret",
+    # Offline stub: accepts any token not starting with "invalid"
+    "RECAPTCHA_VERIFIER": "local",
+    "SMTP_HOST": "smtp.example.com",
+    "SMTP_USER": "test",
+    "SMTP_PASSWORD": "test",
+    "SMTP_FROM_EMAIL": "noreply@example.com",
+    "ADMIN_EMAIL": "admin@example.com",
+    "FRONTEND_URL": "http://localhost:5173",
+    # Any lazy load or N+1 introduced by a change should fail the suite
+    "RAISE_ON_LAZY_LOAD": "true",
+    "QUERY_BUDGET_PER_REQUEST": "20",
+    "QUERY_BUDGET_ENFORCE": "true",
+}.items():
+    os.environ.setdefault(key, value)
+
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import event
 from fastapi.testclient import TestClient
 from app.main import app
-from app.core.database import Base, get_db
-
-# Use in-memory SQLite for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+from app.core.database import Base, SessionLocal, async_engine, engine
+from app.core.security import create_access_token, get_password_hash
+from app.models.user import User, UserRole
+from app.models.project import (
+    Project, ProjectSDG, ProjectTypology, ProjectRequirement, ProjectImage,
+    ProjectStatus, WorkflowStatus, UIARegion
 )
+from app.core.response_cache import dashboard_cache
+from app.services.dashboard_snapshot import dashboard_snapshot
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 @pytest.fixture(scope="function")
 def db():
     """Create a fresh database for each test."""
     Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
+    db = SessionLocal()
     try:
         yield db
     finally:
@@ -30,14 +52,103 @@ def db():
 
 @pytest.fixture(scope="function")
 def client(db):
-    """Create a test client with overridden database dependency."""
-    def override_get_db():
-        try:
-            yield db
-        finally:
-            db.close()
-
-    app.dependency_overrides[get_db] = override_get_db
+    """Create a test client running the app on the test database."""
+    dashboard_snapshot.invalidate()
+    dashboard_cache.invalidate()
+    dashboard_cache.reset_stats()
     with TestClient(app) as c:
         yield c
-    app.dependency_overrides.clear()
+    dashboard_snapshot.invalidate()
+    dashboard_cache.invalidate()
+
+@pytest.fixture(scope="function")
+def query_counter():
+    """Record every SQL statement sent to the test database."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = (engine, async_engine.sync_engine)
+    for bound in engines:
+        event.listen(bound, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    for bound in engines:
+        event.remove(bound, "before_cursor_execute", before_cursor_execute)
+
+@pytest.fixture(scope="function")
+def make_project(db):
+    """Factory creating a project with its related rows."""
+    def factory(name="Test Project", sdgs=(11,), typologies=("Infrastructure",),
+                funding=("Public Sector Funding",), image_urls=("/project_images/test.jpg",),
+                **fields):
+        values = {
+            "organization_name": "Test Org",
+            "contact_person": "Tester",
+            "contact_email": "tester@example.com",
+            "project_name": name,
+            "project_status": ProjectStatus.PLANNED,
+            "workflow_status": WorkflowStatus.APPROVED,
+            "funding_needed": 1000.0,
+            "funding_spent": 0.0,
+            "uia_region": UIARegion.SECTION_I,
+            "city": "Barcelona",
+            "country": "Spain",
+            "latitude": 41.3851,
+            "longitude": 2.1734,
+            "brief_description": "Brief",
+            "detailed_description": "Detailed",
+            "success_factors": "Factors",
+        }
+        values.update(fields)
+        project = Project(**values)
+        project.sdgs = [ProjectSDG(sdg_number=n) for n in sdgs]
+        project.typologies = [ProjectTypology(typology=t) for t in typologies]
+        project.requirements = [
+            ProjectRequirement(requirement_type="funding", requirement=r) for r in funding
+        ]
+        project.images = [
+            ProjectImage(image_url=url, display_order=i) for i, url in enumerate(image_urls)
+        ]
+        db.add(project)
+        db.commit()
+        db.refresh(project)
+        return project
+    return factory
+
+@pytest.fixture(scope="function")
+def admin_headers(db):
+    """Authorization headers for an admin user."""
+    admin = User(email="admin@example.com", hashed_password=get_password_hash("secret"), role=UserRole.ADMIN)
+    db.add(admin)
+    db.commit()
+    token = create_access_token(data={"sub": str(admin.id)})
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture(scope="function")
+def submission():
+    """Payload of a valid public project submission."""
+    return {
+        "project_name": "Riverside Parks",
+        "organization_name": "City Council",
+        "contact_person": "Ana Costa",
+        "contact_email": "ana@example.org",
+        "project_status": "planned",
+        "funding_needed": 120000,
+        "uia_region": "SECTION_I",
+        "city": "Porto",
+        "country": "Portugal",
+        "latitude": 41.15,
+        "longitude": -8.61,
+        "brief_description": "Green corridors along the river.",
+        "detailed_description": "Restores the riverbanks as a continuous park.",
+        "success_factors": "Community stewardship.",
+        "typologies": ["Green Infrastructure"],
+        "funding_requirements": ["Public Sector Funding"],
+        "government_requirements": ["Permits"],
+        "other_requirements": [],
+        "sdgs": [11, 13],
+        "image_urls": ["/project_images/riverside.jpg"],
+        "gdpr_consent": True,
+        "captcha_token": "test-token",
+    }
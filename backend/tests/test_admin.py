@@ -0,0 +1,178 @@
+import pytest
+from app.core.config import settings
+from app.core.query_budget import QueryBudgetExceeded
+from app.models.project import WorkflowStatus
+
+
+@pytest.mark.parametrize("path", ["/api/admin/pending-projects", "/api/admin/all-projects"])
+def test_admin_lists_batch_child_loads(client, make_project, admin_headers, query_counter, path):
+    for i in range(3):
+        make_project(f"Pending {i}", workflow_status=WorkflowStatus.SUBMITTED)
+    query_counter.clear()
+    client.get(path, headers=admin_headers)
+    queries_for_few = len(query_counter)
+
+    for i in range(15):
+        make_project(f"More {i}", workflow_status=WorkflowStatus.SUBMITTED, sdgs=(1, 2))
+    query_counter.clear()
+    response = client.get(path, params={"page_size": 20}, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json()["total"] == 18
+    assert len(query_counter) == queries_for_few
+
+
+def test_approve_updates_dashboard(client, make_project, admin_headers):
+    project = make_project("Awaiting approval", workflow_status=WorkflowStatus.SUBMITTED, sdgs=(6,))
+    assert client.get("/api/dashboard/kpis").json()["total_projects"] == 0
+
+    response = client.post(f"/api/admin/projects/{project.id}/approve", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["sdgs"] == [6]
+
+    assert client.get("/api/dashboard/kpis").json()["total_projects"] == 1
+    assert client.get("/api/dashboard/analytics/sdg-distribution").json() == [{"sdg": 6, "count": 1}]
+
+    response = client.delete(f"/api/admin/projects/{project.id}", headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get("/api/dashboard/kpis").json()["total_projects"] == 0
+
+
+def test_query_budget_is_enforced(client, make_project, admin_headers, monkeypatch):
+    make_project("Pending", workflow_status=WorkflowStatus.SUBMITTED)
+    monkeypatch.setattr(settings, "QUERY_BUDGET_PER_REQUEST", 2)
+
+    with pytest.raises(QueryBudgetExceeded):
+        client.get("/api/admin/pending-projects", headers=admin_headers)
+
+
+def test_admin_cursor_pagination(client, make_project, admin_headers, query_counter):
+    for i in range(5):
+        make_project(f"Pending {i}", workflow_status=WorkflowStatus.SUBMITTED)
+
+    seen, cursor = [], None
+    while True:
+        params = {"page_size": 2, **({"cursor": cursor} if cursor else {})}
+        query_counter.clear()
+        body = client.get("/api/admin/pending-projects", params=params, headers=admin_headers).json()
+        # user lookup, page with its total, one selectin query per child table and the image variants
+        assert len(query_counter) == 7
+        assert body["total"] == 5
+        seen.extend(p["id"] for p in body["projects"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    by_offset = client.get(
+        "/api/admin/pending-projects", params={"page_size": 100}, headers=admin_headers
+    ).json()
+    assert seen == [p["id"] for p in by_offset["projects"]]
+
+
+def test_admin_approximate_total(client, make_project, admin_headers, monkeypatch):
+    monkeypatch.setattr("app.core.pagination.APPROXIMATE_TOTAL_CAP", 3)
+    for i in range(5):
+        make_project(f"Pending {i}", workflow_status=WorkflowStatus.SUBMITTED)
+
+    body = client.get(
+        "/api/admin/all-projects", params={"total_mode": "approximate", "page_size": 2},
+        headers=admin_headers,
+    ).json()
+    assert body["total"] == 3
+    assert body["total_is_approximate"] is True
+
+    body = client.get(
+        "/api/admin/all-projects", params={"page": 4}, headers=admin_headers
+    ).json()
+    assert body["projects"] == []
+    assert body["total"] == 5
+
+
+def test_admin_list_filters_by_bbox(client, make_project, admin_headers):
+    make_project("Barcelona", workflow_status=WorkflowStatus.SUBMITTED)
+    rome = make_project("Rome", workflow_status=WorkflowStatus.SUBMITTED, latitude=41.90, longitude=12.50)
+    make_project("Nowhere", workflow_status=WorkflowStatus.SUBMITTED, latitude=None, longitude=None)
+
+    params = {"bbox": "10,40,15,45"}
+    body = client.get("/api/admin/all-projects", params=params, headers=admin_headers).json()
+    assert [p["project_name"] for p in body["projects"]] == ["Rome"]
+
+    # The R*Tree follows coordinate edits
+    client.patch(
+        f"/api/admin/projects/{rome.id}",
+        json={"latitude": 48.85, "longitude": 2.35},
+        headers=admin_headers,
+    )
+    body = client.get("/api/admin/pending-projects", params=params, headers=admin_headers).json()
+    assert body["total"] == 0
+
+
+def test_long_texts_only_read_by_detail_views(client, make_project, admin_headers, query_counter):
+    project = make_project("Texts", detailed_description="Long text " * 100, edit_token="edit-me")
+
+    def reads_texts(response):
+        assert response.status_code == 200
+        return any("detailed_description" in statement for statement in query_counter)
+
+    for path in ("/api/admin/all-projects", "/api/dashboard/map-markers"):
+        query_counter.clear()
+        assert not reads_texts(client.get(path, params={"view": "summary"}, headers=admin_headers))
+
+    for path in (f"/api/projects/{project.id}", f"/api/admin/projects/{project.id}", "/api/projects/edit/edit-me"):
+        query_counter.clear()
+        response = client.get(path, headers=admin_headers)
+        assert reads_texts(response)
+        assert response.json()["detailed_description"].startswith("Long text")
+
+
+def _child_writes(statements):
+    tables = ("project_sdgs", "project_typologies", "project_requirements", "project_images")
+    return [
+        " ".join(s.split()[:3]) for s in statements
+        if s.split()[0].upper() in ("INSERT", "UPDATE", "DELETE") and any(t in s.split()[:3] for t in tables)
+    ]
+
+
+def test_patch_applies_list_fields_with_minimal_writes(client, make_project, admin_headers, query_counter):
+    project = make_project("Lists", sdgs=(3, 11), image_urls=("/a.jpg", "/b.jpg"))
+
+    query_counter.clear()
+    response = client.patch(f"/api/admin/projects/{project.id}", json={"sdgs": [3, 13]}, headers=admin_headers)
+    assert response.status_code == 200
+    assert sorted(response.json()["sdgs"]) == [3, 13]
+    # One SDG changed: one row updated in place
+    assert _child_writes(query_counter) == ["UPDATE project_sdgs SET"]
+
+    response = client.patch(f"/api/admin/projects/{project.id}", json={
+        "typologies": ["Housing", "Mobility"],
+        "government_requirements": ["Zoning"],
+        "image_urls": ["/b.jpg", "/a.jpg", "/c.jpg"],
+        "city": "Lisbon",
+    }, headers=admin_headers)
+    body = response.json()
+    assert body["typologies"] == ["Housing", "Mobility"]
+    assert body["government_requirements"] == ["Zoning"]
+    # Lists not in the request are kept
+    assert body["funding_requirements"] == ["Public Sector Funding"]
+    assert body["image_urls"] == ["/b.jpg", "/a.jpg", "/c.jpg"]
+    assert body["city"] == "Lisbon"
+
+
+def test_unchanged_resubmission_writes_no_child_rows(client, make_project, submission, query_counter):
+    project = make_project("Resubmitted", workflow_status=WorkflowStatus.CHANGES_REQUESTED, edit_token="edit-me")
+    resubmission = {
+        **submission, "project_name": "Resubmitted", "sdgs": [11], "typologies": ["Infrastructure"],
+        "funding_requirements": ["Public Sector Funding"], "government_requirements": [],
+        "other_requirements": [], "image_urls": ["/project_images/test.jpg"],
+    }
+
+    query_counter.clear()
+    response = client.put("/api/projects/edit/edit-me", json=resubmission)
+    assert response.status_code == 200
+    assert _child_writes(query_counter) == []
+
+    query_counter.clear()
+    response = client.put("/api/projects/edit/edit-me", json={**resubmission, "other_requirements": ["Training"]})
+    assert response.json()["other_requirements"] == ["Training"]
+    assert _child_writes(query_counter) == ["INSERT INTO project_requirements"]
+    assert response.json()["workflow_status"] == "submitted"
@@ -0,0 +1,102 @@
+import gzip
+import hashlib
+import brotli
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.core import response_cache
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.core.config import settings
+from app.core.response_cache import dashboard_cache
+
+
+def _raw_get(client, path, encoding):
+    with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert negotiate_encoding("br;q=0, *") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("") is None
+
+
+def _incompressible_projects(make_project, count):
+    """Projects whose descriptions keep the compressed listing well above COMPRESSION_MIN_SIZE"""
+    for i in range(count):
+        digest = hashlib.sha256(str(i).encode()).hexdigest()
+        make_project(f"Compressed {i}", brief_description=f"{digest} {digest[::-1]}")
+
+
+def test_large_responses_are_compressed(client, make_project):
+    _incompressible_projects(make_project, 20)
+    identity, plain = _raw_get(client, "/api/dashboard/projects", "identity")
+    assert "content-encoding" not in identity.headers
+    # Identity responses vary too, so a shared cache does not hand them to every client
+    assert identity.headers["vary"] == "Accept-Encoding"
+    without_header = client.get("/api/dashboard/projects", headers={"Accept-Encoding": ""})
+    assert without_header.headers["x-cache"] == "HIT"
+    assert without_header.headers["vary"] == "Accept-Encoding"
+
+    for encoding, decompress in (("gzip", gzip.decompress), ("br", brotli.decompress)):
+        response, body = _raw_get(client, "/api/dashboard/projects", encoding)
+        # Encoded once, by the response cache, however large the encoded body
+        assert len(body) > 2 * settings.COMPRESSION_MIN_SIZE
+        assert response.headers["content-encoding"] == encoding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["etag"] == "W/" + identity.headers["etag"]
+        assert int(response.headers["content-length"]) == len(body) < len(plain) / 3
+        assert decompress(body) == plain
+
+    # The weak ETag still revalidates
+    response = client.get(
+        "/api/dashboard/projects",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]},
+    )
+    assert response.status_code == 304
+
+
+def test_small_responses_are_not_compressed(client):
+    response, body = _raw_get(client, "/health", "gzip")
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert body == b'{"status":"healthy"}'
+
+
+def test_cache_hits_reuse_compressed_body(client, make_project, monkeypatch):
+    _incompressible_projects(make_project, 20)
+    calls = []
+    compress = response_cache.compress
+    monkeypatch.setattr(response_cache, "compress", lambda body, encoding: calls.append(encoding) or compress(body, encoding))
+
+    bodies = set()
+    for _ in range(3):
+        response, body = _raw_get(client, "/api/dashboard/projects", "gzip")
+        assert response.headers["content-encoding"] == "gzip"
+        bodies.add(body)
+
+    assert calls == ["gzip"]
+    assert len(bodies) == 1
+    assert dashboard_cache.stats["hits"] == 2
+
+
+def test_streamed_responses_are_compressed_incrementally():
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream():
+        async def rows():
+            for i in range(200):
+                yield f'{{"row": {i}, "label": "Section V - Americas"}}\n'.encode()
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    app.add_middleware(CompressionMiddleware)
+    with TestClient(app) as client:
+        response, body = _raw_get(client, "/stream", "gzip")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    lines = gzip.decompress(body).splitlines()
+    assert len(lines) == 200 and lines[-1] == b'{"row": 199, "label": "Section V - Americas"}'
@@ -0,0 +1,445 @@
+import asyncio
+import time
+import pytest
+from app.core.config import settings
+from app.models.project import WorkflowStatus
+from app.core.response_cache import ResponseCache, ResponseCacheMiddleware, dashboard_cache
+from app.services.dashboard_snapshot import DashboardSnapshot, dashboard_snapshot
+
+
+def _map_marker_queries(client, query_counter):
+    dashboard_snapshot.invalidate()
+    dashboard_cache.invalidate()
+    query_counter.clear()
+    response = client.get("/api/dashboard/map-markers")
+    assert response.status_code == 200
+    return len(query_counter), response.json()
+
+
+def test_map_markers_query_count_does_not_grow(client, make_project, query_counter):
+    make_project("First", sdgs=(13, 4))
+    queries_for_one, markers = _map_marker_queries(client, query_counter)
+    assert len(markers) == 1
+
+    for i in range(25):
+        make_project(f"Project {i}", sdgs=(17, 3, 9))
+    queries_for_many, markers = _map_marker_queries(client, query_counter)
+    assert len(markers) == 26
+
+    assert queries_for_many == queries_for_one
+
+
+def test_map_markers_warm_snapshot_only_checks_version(client, make_project, query_counter):
+    make_project("First")
+    client.get("/api/dashboard/map-markers")
+
+    query_counter.clear()
+    response = client.get("/api/dashboard/map-markers", params={"sdg": 11})
+    assert response.status_code == 200
+    assert len(query_counter) == 1
+    assert "dataset_version" in query_counter[0]
+
+
+def test_map_markers_primary_sdg_is_lowest(client, make_project):
+    make_project("Multi SDG", sdgs=(13, 4, 11))
+    make_project("No coordinates", latitude=None, longitude=None)
+
+    markers = client.get("/api/dashboard/map-markers").json()
+
+    assert len(markers) == 1
+    assert markers[0]["project_name"] == "Multi SDG"
+    assert markers[0]["primary_sdg"] == 4
+    assert markers[0]["image_url"] == "/project_images/test.jpg"
+
+
+def _walk_cursor_pages(client, path, params, headers=None):
+    ids, cursor = [], None
+    while True:
+        page_params = dict(params, cursor=cursor) if cursor else params
+        body = client.get(path, params=page_params, headers=headers).json()
+        ids.extend(p["id"] for p in body["projects"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return ids, body["total"]
+
+
+def test_dashboard_cursor_pages_match_offset_pages(client, make_project):
+    for i in range(7):
+        make_project(f"Project {i % 3}", funding_needed=float(i % 2) * 500)
+
+    for sort_by in ("created_at", "project_name", "funding_needed"):
+        for sort_order in ("asc", "desc"):
+            params = {"page_size": 3, "sort_by": sort_by, "sort_order": sort_order}
+            by_cursor, total = _walk_cursor_pages(client, "/api/dashboard/projects", params)
+            full = client.get(
+                "/api/dashboard/projects", params=dict(params, page_size=100)
+            ).json()
+
+            assert total == 7
+            assert by_cursor == [p["id"] for p in full["projects"]]
+            assert full["next_cursor"] is None
+
+
+def test_dashboard_rejects_cursor_for_other_sort(client, make_project):
+    for i in range(3):
+        make_project(f"Project {i}")
+    cursor = client.get("/api/dashboard/projects", params={"page_size": 1}).json()["next_cursor"]
+
+    response = client.get(
+        "/api/dashboard/projects", params={"cursor": cursor, "sort_by": "project_name"}
+    )
+    assert response.status_code == 400
+
+
+def test_bundle_matches_individual_endpoints(client, make_project):
+    make_project("Green roofs", sdgs=(11, 13), city="Lyon", country="France")
+    make_project("Water harvesting", sdgs=(6,), city="Mexico City", country="Mexico",
+                 typologies=("Educational",), funding=("Private Investment",))
+    make_project("Library parks", sdgs=(4, 11), city="Medellín", country="Colombia")
+
+    for filters in ({}, {"sdg": 11}, {"city": "Lyon"}, {"search": "water"}, {"funded_by": "Private Investment"}):
+        bundle = client.get("/api/dashboard/bundle", params=filters).json()
+
+        assert bundle["filters"] == client.get("/api/dashboard/filters").json()
+        assert bundle["kpis"] == client.get("/api/dashboard/kpis", params=filters).json()
+        assert bundle["map_markers"] == client.get("/api/dashboard/map-markers", params=filters).json()
+        without = lambda key: {k: v for k, v in filters.items() if k != key}
+        assert bundle["sdg_distribution"] == client.get(
+            "/api/dashboard/analytics/sdg-distribution", params=without("sdg")).json()
+        assert bundle["regional_distribution"] == client.get(
+            "/api/dashboard/analytics/regional-distribution", params=without("region")).json()
+        assert bundle["typology_distribution"] == client.get(
+            "/api/dashboard/analytics/typology-distribution", params=without("city")).json()
+
+
+def test_search_ranks_name_matches_first(client, make_project):
+    make_project("Rainwater harvesting schools", city="Mexico City", country="Mexico")
+    make_project("Green corridors", detailed_description="Bioswales capture rainwater in streets")
+    make_project("Library parks", city="Medellín", country="Colombia")
+    make_project("Rainwater pilot", workflow_status="SUBMITTED")
+
+    body = client.get(
+        "/api/dashboard/projects", params={"search": "rainwat", "sort_by": "relevance"}
+    ).json()
+    assert body["total"] == 2
+    assert [p["project_name"] for p in body["projects"]] == [
+        "Rainwater harvesting schools", "Green corridors"
+    ]
+
+    # Accents are ignored and every word must match
+    assert client.get("/api/dashboard/kpis", params={"search": "medellin"}).json()["total_projects"] == 1
+    assert client.get("/api/dashboard/kpis", params={"search": "Méxíco"}).json()["total_projects"] == 1
+    assert client.get("/api/dashboard/kpis", params={"search": "library tokyo"}).json()["total_projects"] == 0
+
+
+def test_search_without_words_is_no_search(client, make_project):
+    make_project("Coastal defences")
+    # Cached under the same key as the unfiltered request, so it must give the same answer
+    assert client.get("/api/dashboard/kpis", params={"search": "!!!"}).json()["total_projects"] == 1
+    response = client.get("/api/dashboard/kpis")
+    assert response.headers["x-cache"] == "HIT"
+    assert response.json()["total_projects"] == 1
+
+
+def test_search_index_follows_admin_edits(client, make_project, admin_headers):
+    project = make_project("Coastal defences")
+    assert client.get("/api/dashboard/kpis", params={"search": "mangrove"}).json()["total_projects"] == 0
+
+    response = client.patch(
+        f"/api/admin/projects/{project.id}",
+        json={"brief_description": "Mangrove restoration along the coast"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    assert client.get("/api/dashboard/kpis", params={"search": "mangrove"}).json()["total_projects"] == 1
+
+
+WORLD = "-180,-85,180,85"
+
+
+def test_map_clusters_split_with_zoom(client, make_project):
+    make_project("Barcelona A", sdgs=(11, 4))
+    make_project("Barcelona B", sdgs=(4,), latitude=41.40, longitude=2.17)
+    make_project("Rome", sdgs=(6,), latitude=41.90, longitude=12.50)
+
+    world = client.get("/api/dashboard/map-clusters", params={"bbox": WORLD, "zoom": 0}).json()
+    assert world["markers"] == []
+    assert [c["count"] for c in world["clusters"]] == [3]
+    assert world["clusters"][0]["primary_sdg"] == 4
+    assert world["clusters"][0]["region"] == "SECTION_I"
+
+    city = client.get("/api/dashboard/map-clusters", params={"bbox": WORLD, "zoom": 8}).json()
+    assert [c["count"] for c in city["clusters"]] == [2]
+    assert [m["project_name"] for m in city["markers"]] == ["Rome"]
+
+    street = client.get("/api/dashboard/map-clusters", params={"bbox": "2,41,3,42", "zoom": 18}).json()
+    assert street["clusters"] == []
+    assert sorted(m["project_name"] for m in street["markers"]) == ["Barcelona A", "Barcelona B"]
+
+
+def test_map_clusters_apply_filters_and_follow_approval(client, make_project, admin_headers):
+    make_project("Barcelona A", sdgs=(11,))
+    pending = make_project("Barcelona B", sdgs=(4,), workflow_status=WorkflowStatus.SUBMITTED)
+    params = {"bbox": WORLD, "zoom": 2}
+
+    body = client.get("/api/dashboard/map-clusters", params=params).json()
+    assert body["clusters"] == [] and len(body["markers"]) == 1
+
+    client.post(f"/api/admin/projects/{pending.id}/approve", headers=admin_headers)
+    body = client.get("/api/dashboard/map-clusters", params=params).json()
+    assert [c["count"] for c in body["clusters"]] == [2]
+
+    body = client.get("/api/dashboard/map-clusters", params=dict(params, sdg=4)).json()
+    assert [m["project_name"] for m in body["markers"]] == ["Barcelona B"]
+
+
+def test_map_clusters_rejects_bad_bbox(client):
+    response = client.get("/api/dashboard/map-clusters", params={"bbox": "1,2,3", "zoom": 3})
+    assert response.status_code == 400
+
+
+def test_bbox_limits_markers_and_listing(client, make_project):
+    make_project("Barcelona")
+    make_project("Rome", latitude=41.90, longitude=12.50)
+    make_project("Auckland", latitude=-36.85, longitude=174.76)
+    make_project("Honolulu", latitude=21.31, longitude=-157.86)
+
+    markers = client.get("/api/dashboard/map-markers", params={"bbox": "0,35,15,45"}).json()
+    assert sorted(m["project_name"] for m in markers) == ["Barcelona", "Rome"]
+
+    # A box across the antimeridian, from New Zealand to Hawaii
+    body = client.get("/api/dashboard/projects", params={"bbox": "170,-40,-150,25"}).json()
+    assert body["total"] == 2
+    assert sorted(p["project_name"] for p in body["projects"]) == ["Auckland", "Honolulu"]
+
+
+def test_dashboard_conditional_get(client, make_project, admin_headers):
+    make_project("Published")
+    pending = make_project("Pending", workflow_status=WorkflowStatus.SUBMITTED)
+
+    first = client.get("/api/dashboard/kpis", params={"region": "SECTION_I"})
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("public")
+    assert "last-modified" in first.headers
+
+    cached = client.get("/api/dashboard/kpis", params={"region": "SECTION_I"},
+                        headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    # Other filters are another representation
+    other = client.get("/api/dashboard/kpis", params={"region": "SECTION_II"},
+                       headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+    # An approval bumps the dataset version
+    client.post(f"/api/admin/projects/{pending.id}/approve", headers=admin_headers)
+    fresh = client.get("/api/dashboard/kpis", params={"region": "SECTION_I"},
+                       headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+    assert fresh.json()["total_projects"] == 2
+
+
+def test_snapshot_rebuilds_when_another_worker_bumps_version(client, make_project, db):
+    from app.services.dataset_version import bump_dataset_version
+
+    make_project("First")
+    assert client.get("/api/dashboard/kpis").json()["total_projects"] == 1
+
+    # A change committed elsewhere: the snapshot here was not told about it
+    make_project("Second")
+    bump_dataset_version(db)
+    db.commit()
+    dashboard_cache.invalidate()  # as once the cached response expires
+    assert client.get("/api/dashboard/kpis").json()["total_projects"] == 2
+
+
+def test_snapshot_rebuild_runs_off_the_event_loop(client, make_project, monkeypatch):
+    make_project("First")
+    make_project("Second")
+    on_loop = []
+    add = DashboardSnapshot._add
+
+    def recording_add(snapshot, project):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        add(snapshot, project)
+
+    monkeypatch.setattr(DashboardSnapshot, "_add", recording_add)
+    assert client.get("/api/dashboard/kpis").json()["total_projects"] == 2
+    assert on_loop == [False, False]
+
+
+def test_last_modified_comes_from_the_dataset_version(client, make_project, admin_headers, db):
+    from app.services.dataset_version import get_dataset_version
+
+    pending = make_project("Pending", workflow_status=WorkflowStatus.SUBMITTED)
+    client.get("/api/dashboard/kpis")
+    client.post(f"/api/admin/projects/{pending.id}/approve", headers=admin_headers)
+
+    # Advanced in place, with the time stored next to the version rather than this worker's clock
+    db.expire_all()
+    assert (dashboard_snapshot.version, dashboard_snapshot.modified_at) == tuple(get_dataset_version(db))
+
+
+def test_response_cache_shares_neutral_filters(client, make_project, admin_headers, query_counter):
+    make_project("Published")
+
+    first = client.get("/api/dashboard/kpis")
+    assert first.headers["x-cache"] == "MISS"
+
+    query_counter.clear()
+    second = client.get("/api/dashboard/kpis", params={"region": "All Regions", "search": "  "})
+    assert second.headers["x-cache"] == "HIT"
+    assert second.content == first.content
+    assert query_counter == []
+
+    cached = client.get("/api/dashboard/kpis", headers={"If-None-Match": first.headers["etag"]})
+    assert cached.status_code == 304
+
+    stats = client.get("/api/admin/cache-stats", headers=admin_headers).json()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+
+
+def test_response_cache_invalidated_by_workflow(client, make_project, admin_headers):
+    pending = make_project("Pending", workflow_status=WorkflowStatus.SUBMITTED)
+    assert client.get("/api/dashboard/kpis").json()["total_projects"] == 0
+
+    client.post(f"/api/admin/projects/{pending.id}/approve", headers=admin_headers)
+    response = client.get("/api/dashboard/kpis")
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["total_projects"] == 1
+
+
+def test_response_cache_serves_stale_while_refreshing(client, make_project, db, monkeypatch):
+    from app.services.dataset_version import bump_dataset_version
+
+    make_project("First")
+    client.get("/api/dashboard/kpis")
+
+    # Another worker publishes a project and the entry expires
+    make_project("Second")
+    bump_dataset_version(db)
+    db.commit()
+    monkeypatch.setattr(settings, "DASHBOARD_CACHE_TTL_SECONDS", 0)
+
+    stale = client.get("/api/dashboard/kpis")
+    assert stale.headers["x-cache"] == "STALE"
+    assert stale.json()["total_projects"] == 1
+
+    for _ in range(100):
+        if dashboard_cache.stats["refreshes"]:
+            break
+        time.sleep(0.01)
+    monkeypatch.setattr(settings, "DASHBOARD_CACHE_TTL_SECONDS", 30)
+    fresh = client.get("/api/dashboard/kpis")
+    assert fresh.headers["x-cache"] == "HIT"
+    assert fresh.json()["total_projects"] == 2
+
+
+@pytest.mark.asyncio
+async def test_response_cache_coalesces_misses_and_skips_invalidated_renders():
+    cache = ResponseCache()
+    renders = []
+
+    async def endpoint(scope, receive, send):
+        release = asyncio.Event()
+        renders.append(release)
+        body = str(len(renders)).encode()
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+    middleware = ResponseCacheMiddleware(endpoint, cache)
+
+    async def get(query=b""):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/api/dashboard/kpis", "query_string": query, "headers": []}
+        await middleware(scope, None, send)
+        return messages[-1]["body"]
+
+    async def started(count):
+        while len(renders) < count:
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.01)
+
+    # Concurrent misses on one key share a single render
+    requests = [asyncio.ensure_future(get()) for _ in range(3)]
+    requests.append(asyncio.ensure_future(get(b"region=All+Regions")))
+    await started(1)
+    renders[0].set()
+    assert await asyncio.wait_for(asyncio.gather(*requests), 1) == [b"1"] * 4
+    assert len(renders) == 1
+
+    # An admin action during a render: requests after it render again, and the
+    # earlier render is not stored even when it finishes last
+    cache.invalidate()
+    before = asyncio.ensure_future(get())
+    await started(2)
+    cache.invalidate()
+    after = asyncio.ensure_future(get())
+    await started(3)
+    renders[2].set()
+    assert await asyncio.wait_for(after, 1) == b"3"
+    renders[1].set()
+    assert await asyncio.wait_for(before, 1) == b"2"
+    assert cache.lookup(("/api/dashboard/kpis", ()))[0].body == b"3"
+    assert cache.pending == {}
+
+
+def test_trusted_listing_matches_validated_schema(client, make_project):
+    from app.schemas.project import ProjectListResponse
+
+    make_project("Validated", sdgs=(3, 5), funding=("Private", "Public"))
+    body = client.get("/api/dashboard/projects").json()
+
+    assert ProjectListResponse.model_validate(body).model_dump(mode="json") == body
+    schema = client.get("/openapi.json").json()
+    response_schema = schema["paths"]["/api/dashboard/projects"]["get"]["responses"]["200"]
+    refs = [option["$ref"] for option in response_schema["content"]["application/json"]["schema"]["anyOf"]]
+    assert [ref.rsplit("/", 1)[1] for ref in refs] == ["ProjectListResponse", "ProjectSummaryListResponse"]
+
+
+def test_summary_view_skips_large_text(client, make_project, query_counter):
+    from app.core.loading import SUMMARY_FIELDS
+
+    make_project("Summary", detailed_description="Long text " * 100)
+    client.get("/api/dashboard/map-markers")
+
+    query_counter.clear()
+    project = client.get("/api/dashboard/projects", params={"view": "summary"}).json()["projects"][0]
+    assert tuple(project) == SUMMARY_FIELDS
+    assert len(query_counter) == 1 and "dataset_version" in query_counter[0]
+
+    query_counter.clear()
+    project = client.get("/api/dashboard/projects").json()["projects"][0]
+    assert project["detailed_description"].startswith("Long text")
+    assert any("detailed_description" in statement for statement in query_counter)
+
+
+def test_fields_parameter_selects_columns(client, make_project, query_counter):
+    make_project("Fields", brief_description="Short pitch")
+
+    projects = client.get("/api/dashboard/projects", params={"fields": "city,sdgs"}).json()["projects"]
+    assert list(projects[0]) == ["id", "city", "sdgs"]
+
+    query_counter.clear()
+    projects = client.get(
+        "/api/dashboard/projects", params={"fields": "project_name,brief_description"}
+    ).json()["projects"]
+    assert projects == [{"id": projects[0]["id"], "project_name": "Fields", "brief_description": "Short pitch"}]
+    project_selects = [s for s in query_counter if "FROM projects" in s]
+    assert project_selects and all("detailed_description" not in s for s in project_selects)
+
+    response = client.get("/api/dashboard/projects", params={"fields": "city,password"})
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
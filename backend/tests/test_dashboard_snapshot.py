@@ -0,0 +1,174 @@
+import itertools
+import pytest
+from sqlalchemy.orm import selectinload
+from app.core.deps import get_current_admin
+from app.main import app
+from app.models.project import Project, UIARegion, WorkflowStatus
+from app.services.dashboard_snapshot import dashboard_snapshot
+
+REGIONS = (None, "SECTION_I", "SECTION_III")
+SDGS = (None, 6, 11)
+CITIES = (None, "Barcelona", "Nairobi")
+FUNDING = (None, "Public Sector Funding", "Private Sector")
+
+# Every dashboard endpoint and the filters it takes
+ENDPOINTS = {
+    "/api/dashboard/kpis": ("region", "sdg", "city", "funded_by"),
+    "/api/dashboard/analytics/sdg-distribution": ("region", "city", "funded_by"),
+    "/api/dashboard/analytics/regional-distribution": ("sdg", "city", "funded_by"),
+    "/api/dashboard/analytics/typology-distribution": ("region", "sdg", "funded_by"),
+}
+
+
+@pytest.fixture
+def dataset(make_project):
+    """Ids of approved projects spread over regions, cities, SDGs and funding, plus unpublished ones"""
+    projects = {
+        "roofs": make_project(
+            "Green Roofs", sdgs=(11, 13), typologies=("Infrastructure", "Public Space"),
+            funding_needed=5000.0, funding_spent=1200.0,
+        ),
+        "water": make_project(
+            "Clean Water", sdgs=(6,), typologies=("Infrastructure",),
+            funding=("Public Sector Funding", "Private Sector"),
+            city="Nairobi", country="Kenya", uia_region=UIARegion.SECTION_III,
+            latitude=-1.2921, longitude=36.8219, funding_needed=8000.0, funding_spent=500.0,
+        ),
+        "housing": make_project(
+            "Affordable Housing", sdgs=(1, 11), typologies=("Housing",), funding=("Private Sector",),
+            city="Madrid", funding_needed=12000.0, funding_spent=3000.0,
+        ),
+        "wells": make_project(
+            "Village Wells", sdgs=(6, 3), typologies=("Infrastructure", "Housing"), funding=(),
+            city="Nairobi", country="Kenya", uia_region=UIARegion.SECTION_III,
+            latitude=None, longitude=None, funding_needed=2000.0,
+        ),
+        "pending": make_project(
+            "Pending Park", sdgs=(15,), typologies=("Public Space",), city="Lisbon", country="Portugal",
+            workflow_status=WorkflowStatus.SUBMITTED, funding_needed=700.0,
+        ),
+        "rejected": make_project(
+            "Rejected Plaza", sdgs=(11,), city="Barcelona", workflow_status=WorkflowStatus.REJECTED,
+        ),
+    }
+    return {name: project.id for name, project in projects.items()}
+
+
+@pytest.fixture
+def as_admin():
+    """Let the test client call the admin endpoints"""
+    app.dependency_overrides[get_current_admin] = lambda: None
+    yield
+    app.dependency_overrides.pop(get_current_admin, None)
+
+
+def _approved(db):
+    """The approved projects as the database has them now"""
+    db.expire_all()
+    return db.query(Project).options(
+        selectinload(Project.sdgs),
+        selectinload(Project.typologies),
+        selectinload(Project.requirements),
+    ).filter(Project.workflow_status == WorkflowStatus.APPROVED).all()
+
+
+def _funding_sources(project):
+    return {r.requirement for r in project.requirements if r.requirement_type == "funding"}
+
+
+def _matches(project, region=None, sdg=None, city=None, funded_by=None):
+    return (
+        (region is None or project.uia_region.value == region)
+        and (sdg is None or sdg in {s.sdg_number for s in project.sdgs})
+        and (city is None or project.city == city)
+        and (funded_by is None or funded_by in _funding_sources(project))
+    )
+
+
+def _expected(path, projects):
+    """What an endpoint should return for the given projects, computed from the rows"""
+    if path.endswith("/kpis"):
+        return {
+            "total_projects": len(projects),
+            "cities_engaged": len({p.city for p in projects if p.city}),
+            "countries_represented": len({p.country for p in projects}),
+            "total_funding_needed": sum(p.funding_needed for p in projects),
+            "total_funding_spent": sum(p.funding_spent for p in projects),
+        }
+    if path.endswith("/sdg-distribution"):
+        counts = {}
+        for project in projects:
+            for sdg in {s.sdg_number for s in project.sdgs}:
+                counts[sdg] = counts.get(sdg, 0) + 1
+        return [{"sdg": sdg, "count": count} for sdg, count in sorted(counts.items())]
+    if path.endswith("/regional-distribution"):
+        regions = {}
+        for project in projects:
+            count, needed = regions.get(project.uia_region.value, (0, 0.0))
+            regions[project.uia_region.value] = (count + 1, needed + project.funding_needed)
+        return [
+            {"region": region, "project_count": count, "funding_needed": needed}
+            for region, (count, needed) in sorted(regions.items())
+        ]
+    counts = {}
+    for project in projects:
+        for typology in {t.typology for t in project.typologies}:
+            counts[typology] = counts.get(typology, 0) + 1
+    return [
+        {"typology": typology, "count": count}
+        for typology, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    ]
+
+
+def _filter_combinations():
+    """Every filter alone and every pair of filters"""
+    for values in itertools.product(REGIONS, SDGS, CITIES, FUNDING):
+        if sum(value is not None for value in values) <= 2:
+            yield dict(zip(("region", "sdg", "city", "funded_by"), values))
+
+
+def _assert_matches_database(client, db):
+    """Compare every endpoint with the database, without and with filters"""
+    approved = _approved(db)
+    for filters in _filter_combinations():
+        for path, accepted in ENDPOINTS.items():
+            params = {name: filters[name] for name in accepted if filters[name] is not None}
+            expected = _expected(path, [p for p in approved if _matches(p, **params)])
+            assert client.get(path, params=params).json() == expected, (path, params)
+
+        params = {name: value for name, value in filters.items() if value is not None}
+        matching = {str(p.id) for p in approved if _matches(p, **params)}
+        listing = client.get("/api/dashboard/projects", params={**params, "page_size": 100}).json()
+        assert listing["total"] == len(matching)
+        assert {project["id"] for project in listing["projects"]} == matching
+        markers = client.get("/api/dashboard/map-markers", params=params).json()
+        located = {str(p.id) for p in approved if _matches(p, **params) and p.latitude is not None}
+        assert {marker["id"] for marker in markers} == located
+
+    options = client.get("/api/dashboard/filters").json()
+    assert options["cities"] == sorted({p.city for p in approved})
+    assert options["funding_sources"] == sorted(set().union(*map(_funding_sources, approved)))
+
+
+def test_snapshot_matches_database(client, db, dataset):
+    _assert_matches_database(client, db)
+
+
+def test_admin_actions_update_snapshot_in_place(client, db, dataset, as_admin):
+    _assert_matches_database(client, db)
+    loaded_at = dashboard_snapshot.loaded_at
+
+    response = client.post(f"/api/admin/projects/{dataset['pending']}/approve")
+    assert response.status_code == 200
+    _assert_matches_database(client, db)
+
+    response = client.post(f"/api/admin/projects/{dataset['water']}/reject", params={"reason": "Duplicate"})
+    assert response.status_code == 200
+    _assert_matches_database(client, db)
+
+    response = client.delete(f"/api/admin/projects/{dataset['roofs']}")
+    assert response.status_code == 200
+    _assert_matches_database(client, db)
+
+    # Maintained incrementally, never rebuilt
+    assert dashboard_snapshot.loaded_at == loaded_at
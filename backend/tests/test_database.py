@@ -0,0 +1,40 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy import event, text
+from app.core.database import AsyncSessionLocal, async_database_url, async_engine
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./atlas.db") == "sqlite+aiosqlite:///./atlas.db"
+    assert async_database_url("postgresql://u:p@db:5432/atlas?sslmode=require") == \
+        "postgresql+asyncpg://u:p@db:5432/atlas?ssl=require"
+    assert async_database_url("postgresql+psycopg2://u:p@db/atlas") == "postgresql+asyncpg://u:p@db/atlas"
+    assert async_database_url("postgresql+asyncpg://u:p@db/atlas") == "postgresql+asyncpg://u:p@db/atlas"
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_do_not_block_the_event_loop(db):
+    def connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function("slow", 0, lambda: time.sleep(0.3) or 1)
+
+    ticks = []
+
+    async def tick():
+        for _ in range(10):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    event.listen(async_engine.sync_engine, "connect", connect)
+    try:
+        async with AsyncSessionLocal() as session:
+            start = time.perf_counter()
+            result, _ = await asyncio.gather(session.scalar(text("SELECT slow()")), tick())
+            elapsed = time.perf_counter() - start
+    finally:
+        event.remove(async_engine.sync_engine, "connect", connect)
+
+    assert result == 1
+    assert elapsed >= 0.3
+    # The ticks ran while the query was sleeping in the driver's thread
+    assert ticks[-1] - start < 0.3
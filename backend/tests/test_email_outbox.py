@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime
+import pytest
+import pytest_asyncio
+from app.core.config import settings
+from app.models.email import EmailOutbox, EmailStatus
+from app.models.project import WorkflowStatus
+from app.services.email import queue_email
+from app.services.email_outbox import EmailOutboxWorker
+from app.services.smtp_sink import SMTPSink
+
+
+@pytest_asyncio.fixture
+async def smtp_sink(monkeypatch):
+    async with SMTPSink() as sink:
+        monkeypatch.setattr(settings, "SMTP_HOST", sink.host)
+        monkeypatch.setattr(settings, "SMTP_PORT", sink.port)
+        monkeypatch.setattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 2)
+        yield sink
+
+
+def _queue(db, count):
+    for i in range(count):
+        queue_email(db, f"user{i}@example.org", f"Subject {i}", f"<p>Message {i}</p>")
+    db.commit()
+
+
+def _outbox(db):
+    db.expire_all()
+    return db.query(EmailOutbox).order_by(EmailOutbox.id).all()
+
+
+def test_workflow_change_and_email_commit_together(client, make_project, admin_headers, db):
+    project = make_project("Outbox Project", workflow_status=WorkflowStatus.SUBMITTED)
+    response = client.post(
+        f"/api/admin/projects/{project.id}/reject",
+        params={"reason": "Out of scope"}, headers=admin_headers,
+    )
+    assert response.status_code == 200
+
+    [email] = _outbox(db)
+    assert (email.to_email, email.status, email.attempts) == (project.contact_email, EmailStatus.PENDING, 0)
+    assert "Out of scope" in email.html_content
+
+
+@pytest.mark.asyncio
+async def test_batches_share_one_smtp_connection(db, smtp_sink):
+    _queue(db, 5)
+    worker = EmailOutboxWorker()
+    assert await worker.drain() == 5
+    _queue(db, 1)
+    assert await worker.drain() == 1
+    await worker.stop()
+
+    assert smtp_sink.connections == 1
+    assert [m["Subject"] for m in smtp_sink.messages] == [f"Subject {i}" for i in (0, 1, 2, 3, 4, 0)]
+    assert {(e.status, e.attempts) for e in _outbox(db)} == {(EmailStatus.SENT, 1)}
+
+
+@pytest.mark.asyncio
+async def test_failed_sends_are_retried_with_backoff(db, smtp_sink, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_SECONDS", 60)
+    smtp_sink.refusals = [(451, "Try again later"), (550, "No such user")]
+    _queue(db, 3)
+    worker = EmailOutboxWorker()
+    await worker.drain()
+    await worker._close()
+
+    retried, failed, sent = _outbox(db)
+    assert retried.status == EmailStatus.PENDING and "451" in retried.last_error
+    assert 55 <= (retried.next_attempt_at - datetime.utcnow()).total_seconds() <= 60
+    assert failed.status == EmailStatus.FAILED and "550" in failed.last_error
+    assert sent.status == EmailStatus.SENT
+    assert len(smtp_sink.messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_the_outbox(db, smtp_sink, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_POLL_SECONDS", 60)
+    worker = EmailOutboxWorker()
+    worker.start()
+    await asyncio.sleep(0.05)
+    # Queued after the worker went idle, without a wake-up
+    _queue(db, 3)
+    await worker.stop()
+
+    assert len(smtp_sink.messages) == 3
+    assert all(e.status == EmailStatus.SENT for e in _outbox(db))
@@ -0,0 +1,70 @@
+import csv
+import gzip
+import io
+import json
+import pyarrow.parquet
+import pytest
+from app.core.database import AsyncSessionLocal
+from app.models.project import WorkflowStatus
+from app.services.export import EXPORT_FIELDS, NDJSONFormat, export_projects
+
+
+@pytest.fixture
+def exported_projects(make_project):
+    make_project("Superblocks", sdgs=(11, 3), typologies=("Public Space", "Mobility"))
+    make_project("Library Parks", latitude=None, longitude=None, funding=("Public Sector Funding", "Private Investment"))
+    make_project("Pending", workflow_status=WorkflowStatus.SUBMITTED)
+
+
+def test_export_formats(client, exported_projects):
+    listed = client.get("/api/dashboard/projects", params={"sort_by": "created_at", "sort_order": "asc"}).json()
+    expected = [{name: project[name] for name in EXPORT_FIELDS} for project in listed["projects"]]
+
+    response = client.get("/api/dashboard/export", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="projects.ndjson"'
+    assert [json.loads(line) for line in response.text.splitlines()] == expected
+
+    response = client.get("/api/dashboard/export", params={"format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["project_name"] for row in rows] == ["Superblocks", "Library Parks"]
+    assert rows[1]["funding_requirements"] == "Public Sector Funding; Private Investment"
+    assert rows[1]["latitude"] == ""
+
+    response = client.get("/api/dashboard/export", params={"format": "geojson"})
+    collection = response.json()
+    assert collection["type"] == "FeatureCollection"
+    assert [feature["geometry"] for feature in collection["features"]] == [
+        {"type": "Point", "coordinates": [2.1734, 41.3851]}, None
+    ]
+    assert collection["features"][0]["properties"]["sdgs"] == [11, 3]
+
+    response = client.get("/api/dashboard/export", params={"format": "parquet"})
+    table = pyarrow.parquet.read_table(io.BytesIO(response.content))
+    assert table.column("project_name").to_pylist() == ["Superblocks", "Library Parks"]
+    assert table.column("typologies").to_pylist()[0] == ["Public Space", "Mobility"]
+
+
+def test_export_is_compressed_and_revalidated(client, exported_projects):
+    response = client.get("/api/dashboard/export", params={"format": "csv"}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text.startswith("id,project_name,")
+
+    response = client.get(
+        "/api/dashboard/export", params={"format": "csv"}, headers={"If-None-Match": response.headers["etag"]}
+    )
+    assert response.status_code == 304
+
+    assert client.get("/api/dashboard/export", params={"format": "xml"}).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_export_streams_in_chunks(db, exported_projects, query_counter):
+    chunks = []
+    body = b"".join([
+        chunk async for chunk in export_projects(AsyncSessionLocal, NDJSONFormat(), chunk_size=1, on_chunk=chunks.append)
+    ])
+    assert chunks == [1, 1]
+    assert len(body.splitlines()) == 2
+    # One cursor, then one SELECT per child table for each chunk
+    assert len([statement for statement in query_counter if statement.lstrip().startswith("SELECT")]) == 1 + 2 * 4
@@ -0,0 +1,120 @@
+import asyncio
+import io
+from collections import Counter
+from PIL import Image
+import pytest
+import pytest_asyncio
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.project import ImageCheck, ProjectImage
+from app.services.image_checks import check_images
+
+
+def _image(size, image_format):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "blue").save(buffer, image_format)
+    return buffer.getvalue()
+
+
+class ImageHost:
+    """Local HTTP/1.1 stand-in serving fixed responses and counting requests per Host"""
+
+    def __init__(self, delay: float = 0.02):
+        self.routes = {}
+        self.delay = delay
+        self.requests = Counter()
+        self.in_flight = Counter()
+        self.peak = Counter()
+
+    async def start(self) -> "ImageHost":
+        self.server = await asyncio.start_server(self._handle, "0.0.0.0", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    def url(self, path: str, host: str = "127.0.0.1") -> str:
+        return f"http://{host}:{self.port}{path}"
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                host = headers["host"].split(":")[0]
+                self.requests[host] += 1
+                self.in_flight[host] += 1
+                self.peak[host] = max(self.peak[host], self.in_flight[host])
+                await asyncio.sleep(self.delay)
+                self.in_flight[host] -= 1
+
+                path = request_line.split()[1].decode()
+                status, content_type, body, etag = self.routes.get(path, (404, "text/plain", b"Not found", None))
+                if etag is not None and headers.get("if-none-match") == etag:
+                    status, body = 304, b""
+                head = [f"HTTP/1.1 {status} X", f"Content-Length: {len(body)}", f"Content-Type: {content_type}"]
+                if etag is not None:
+                    head.append(f"ETag: {etag}")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+
+@pytest_asyncio.fixture
+async def image_host(monkeypatch):
+    host = await ImageHost().start()
+    monkeypatch.setattr(settings, "IMAGE_CHECK_BASE_URL", host.url("/", host="127.0.0.2"))
+    yield host
+    await host.stop()
+
+
+@pytest.mark.asyncio
+async def test_image_urls_are_checked_concurrently_and_incrementally(db, make_project, image_host):
+    png, jpeg = _image((40, 30), "PNG"), _image((1200, 800), "JPEG")
+    for i in range(6):
+        image_host.routes[f"/img/{i}.png"] = (200, "image/png", png, f'"png-{i}"')
+    image_host.routes["/project_images/photo.jpg"] = (200, "image/jpeg", jpeg, '"photo"')
+    image_host.routes["/page.html"] = (200, "text/html; charset=utf-8", b"<html></html>", None)
+    make_project("Local", image_urls=[image_host.url(f"/img/{i}.png") for i in range(6)])
+    make_project("Mixed", image_urls=(
+        "/project_images/photo.jpg", image_host.url("/missing.jpg"), image_host.url("/page.html"),
+    ))
+
+    stats = await check_images(AsyncSessionLocal, concurrency=10, per_host=2)
+    assert (stats.urls, stats.checked, stats.ok, stats.broken) == (9, 9, 7, 2)
+    # Never more than per_host requests against one host at a time
+    assert image_host.peak["127.0.0.1"] == 2
+    assert image_host.requests == {"127.0.0.1": 8, "127.0.0.2": 1}
+
+    checks = {check.url: check for check in db.query(ImageCheck)}
+    photo = checks["/project_images/photo.jpg"]
+    assert (photo.ok, photo.content_type, photo.bytes, photo.width, photo.height) == (True, "image/jpeg", len(jpeg), 1200, 800)
+    assert (checks[image_host.url("/missing.jpg")].status_code, checks[image_host.url("/missing.jpg")].error) == (404, "HTTP 404")
+    assert checks[image_host.url("/page.html")].error == "Not an image: text/html"
+
+    # Fresh checks are not repeated
+    stats = await check_images(AsyncSessionLocal)
+    assert (stats.due, sum(image_host.requests.values())) == (0, 9)
+
+    # Re-checks send the ETag; a 304 keeps the recorded metadata
+    stats = await check_images(AsyncSessionLocal, force=True)
+    assert (stats.due, stats.not_modified, stats.ok) == (9, 7, 7)
+    assert (await check_images(AsyncSessionLocal, force=True, limit=4)).due == 4
+    db.expire_all()
+    assert db.query(ImageCheck).filter_by(url="/project_images/photo.jpg").one().width == 1200
+
+    # Checks of URLs no project uses are dropped
+    db.query(ProjectImage).filter_by(image_url="/project_images/photo.jpg").delete()
+    db.commit()
+    stats = await check_images(AsyncSessionLocal)
+    assert (stats.pruned, db.query(ImageCheck).count()) == (1, 8)
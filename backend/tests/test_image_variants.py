@@ -0,0 +1,83 @@
+import re
+import httpx
+from PIL import Image
+import pytest
+from app.core.config import settings
+from app.models.project import ImageVariant
+from app.services.image_variants import generate_image_variants
+
+
+@pytest.fixture
+def image_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROJECT_IMAGES_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "IMAGE_VARIANT_FORMATS", "avif,webp")
+    Image.linear_gradient("L").resize((2000, 1000)).convert("RGB").save(tmp_path / "wide.jpg", quality=95)
+    Image.new("RGB", (400, 300), "green").save(tmp_path / "small.png")
+    return tmp_path
+
+
+def _frontend(folder):
+    """Transport answering like the deployed frontend serving the image folder"""
+    def handler(request):
+        path = folder / request.url.path.removeprefix("/project_images/")
+        return httpx.Response(200 if path.is_file() else 404)
+    return httpx.MockTransport(handler)
+
+
+def test_variants_are_rendered_once_and_served(client, db, make_project, image_folder):
+    make_project("Wide", image_urls=("/project_images/wide.jpg", "/project_images/small.png"))
+    make_project("Small", image_urls=("/project_images/small.png",))
+    make_project("Remote", image_urls=("https://example.org/photo.jpg", "/project_images/missing.jpg"))
+
+    # Written, but not recorded while the frontend does not serve them
+    stats = generate_image_variants(db, transport=httpx.MockTransport(lambda request: httpx.Response(404)))
+    assert (stats.files, stats.rendered, len(stats.unpublished)) == (10, 0, 2)
+    assert db.query(ImageVariant).count() == 0
+
+    stats = generate_image_variants(db, transport=_frontend(image_folder))
+    assert (stats.images, stats.rendered, stats.skipped, stats.failed) == (4, 2, 1, 1)
+    # Never upscaled: the 400 px image only has a 320 px variant and itself
+    widths = {
+        url: sorted({v.width for v in db.query(ImageVariant).filter_by(source_url=url)})
+        for url in ("/project_images/wide.jpg", "/project_images/small.png")
+    }
+    assert widths == {"/project_images/wide.jpg": [320, 640, 1600], "/project_images/small.png": [320, 400]}
+    variant = db.query(ImageVariant).filter_by(source_url="/project_images/wide.jpg", width=640, format="webp").one()
+    assert (image_folder / "variants" / variant.url.rsplit("/", 1)[1]).stat().st_size == variant.bytes
+    assert variant.bytes < (image_folder / "wide.jpg").stat().st_size / 10
+
+    markers = {m["project_name"]: m for m in client.get("/api/dashboard/map-markers").json()}
+    assert re.fullmatch(r"/project_images/variants/wide-320w\.[0-9a-f]{12}\.webp", markers["Wide"]["image_url"])
+    assert markers["Wide"]["image"]["width"] == 320
+    assert set(markers["Wide"]["image"]["sources"]) == {"image/avif", "image/webp"}
+    # Images without variants are served as they are
+    assert markers["Remote"]["image"] == {
+        "url": "https://example.org/photo.jpg", "width": None, "height": None, "sources": {},
+        "original_url": "https://example.org/photo.jpg",
+    }
+    assert markers["Wide"]["image"]["original_url"] == "/project_images/wide.jpg"
+
+    listed = client.get("/api/dashboard/projects", params={"view": "summary"}).json()["projects"]
+    cards = {project["project_name"]: project["image"] for project in listed}
+    assert (cards["Wide"]["width"], cards["Wide"]["height"]) == (640, 320)
+    assert cards["Small"]["width"] == 400
+
+    # Unchanged files are not rendered again; a changed one is
+    assert generate_image_variants(db, transport=_frontend(image_folder)).unchanged == 2
+    Image.new("RGB", (800, 800), "red").save(image_folder / "small.png")
+    stats = generate_image_variants(db, transport=_frontend(image_folder))
+    assert (stats.rendered, stats.unchanged) == (1, 1)
+    assert sorted({v.width for v in db.query(ImageVariant).filter_by(source_url="/project_images/small.png")}) == [320, 640, 800]
+
+
+def test_unreadable_image_does_not_stop_parallel_run(db, make_project, image_folder):
+    (image_folder / "broken.jpg").write_bytes(b"not an image")
+    make_project("Mixed", image_urls=(
+        "/project_images/broken.jpg", "/project_images/small.png", "/project_images/wide.jpg",
+    ))
+
+    stats = generate_image_variants(db, workers=2, transport=_frontend(image_folder))
+    assert (stats.rendered, stats.failed) == (2, 1)
+    assert stats.errors[0][0] == "/project_images/broken.jpg"
+    assert stats.errors[0][1].startswith("UnidentifiedImageError")
+    assert {v.source_url for v in db.query(ImageVariant)} == {"/project_images/small.png", "/project_images/wide.jpg"}
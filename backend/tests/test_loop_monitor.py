@@ -0,0 +1,52 @@
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.core.config import settings
+from app.core.loop_monitor import LoopMonitorMiddleware, loop_monitor, percentile
+
+
+def test_percentile():
+    ordered = [float(i) for i in range(1, 101)]
+    assert (percentile(ordered, 0.5), percentile(ordered, 0.99), percentile(ordered, 1.0)) == (50.0, 99.0, 100.0)
+    assert percentile([], 0.5) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_stalls_are_attributed_to_the_route(monkeypatch):
+    monkeypatch.setattr(settings, "LOOP_MONITOR_INTERVAL_MS", 10)
+    monkeypatch.setattr(settings, "LOOP_MONITOR_STALL_MS", 50)
+    app = FastAPI()
+
+    @app.get("/reports/{report_id}")
+    async def blocking_report(report_id: int):
+        time.sleep(0.2)
+        return {"id": report_id}
+
+    app.add_middleware(LoopMonitorMiddleware)
+    loop_monitor.reset()
+    loop_monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/reports/7")).status_code == 200
+        await asyncio.sleep(0.05)
+    finally:
+        await loop_monitor.stop()
+
+    info = loop_monitor.info()
+    assert info["stalls"] == 1
+    stall = info["recent_stalls"][0]
+    assert stall["route"] == "GET /reports/{report_id}"
+    assert stall["lag_ms"] >= 150
+    assert any("blocking_report" in frame for frame in stall["stack"])
+    assert info["lag_ms"]["max"] == pytest.approx(stall["lag_ms"], abs=0.1)
+    assert info["lag_ms"]["p50"] < 50
+
+
+def test_loop_lag_endpoint(client, admin_headers):
+    response = client.get("/api/admin/loop-lag", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["running"] is False
+    assert set(response.json()["lag_ms"]) == {"p50", "p90", "p99", "max"}
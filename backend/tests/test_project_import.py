@@ -0,0 +1,98 @@
+import csv
+import json
+from pathlib import Path
+import openpyxl
+import pytest
+from sqlalchemy.orm import undefer_group
+from app.core.database import AsyncSessionLocal
+from app.models.project import CONTENT_GROUP, Project, ProjectImage, ProjectSDG, ProjectStatus, UIARegion, WorkflowStatus
+from app.services.project_import import ImportFormatError, import_records, read_records
+
+REPOSITORY_ROOT = Path(__file__).resolve().parents[2]
+
+HEADER = [
+    "Project Name", "Organization Name", "Contact Person", "Contact Email", "Status", "Region",
+    "City", "Country", "Latitude", "Longitude", "Funding Needed", "Brief Description",
+    "Detailed Description", "Success Factors", "Typologies", "Funding Requirements", "SDGs", "Image URLs",
+]
+
+
+def _row(name, city="Porto", brief="Brief", sdgs="11;13", images="/project_images/a.jpg|/project_images/b.jpg"):
+    return [
+        name, "City Council", "Ana Costa", "ana@example.org", "In Progress", "Section I - Western Europe",
+        city, "Portugal", 41.15, -8.61, 1000, brief, "Detailed", "Factors", "Parks; Mobility",
+        "Public Sector Funding", sdgs, images,
+    ]
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return path
+
+
+async def _import(path, **options):
+    return await import_records(AsyncSessionLocal, read_records(path), **options)
+
+
+@pytest.mark.asyncio
+async def test_csv_import_is_an_idempotent_upsert(db, tmp_path):
+    path = _write_csv(tmp_path / "projects.csv", [
+        _row("Riverside Parks"), _row("Tram Line", city="Braga"), _row("Broken", sdgs="99"),
+    ])
+    stats = await _import(path, batch_size=2)
+    assert (stats.read, stats.inserted, stats.rejected, stats.batches) == (3, 2, 1, 1)
+    assert stats.errors == [("projects.csv row 4", "sdgs: Value error, SDG numbers must be between 1 and 17")]
+
+    project = db.query(Project).filter_by(project_name="Riverside Parks").one()
+    assert (project.project_status, project.uia_region) == (ProjectStatus.IN_PROGRESS, UIARegion.SECTION_I)
+    assert project.workflow_status == WorkflowStatus.APPROVED
+    assert project.geohash is not None
+    assert sorted(sdg.sdg_number for sdg in db.query(ProjectSDG).filter_by(project_id=project.id)) == [11, 13]
+
+    stats = await _import(path, batch_size=2)
+    assert (stats.inserted, stats.updated, stats.unchanged, stats.child_rows) == (0, 0, 2, 0)
+    assert db.query(Project).count() == 2
+
+    # Edits update in place; the review status set by an admin is kept
+    project.workflow_status = WorkflowStatus.REJECTED
+    db.commit()
+    _write_csv(path, [_row("Riverside Parks", brief="New brief", images="/project_images/a.jpg"), _row("Tram Line", city="Braga")])
+    stats = await _import(path)
+    assert (stats.inserted, stats.updated, stats.unchanged, stats.child_rows) == (0, 1, 1, 1)
+    db.expire_all()
+    project = db.query(Project).options(undefer_group(CONTENT_GROUP)).filter_by(project_name="Riverside Parks").one()
+    assert (project.brief_description, project.workflow_status) == ("New brief", WorkflowStatus.REJECTED)
+    assert [image.image_url for image in db.query(ProjectImage).filter_by(project_id=project.id)] == ["/project_images/a.jpg"]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_and_xlsx_share_the_natural_key(db, tmp_path):
+    record = dict(zip(HEADER, _row("Riverside Parks")))
+    ndjson = tmp_path / "projects.ndjson"
+    ndjson.write_text("\n".join([
+        json.dumps({**record, "SDGs": [11, 13], "Status": "in_progress", "Region": "SECTION_I"}),
+        "{not json",
+        "",
+    ]))
+    stats = await _import(ndjson)
+    assert (stats.inserted, stats.rejected) == (1, 1)
+    assert stats.errors[0][0] == "projects.ndjson line 2"
+
+    workbook = openpyxl.Workbook()
+    workbook.active.append(HEADER)
+    workbook.active.append(_row(" riverside  parks"))
+    workbook.active.append(_row("Tram Line", city="Braga"))
+    workbook.save(tmp_path / "projects.xlsx")
+    stats = await _import(tmp_path / "projects.xlsx")
+    # Same key despite case and spacing: the name is updated, not duplicated
+    assert (stats.inserted, stats.updated) == (1, 1)
+    assert db.query(Project).count() == 2
+
+
+def test_spreadsheets_without_project_columns_are_refused():
+    records = read_records(REPOSITORY_ROOT / "BALANÇO ZM.xls")
+    with pytest.raises(ImportFormatError, match="is not a project table: missing columns"):
+        next(records)
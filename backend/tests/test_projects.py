@@ -0,0 +1,57 @@
+from uuid import UUID
+from app.core.loading import PROJECT_DETAIL_LOADING
+from app.models.project import Project, WorkflowStatus
+
+
+def test_project_conditional_get_skips_child_loads(client, make_project, admin_headers, query_counter):
+    project = make_project("Published")
+    path = f"/api/projects/{project.id}"
+
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    query_counter.clear()
+    cached = client.get(path, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert len(query_counter) == 1
+
+    cached = client.get(path, headers={"If-Modified-Since": first.headers["last-modified"]})
+    assert cached.status_code == 304
+
+    # Editing the project changes updated_at and so the ETag
+    client.patch(f"/api/admin/projects/{project.id}", json={"city": "Girona"}, headers=admin_headers)
+    fresh = client.get(path, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()["city"] == "Girona"
+
+
+def test_unapproved_project_has_no_etag(client, make_project):
+    project = make_project("Pending", workflow_status=WorkflowStatus.SUBMITTED)
+    response = client.get(f"/api/projects/{project.id}", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+
+
+def test_submit_writes_children_in_bulk_without_rereading(client, submission, query_counter, db):
+    submission = {**submission, "sdgs": [3, 11, 13], "other_requirements": ["Training", "Volunteers"],
+                  "image_urls": ["/project_images/a.jpg", "/project_images/b.jpg"]}
+    response = client.post("/api/projects/submit", json=submission)
+    assert response.status_code == 201
+
+    statements = [s.split()[0].upper() for s in query_counter]
+    # Project, four child tables, outbox; nothing read back
+    assert statements.count("INSERT") == 6
+    assert "SELECT" not in statements
+
+    body = response.json()
+    assert body["sdgs"] == [3, 11, 13]
+    assert body["funding_requirements"] == ["Public Sector Funding"]
+    assert body["other_requirements"] == ["Training", "Volunteers"]
+    assert body["image_urls"] == ["/project_images/a.jpg", "/project_images/b.jpg"]
+    assert (body["project_status"], body["uia_region"], body["workflow_status"]) == ("Planned", "Section I - Western Europe", "submitted")
+
+    # The response is what a later read returns
+    project = db.query(Project).options(*PROJECT_DETAIL_LOADING).filter(Project.id == UUID(body["id"])).one()
+    assert project.project_name == submission["project_name"]
+    assert sorted(s.sdg_number for s in project.sdgs) == [3, 11, 13]
+    assert [i.image_url for i in sorted(project.images, key=lambda i: i.display_order)] == submission["image_urls"]
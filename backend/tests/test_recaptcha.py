@@ -0,0 +1,111 @@
+import asyncio
+import httpx
+import pytest
+from app.core.config import settings
+from app.services.recaptcha import CaptchaUnavailable, GoogleCaptchaVerifier
+
+
+def _google(handler):
+    calls = []
+
+    def transport(request):
+        calls.append(request)
+        return handler(request)
+
+    return GoogleCaptchaVerifier(transport=httpx.MockTransport(transport)), calls
+
+
+def test_submit_with_local_verifier(client, submission):
+    response = client.post("/api/projects/submit", json=submission)
+    assert response.status_code == 201
+    assert response.json()["project_name"] == "Riverside Parks"
+
+    response = client.post("/api/projects/submit", json={**submission, "captcha_token": "invalid-token"})
+    assert (response.status_code, response.json()["detail"]) == (400, "reCAPTCHA verification failed")
+    response = client.post("/api/projects/submit", json={**submission, "captcha_token": None})
+    assert (response.status_code, response.json()["detail"]) == (400, "reCAPTCHA verification required")
+
+
+def test_submit_validation_errors(client, submission):
+    response = client.post("/api/projects/submit", json={**submission, "gdpr_consent": False})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "gdpr_consent"]
+
+    response = client.post("/api/projects/submit", content=b"{not json", headers={"Content-Type": "application/json"})
+    assert response.status_code == 422
+
+    body = client.get("/openapi.json").json()["paths"]["/api/projects/submit"]["post"]["requestBody"]
+    assert body["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/ProjectCreate"}
+
+
+@pytest.mark.asyncio
+async def test_verified_tokens_are_cached():
+    verifier, calls = _google(lambda request: httpx.Response(200, json={"success": True}))
+    assert await verifier.verify("token-a") is True
+    assert await verifier.verify("token-a") is True
+    assert len(calls) == 1
+    assert b"response=token-a" in calls[0].content
+    # The cached token absorbs one retry only; later uses go back to Google
+    await verifier.verify("token-a")
+    assert len(calls) == 2
+
+    verifier, calls = _google(lambda request: httpx.Response(200, json={"success": False}))
+    assert await verifier.verify("token-b") is False
+    assert await verifier.verify("token-b") is False
+    assert len(calls) == 2
+    await verifier.aclose()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast(monkeypatch):
+    monkeypatch.setattr(settings, "RECAPTCHA_BREAKER_FAILURES", 2)
+    monkeypatch.setattr(settings, "RECAPTCHA_BREAKER_RESET_SECONDS", 0.1)
+    healthy = False
+
+    def handler(request):
+        if not healthy:
+            raise httpx.ConnectTimeout("timed out", request=request)
+        return httpx.Response(200, json={"success": True})
+
+    verifier, calls = _google(handler)
+    for i in range(4):
+        with pytest.raises(CaptchaUnavailable):
+            await verifier.verify(f"token-{i}")
+    # Open after two failures: the last two calls never reached Google
+    assert len(calls) == 2
+    assert verifier.breaker.state == "open"
+
+    await asyncio.sleep(0.1)
+    healthy = True
+    assert await verifier.verify("token-5") is True
+    assert verifier.breaker.state == "closed"
+    assert len(calls) == 3
+    await verifier.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_does_not_wedge_the_breaker(monkeypatch):
+    monkeypatch.setattr(settings, "RECAPTCHA_BREAKER_FAILURES", 1)
+    monkeypatch.setattr(settings, "RECAPTCHA_BREAKER_RESET_SECONDS", 0.05)
+    slow = asyncio.Event()
+
+    async def handler(request):
+        if not slow.is_set():
+            raise httpx.ConnectTimeout("timed out", request=request)
+        await asyncio.sleep(10)
+
+    verifier, calls = _google(handler)
+    with pytest.raises(CaptchaUnavailable):
+        await verifier.verify("token-1")
+    await asyncio.sleep(0.05)
+
+    # The half-open trial is cancelled, as when the submission fails validation
+    slow.set()
+    trial = asyncio.ensure_future(verifier.verify("token-2"))
+    await asyncio.sleep(0.01)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    assert verifier.breaker.state == "half-open"
+    assert verifier.breaker.allow()
+    await verifier.aclose()
@@ -0,0 +1,28 @@
+import random
+import pytest
+from app.models.spatial import encode_geohash
+from app.services.spatial import MAX_GEOHASH_RANGES, geohash_prefixes
+
+
+def test_encode_geohash_known_value():
+    assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+@pytest.mark.parametrize("bbox", [
+    (2.0, 41.0, 2.5, 41.5),
+    (-10.0, 35.0, 30.0, 60.0),
+    (170.0, -40.0, -150.0, 25.0),
+    (-180.0, -90.0, 180.0, 90.0),
+])
+def test_geohash_prefixes_cover_bbox(bbox):
+    west, south, east, north = bbox
+    prefixes = geohash_prefixes(bbox)
+    assert len(prefixes) <= 2 * MAX_GEOHASH_RANGES
+
+    rng = random.Random(0)
+    width = (east - west) % 360 or 360
+    for _ in range(500):
+        latitude = rng.uniform(south, north)
+        longitude = (west + rng.uniform(0, width) + 180) % 360 - 180
+        geohash = encode_geohash(latitude, longitude)
+        assert any(geohash.startswith(prefix) for prefix in prefixes)
@@ -1,4 +1,3 @@
-import { useEffect, useState } from 'react';
 import {
   BarChart,
   Bar,
@@ -12,11 +11,10 @@ import {
   Pie,
   Cell,
 } from 'recharts';
-import { dashboardAPI } from '../../services/api/dashboard';
-import type { FilterOptions } from '../../types';
+import type { DashboardAnalytics } from '../../types';
 
 interface AnalyticsPanelProps {
-  filters: FilterOptions;
+  data: DashboardAnalytics | null;
   onClose: () => void;
 }
 
@@ -26,33 +24,12 @@ const COLORS = [
   '#3F7E44', '#0A97D9', '#56C02B', '#00689D', '#19486A'
 ];
 
-export default function AnalyticsPanel({ filters, onClose }: AnalyticsPanelProps) {
-  const [sdgData, setSdgData] = useState<any[]>([]);
-  const [regionData, setRegionData] = useState<any[]>([]);
-  const [typologyData, setTypologyData] = useState<any[]>([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    const fetchData = async () => {
-      setLoading(true);
-      try {
-        const [sdg, region, typology] = await Promise.all([
-          dashboardAPI.getSDGDistribution(filters),
-          dashboardAPI.getRegionalDistribution(filters),
-          dashboardAPI.getTypologyDistribution(filters),
-        ]);
-        setSdgData(sdg);
-        setRegionData(region);
-        setTypologyData(typology);
-      } catch (error) {
-        console.error('Error loading analytics:', error);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchData();
-  }, [filters]);
+export default function AnalyticsPanel({ data, onClose }: AnalyticsPanelProps) {
+  // Distributions arrive with the dashboard bundle fetched by the parent
+  const loading = data === null;
+  const sdgData = data?.sdgDistribution ?? [];
+  const regionData = data?.regionalDistribution ?? [];
+  const typologyData = data?.typologyDistribution ?? [];
 
   return (
     <div className="absolute inset-0 z-50 bg-white/95 backdrop-blur-sm flex flex-col overflow-hidden animate-fade-in">
@@ -28,7 +28,7 @@ export default function ProjectTable({ filters, onProjectClick }: ProjectTablePr
     setLoading(true);
     try {
       // API expects filters, then page and pageSize
-      const data = await dashboardAPI.getProjects(filters, page, pageSize);
+      const data = await dashboardAPI.getProjects(filters, page, pageSize, 'created_at', 'desc', 'summary');
       setProjects(data.projects);
       setTotal(data.total);
     } catch (error) {
@@ -42,7 +42,7 @@ export default function ProjectTable({ filters, onProjectClick }: ProjectTablePr
     setExporting(true);
     try {
       // Fetch all (up to 1000) for export based on current filters
-      const data = await dashboardAPI.getProjects(filters, 1, 1000);
+      const data = await dashboardAPI.getProjects(filters, 1, 1000, 'created_at', 'desc', 'summary');
       const exportProjects = data.projects;
 
       if (exportProjects.length === 0) {
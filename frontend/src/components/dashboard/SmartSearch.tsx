@@ -47,7 +47,7 @@ export default function SmartSearch({ onProjectSelect, onFilterChange }: SmartSe
       setIsLoading(true);
       try {
         // Fetch all projects and filter locally (in production, do this server-side)
-        const projectsData = await dashboardAPI.getProjects({ search: query }, 1, 10);
+        const projectsData = await dashboardAPI.getProjects({ search: query }, 1, 10, 'relevance', 'desc', 'summary');
         const projects = projectsData.projects || [];
 
         const searchResults: SearchResult[] = [];
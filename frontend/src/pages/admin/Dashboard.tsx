@@ -17,8 +17,8 @@ export default function AdminDashboard() {
     setLoading(true);
     try {
       const data = activeTab === 'pending'
-        ? await adminAPI.getPendingProjects(page, 20)
-        : await adminAPI.getAllProjects(page, 20);
+        ? await adminAPI.getPendingProjects(page, 20, 'summary')
+        : await adminAPI.getAllProjects(page, 20, undefined, 'summary');
       
       setProjects(data.projects);
       setTotal(data.total);
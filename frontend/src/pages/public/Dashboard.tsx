@@ -5,7 +5,7 @@ import { useSearchParams } from 'react-router-dom';
 import L from 'leaflet';
 import 'leaflet/dist/leaflet.css';
 import { dashboardAPI } from '../../services/api/dashboard';
-import type { FilterOptions, DashboardKPIs, Project } from '../../types';
+import type { FilterOptions, DashboardKPIs, DashboardAnalytics, Project } from '../../types';
 import FilterControls from '../../components/dashboard/FilterControls';
 import ProjectDetailPanel from '../../components/dashboard/ProjectDetailPanel';
 import AnalyticsPanel from '../../components/dashboard/AnalyticsPanel';
@@ -35,8 +35,35 @@ interface MapMarker {
   fundingNeeded?: number;
   primarySdg?: number;
   imageUrl?: string;
+  // Thumbnail variant of the image, with per-format sources (image/avif, image/webp)
+  image?: { url: string; width?: number; height?: number; sources: Record<string, string>; originalUrl?: string };
 }
 
+// Popup image: the thumbnail variant, or the original image if the variant fails to load
+const MarkerImage = ({ marker }: { marker: MapMarker }) => {
+  const [failed, setFailed] = useState(false);
+  const original = marker.image?.originalUrl;
+  if (failed && original) {
+    return <img src={original} alt={marker.projectName} loading="lazy" className="w-full h-full object-cover" />;
+  }
+  return (
+    <picture>
+      {marker.image?.sources['image/avif'] && (
+        <source srcSet={marker.image.sources['image/avif']} type="image/avif" />
+      )}
+      <img
+        src={marker.imageUrl}
+        alt={marker.projectName}
+        width={marker.image?.width}
+        height={marker.image?.height}
+        loading="lazy"
+        onError={() => setFailed(true)}
+        className="w-full h-full object-cover transform hover:scale-105 transition-transform duration-500"
+      />
+    </picture>
+  );
+};
+
 const formatCurrency = (value: number | undefined | null) => {
   if (value === undefined || value === null) {
     return '$0';
@@ -78,6 +105,7 @@ export default function Dashboard() {
     totalFundingSpent: 0,
   });
   const [markers, setMarkers] = useState<MapMarker[]>([]);
+  const [analytics, setAnalytics] = useState<DashboardAnalytics | null>(null);
   const [selectedProject, setSelectedProject] = useState<Project | null>(null);
   const [filters, setFilters] = useState<FilterOptions>({
     region: 'All Regions',
@@ -96,37 +124,28 @@ export default function Dashboard() {
     }
   }, []);
 
-  // Fetch KPIs whenever filters change
+  // Fetch KPIs, markers and analytics in one request whenever filters change
   useEffect(() => {
-    const fetchKpis = async () => {
+    const fetchBundle = async () => {
+      setLoading(true);
       try {
-        const data = await dashboardAPI.getKPIs(filters);
-        setKpis(data);
+        const data = await dashboardAPI.getBundle(filters);
+        setKpis(data.kpis);
+        setMarkers(data.mapMarkers);
+        setAnalytics({
+          sdgDistribution: data.sdgDistribution,
+          regionalDistribution: data.regionalDistribution,
+          typologyDistribution: data.typologyDistribution,
+        });
       } catch (error) {
-        console.error('Error fetching KPIs:', error);
+        console.error('Error fetching dashboard data:', error);
+      } finally {
+        setLoading(false);
       }
     };
-    fetchKpis();
+    fetchBundle();
   }, [filters]);
 
-  // Fetch Markers only when in map view and filters change (or view switches to map)
-  useEffect(() => {
-    if (viewMode === 'map') {
-      const fetchMarkers = async () => {
-        setLoading(true);
-        try {
-          const data = await dashboardAPI.getMapMarkers(filters);
-          setMarkers(data);
-        } catch (error) {
-          console.error('Error fetching markers:', error);
-        } finally {
-          setLoading(false);
-        }
-      };
-      fetchMarkers();
-    }
-  }, [filters, viewMode]);
-
   const handleProjectSelect = async (projectId: string) => {
     try {
       const project = await dashboardAPI.getProject(projectId);
@@ -206,11 +225,7 @@ export default function Dashboard() {
                       <div className="bg-white rounded-lg shadow-sm overflow-hidden text-gray-900">
                         {marker.imageUrl ? (
                           <div className="h-32 w-full overflow-hidden">
-                             <img 
-                               src={marker.imageUrl} 
-                               alt={marker.projectName} 
-                               className="w-full h-full object-cover transform hover:scale-105 transition-transform duration-500" 
-                             />
+                             <MarkerImage marker={marker} />
                           </div>
                         ) : (
                            <div className="h-24 w-full bg-gray-100 flex items-center justify-center">
@@ -382,7 +397,7 @@ export default function Dashboard() {
 
       {/* Analytics Panel Overlay */}
       {showAnalytics && (
-        <AnalyticsPanel filters={filters} onClose={() => setShowAnalytics(false)} />
+        <AnalyticsPanel data={analytics} onClose={() => setShowAnalytics(false)} />
       )}
 
       {/* Sidebar Overlay */}
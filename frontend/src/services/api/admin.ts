@@ -9,9 +9,13 @@ export interface PaginatedProjects {
 }
 
 export const adminAPI = {
-  // Get pending projects
-  getPendingProjects: async (page = 1, pageSize = 20): Promise<PaginatedProjects> => {
-    const response = await apiClient.get(`/api/admin/pending-projects?page=${page}&page_size=${pageSize}`);
+  // Get pending projects; the summary view leaves out descriptions and contact details
+  getPendingProjects: async (
+    page = 1,
+    pageSize = 20,
+    view: 'summary' | 'full' = 'full'
+  ): Promise<PaginatedProjects> => {
+    const response = await apiClient.get(`/api/admin/pending-projects?page=${page}&page_size=${pageSize}&view=${view}`);
     return response.data;
   },
 
@@ -19,9 +23,10 @@ export const adminAPI = {
   getAllProjects: async (
     page = 1,
     pageSize = 20,
-    workflowStatus?: string
+    workflowStatus?: string,
+    view: 'summary' | 'full' = 'full'
   ): Promise<PaginatedProjects> => {
-    let url = `/api/admin/all-projects?page=${page}&page_size=${pageSize}`;
+    let url = `/api/admin/all-projects?page=${page}&page_size=${pageSize}&view=${view}`;
     if (workflowStatus) {
       url += `&workflow_status=${workflowStatus}`;
     }
@@ -1,5 +1,5 @@
 import { apiClient } from './client';
-import type { Project, DashboardKPIs, FilterOptions } from '../../types';
+import type { Project, DashboardKPIs, DashboardBundle, FilterOptions, MapClusters } from '../../types';
 
 export const dashboardAPI = {
   // Get available filters (cities, funding sources)
@@ -8,6 +8,29 @@ export const dashboardAPI = {
     return response.data;
   },
 
+  // Get filters, KPIs, map markers and analytics in a single request
+  getBundle: async (filters?: FilterOptions): Promise<DashboardBundle> => {
+    const params = new URLSearchParams();
+    if (filters?.region && filters.region !== 'All Regions') {
+      params.append('region', filters.region);
+    }
+    if (filters?.sdg && filters.sdg !== 'All SDGs') {
+      params.append('sdg', filters.sdg.toString());
+    }
+    if (filters?.city && filters.city !== 'All Cities') {
+      params.append('city', filters.city);
+    }
+    if (filters?.fundedBy && filters.fundedBy !== 'All') {
+      params.append('funded_by', filters.fundedBy);
+    }
+    if (filters?.search) {
+      params.append('search', filters.search);
+    }
+
+    const response = await apiClient.get(`/api/dashboard/bundle?${params.toString()}`);
+    return response.data;
+  },
+
   // Get KPIs
   getKPIs: async (filters?: FilterOptions): Promise<DashboardKPIs> => {
     const params = new URLSearchParams();
@@ -31,9 +54,12 @@ export const dashboardAPI = {
     return response.data;
   },
 
-  // Get map markers
-  getMapMarkers: async (filters?: FilterOptions) => {
+  // Get map markers, optionally only those inside [west, south, east, north]
+  getMapMarkers: async (filters?: FilterOptions, bbox?: [number, number, number, number]) => {
     const params = new URLSearchParams();
+    if (bbox) {
+      params.append('bbox', bbox.join(','));
+    }
     if (filters?.region && filters.region !== 'All Regions') {
       params.append('region', filters.region);
     }
@@ -54,19 +80,50 @@ export const dashboardAPI = {
     return response.data;
   },
 
-  // Get projects list
+  // Get clusters and single markers for the visible map area
+  getMapClusters: async (
+    bbox: [number, number, number, number],
+    zoom: number,
+    filters?: FilterOptions
+  ): Promise<MapClusters> => {
+    const params = new URLSearchParams();
+    params.append('bbox', bbox.join(','));
+    params.append('zoom', Math.floor(zoom).toString());
+    if (filters?.region && filters.region !== 'All Regions') {
+      params.append('region', filters.region);
+    }
+    if (filters?.sdg && filters.sdg !== 'All SDGs') {
+      params.append('sdg', filters.sdg.toString());
+    }
+    if (filters?.city && filters.city !== 'All Cities') {
+      params.append('city', filters.city);
+    }
+    if (filters?.fundedBy && filters.fundedBy !== 'All') {
+      params.append('funded_by', filters.fundedBy);
+    }
+    if (filters?.search) {
+      params.append('search', filters.search);
+    }
+
+    const response = await apiClient.get(`/api/dashboard/map-clusters?${params.toString()}`);
+    return response.data;
+  },
+
+  // Get projects list; the summary view leaves out descriptions and contact details
   getProjects: async (
     filters?: FilterOptions,
     page: number = 1,
     pageSize: number = 20,
     sortBy: string = 'created_at',
-    sortOrder: 'asc' | 'desc' = 'desc'
+    sortOrder: 'asc' | 'desc' = 'desc',
+    view: 'summary' | 'full' = 'full'
   ) => {
     const params = new URLSearchParams();
     params.append('page', page.toString());
     params.append('page_size', pageSize.toString());
     params.append('sort_by', sortBy);
     params.append('sort_order', sortOrder);
+    params.append('view', view);
 
     if (filters?.region && filters.region !== 'All Regions') {
       params.append('region', filters.region);
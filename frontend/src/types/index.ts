@@ -115,6 +115,33 @@ export interface DashboardKPIs {
   totalFundingSpent: number;
 }
 
+export interface DashboardAnalytics {
+  sdgDistribution: { sdg: number; count: number }[];
+  regionalDistribution: { region: string; projectCount: number; fundingNeeded: number }[];
+  typologyDistribution: { typology: string; count: number }[];
+}
+
+export interface DashboardBundle extends DashboardAnalytics {
+  filters: { cities: string[]; fundingSources: string[] };
+  kpis: DashboardKPIs;
+  mapMarkers: any[];
+}
+
+export interface MapCluster {
+  id: string;
+  latitude: number;
+  longitude: number;
+  count: number;
+  primarySdg: number | null;
+  region: string | null;
+}
+
+export interface MapClusters {
+  zoom: number;
+  clusters: MapCluster[];
+  markers: any[];
+}
+
 export interface FilterOptions {
   region?: UIARegion | 'All Regions';
   sdg?: SDG | 'All SDGs';